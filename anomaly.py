@@ -0,0 +1,426 @@
+"""Streaming anomaly detection for interval meter readings.
+
+Three models score each reading against its meter's history before the
+reading is folded in:
+
+    ewma      exponentially weighted mean and variance of every reading
+    rolling   mean and deviation of the meter's last `window` readings
+    seasonal  an EWMA level per time-of-day slot, so 2 kWh at 3am is judged
+              against other nights rather than against the evening peak;
+              the spread around those levels is pooled over all slots, as
+              a few readings per slot are too few to estimate it
+
+A reading is anomalous when its largest |z| over the warmed-up models
+exceeds the threshold. All state lives in NumPy arrays indexed by meter
+row, fixed in size per meter however long the stream runs (the rolling
+window is a ring buffer), and score() updates any mix of meters with array
+operations: readings are grouped by meter (or by meter and slot) and each
+recurrence is evaluated in closed form over blocks of consecutive readings,
+so a batch costs a handful of NumPy calls whether it holds one reading for
+each of a million meters or a year of readings for one.
+
+A reading a model finds anomalous is folded into that model clipped to
+the edge of its threshold band, so a spike neither drags the baseline
+along nor inflates the spread, and the readings after it aren't flagged as
+echoes of it. Clipping changes the state later readings are scored
+against, so a model repeats its pass over a batch until the clipped values
+settle: a batch without anomalies costs one pass, and each anomaly that
+moves the band of a later one in the same batch costs another. Every pass
+is causal, so the result is the same however a stream is split into
+batches.
+
+A detector is safe to share between threads; calls are serialized. State
+is per process. MeterStore holds the readings themselves, so a new
+process can prime() a meter from its history before scoring fresh data.
+"""
+import collections
+import threading
+
+import numpy as np
+
+ALPHA = 0.05
+WINDOW = 48
+SEASON_SECONDS = 24 * 60 * 60
+SEASON_SLOTS = 24
+SEASONAL_ALPHA = 0.2
+THRESHOLD = 4.0
+# Deviation floor as a fraction of the expected level, so a perfectly flat
+# load doesn't turn the first small wobble into an infinite z-score
+MIN_RELATIVE_STD = 0.05
+MIN_STD = 1e-6
+# Readings a meter (and, for the seasonal model, a slot) needs before scores count
+WARMUP = 16
+SEASONAL_WARMUP = 3
+KEEP_ALERTS = 20
+# History to prime() a meter with when a process first sees it: a month of
+# 1-minute readings
+PRIME_READINGS = 30 * 24 * 60
+
+MODELS = ("ewma", "rolling", "seasonal")
+# Keeps decay ** -j within 1e3 inside a block, so closed forms stay accurate
+MAX_WEIGHT_RATIO = 1e3
+# Clipped values that moved less than this between passes have settled
+SETTLE_TOLERANCE = 1e-9
+
+
+def _runs(keys):
+    """Starts and lengths of runs of equal values in a sorted array."""
+    if not len(keys):
+        return np.empty(0, np.intp), np.empty(0, np.intp)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return starts, np.diff(np.r_[starts, len(keys)])
+
+
+def _run_cumsum(values, starts, lengths):
+    """Inclusive cumulative sums restarting at every run.
+
+    Runs are padded to the next power of two and summed along rows, so the
+    work is at most twice the input and no sum crosses a run boundary.
+    """
+    out = np.empty_like(values)
+    buckets = np.ceil(np.log2(np.maximum(lengths, 1))).astype(np.intp)
+    for bucket in np.unique(buckets):
+        chosen = buckets == bucket
+        width = 1 << int(bucket)
+        columns = np.arange(width)
+        index = starts[chosen, None] + columns
+        valid = columns < lengths[chosen, None]
+        padded = np.where(valid, values[np.where(valid, index, 0)], 0.0)
+        out[index[valid]] = np.cumsum(padded, axis=1)[valid]
+    return out
+
+
+def _local_index(starts, lengths, size):
+    """Position of every element within its run."""
+    return np.arange(size) - np.repeat(starts, lengths)
+
+
+def decayed_scan(u, decay, starts, lengths, initial):
+    """y_j = decay * y_{j-1} + u_j along each run, from y_-1 = initial[run].
+
+    Returns y_{j-1} for every element (the state it is scored against) and
+    each run's final y. Runs are cut into blocks short enough that
+    decay ** -block stays small; every block is solved in closed form at
+    once, and a loop over block number carries the state across blocks.
+    """
+    block = max(1, int(np.log(MAX_WEIGHT_RATIO) / -np.log(decay)))
+    local = _local_index(starts, lengths, len(u))
+    j = local % block
+    piece_starts = np.flatnonzero(j == 0)
+    piece_lengths = np.diff(np.r_[piece_starts, len(u)])
+
+    # Within each block, starting from zero:
+    # y_j = decay^(j+1) * sum_{i<=j} decay^-(i+1) * u_i
+    grow = decay ** -(j + 1.0)
+    partial = _run_cumsum(grow * u, piece_starts, piece_lengths) / grow
+
+    # State entering each block
+    piece_end = partial[piece_starts + piece_lengths - 1]
+    piece_decay = decay ** piece_lengths
+    first_piece = np.flatnonzero(local[piece_starts] == 0)
+    pieces = np.diff(np.r_[first_piece, len(piece_starts)])
+    carry = np.empty(len(piece_starts))
+    carry[first_piece] = initial
+    by_pieces = np.argsort(-pieces, kind="stable")
+    active = np.searchsorted(-pieces[by_pieces], -np.arange(1, pieces.max(initial=1)), side="left")
+    for b, count in enumerate(active, 1):
+        current = first_piece[by_pieces[:count]] + b
+        carry[current] = piece_decay[current - 1] * carry[current - 1] + piece_end[current - 1]
+    last = first_piece + pieces - 1
+    final = piece_decay[last] * carry[last] + piece_end[last]
+
+    before = (partial - u) / decay + decay ** j * np.repeat(carry, piece_lengths)
+    return before, final
+
+
+def segmented_ewma(x, starts, lengths, mean, var, alpha):
+    """Run an EWMA mean/variance over each run of x.
+
+    mean and var are the per-run starting states; they are updated in place
+    to each run's final state. Returns the mean and variance every element
+    was scored against, i.e. before it was folded in.
+    """
+    decay = 1.0 - alpha  # 0 < alpha < 1
+    mean_before, mean[:] = decayed_scan(alpha * x, decay, starts, lengths, mean)
+    # v_j = decay * (v_{j-1} + alpha * d_j^2): the same recurrence on decay * alpha * d^2
+    var_before, var[:] = decayed_scan(decay * alpha * (x - mean_before) ** 2, decay, starts, lengths, var)
+    return mean_before, np.maximum(var_before, 0.0)
+
+
+class AnomalyDetector:
+    def __init__(self, alpha=ALPHA, window=WINDOW, season_seconds=SEASON_SECONDS,
+                 season_slots=SEASON_SLOTS, seasonal_alpha=SEASONAL_ALPHA, threshold=THRESHOLD,
+                 warmup=WARMUP, seasonal_warmup=SEASONAL_WARMUP, keep_alerts=KEEP_ALERTS, capacity=1024):
+        self.alpha = alpha
+        self.window = window
+        self.season_seconds = season_seconds
+        self.season_slots = season_slots
+        self.seasonal_alpha = seasonal_alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.seasonal_warmup = seasonal_warmup
+        self.keep_alerts = keep_alerts
+
+        self.index = {}
+        self.meters = []
+        self._alerts = []
+        self._lock = threading.RLock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.count = np.zeros(capacity, np.int64)
+        self.mean = np.zeros(capacity)
+        self.var = np.zeros(capacity)
+        # Last `window` readings; a meter's n-th reading goes in slot n % window
+        self.ring = np.zeros((capacity, self.window), np.float32)
+        self.roll_sum = np.zeros(capacity)
+        self.roll_sq = np.zeros(capacity)
+        self.season_mean = np.zeros((capacity, self.season_slots))
+        self.season_count = np.zeros((capacity, self.season_slots), np.int32)
+        self.residual_var = np.zeros(capacity)
+
+    def _grow(self, needed):
+        capacity = len(self.count)
+        if needed <= capacity:
+            return
+        old = {name: getattr(self, name) for name in
+               ("count", "mean", "var", "ring", "roll_sum", "roll_sq", "season_mean", "season_count",
+                "residual_var")}
+        self._allocate(max(needed, capacity * 2))
+        for name, values in old.items():
+            getattr(self, name)[:capacity] = values
+
+    def __len__(self):
+        return len(self.meters)
+
+    def __contains__(self, meter):
+        return meter in self.index
+
+    def rows(self, meters):
+        """Row of each meter id, adding unseen meters."""
+        with self._lock:
+            return self._rows(meters)
+
+    def _rows(self, meters):
+        rows = np.empty(len(meters), np.intp)
+        for i, meter in enumerate(meters):
+            row = self.index.get(meter)
+            if row is None:
+                row = self.index[meter] = len(self.meters)
+                self.meters.append(meter)
+                self._alerts.append(collections.deque(maxlen=self.keep_alerts))
+            rows[i] = row
+        self._grow(len(self.meters))
+        return rows
+
+    # -------------------- Scoring --------------------
+    def score(self, meters, ts, kwh):
+        """Score readings, then fold them into their meters' state.
+
+        meters is one meter id for every reading or a sequence of ids;
+        readings of one meter must be in time order. Returns arrays in input
+        order: a z-score per model (NaN until warmed up), score (largest
+        |z|), model (index into MODELS, -1 if none), expected and anomaly.
+        """
+        with self._lock:
+            return self._score(meters, ts, kwh)
+
+    def _score(self, meters, ts, kwh):
+        ts = np.asarray(ts, dtype=np.int64)
+        kwh = np.asarray(kwh, dtype=np.float64)
+        if isinstance(meters, (str, bytes)) or not np.ndim(meters):
+            rows = np.full(len(kwh), self._rows([meters])[0], np.intp)
+        else:
+            unique, inverse = np.unique(np.asarray(meters, dtype=object), return_inverse=True)
+            rows = self._rows(list(unique))[inverse]
+
+        result = np.full((len(MODELS), len(kwh)), np.nan)
+        expected = np.full((len(MODELS), len(kwh)), np.nan)
+        if len(kwh):
+            # Readings grouped by meter, in arrival order within each meter
+            order = np.argsort(rows, kind="stable")
+            starts, lengths = _runs(rows[order])
+            meters = rows[order][starts]
+            seen = np.repeat(self.count[meters], lengths) + _local_index(starts, lengths, len(kwh))
+            groups = (order, starts, lengths, meters, seen)
+            self._score_ewma(kwh, groups, result[0], expected[0])
+            self._score_rolling(kwh, groups, result[1], expected[1])
+            self._score_seasonal(ts, kwh, groups, result[2], expected[2])
+            self.count[meters] += lengths
+
+        magnitude = np.abs(result)
+        any_model = ~np.isnan(magnitude).all(axis=0)
+        model = np.where(any_model, np.argmax(np.where(np.isnan(magnitude), -1.0, magnitude), axis=0), -1)
+        score = np.where(any_model, magnitude[np.maximum(model, 0), np.arange(len(kwh))], 0.0)
+        return {
+            "ewma": result[0],
+            "rolling": result[1],
+            "seasonal": result[2],
+            "score": score,
+            "model": model,
+            "expected": np.where(any_model, expected[np.maximum(model, 0), np.arange(len(kwh))], np.nan),
+            "anomaly": score > self.threshold,
+        }
+
+    def _std(self, mean, std):
+        return np.maximum(std, MIN_RELATIVE_STD * np.abs(mean) + MIN_STD)
+
+    def _z(self, kwh, mean, std):
+        return (kwh - mean) / self._std(mean, std)
+
+    def _settle(self, values, warm, run):
+        """Repeat run(folded) until anomalous values are folded in clipped.
+
+        run(folded) scores values against the state built from the folded
+        values and returns (mean, std, final state) as of every reading.
+        """
+        folded = values
+        while True:
+            mean, std, final = run(folded)
+            with np.errstate(invalid="ignore"):
+                band = self.threshold * self._std(mean, std)
+                clipped = np.where(warm, np.clip(values, mean - band, mean + band), values)
+            # Passes agree only to rounding before the first changed reading
+            if np.allclose(clipped, folded, rtol=SETTLE_TOLERANCE, atol=SETTLE_TOLERANCE):
+                return mean, std, final
+            folded = clipped
+
+    def _score_ewma(self, kwh, groups, z, expected):
+        order, starts, lengths, meters, seen = groups
+        values = kwh[order]
+        # A meter's first reading starts its mean
+        new = self.count[meters] == 0
+        self.mean[meters[new]] = values[starts[new]]
+        warm = seen >= self.warmup
+
+        def run(folded):
+            mean, var = self.mean[meters], self.var[meters]
+            mean_before, var_before = segmented_ewma(folded, starts, lengths, mean, var, self.alpha)
+            return mean_before, np.sqrt(var_before), (mean, var)
+
+        mean_before, std_before, (self.mean[meters], self.var[meters]) = self._settle(values, warm, run)
+        z[order] = np.where(warm, self._z(values, mean_before, std_before), np.nan)
+        expected[order] = mean_before
+
+    def _score_rolling(self, kwh, groups, z, expected):
+        order, starts, lengths, meters, seen = groups
+        window = self.window
+        rows = np.repeat(meters, lengths)
+        local = _local_index(starts, lengths, len(kwh))
+        slot = seen % window
+        from_ring = local < window
+        counts = np.minimum(seen, window)
+        warm = counts >= max(2, window // 2)
+
+        def run(folded):
+            # Sums are kept over the float32 values the ring holds, so what
+            # leaves the window cancels exactly what entered it
+            values = folded.astype(np.float32).astype(np.float64)
+            # Each reading pushes out the oldest value in the ring (zero while
+            # it fills), or a reading earlier in this batch once the ring is spent
+            leaving = np.empty_like(values)
+            leaving[from_ring] = self.ring[rows[from_ring], slot[from_ring]]
+            leaving[~from_ring] = values[np.flatnonzero(~from_ring) - window]
+
+            entered = _run_cumsum(values, starts, lengths)
+            left = _run_cumsum(leaving, starts, lengths)
+            entered_sq = _run_cumsum(values ** 2, starts, lengths)
+            left_sq = _run_cumsum(leaving ** 2, starts, lengths)
+            total = self.roll_sum[rows] + (entered - values) - (left - leaving)
+            total_sq = self.roll_sq[rows] + (entered_sq - values ** 2) - (left_sq - leaving ** 2)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = total / counts
+                std = np.sqrt(np.maximum(total_sq / counts - mean ** 2, 0.0))
+            last = starts + lengths - 1
+            return mean, std, (entered[last] - left[last], entered_sq[last] - left_sq[last], values)
+
+        values = kwh[order]
+        mean, std, (added, added_sq, folded) = self._settle(values, warm, run)
+        self.roll_sum[meters] += added
+        self.roll_sq[meters] += added_sq
+        kept = local >= np.repeat(lengths, lengths) - window
+        self.ring[rows[kept], slot[kept]] = folded[kept]
+
+        z[order] = np.where(warm, self._z(values, mean, std), np.nan)
+        expected[order] = np.where(counts > 0, mean, np.nan)
+
+    def _score_seasonal(self, ts, kwh, groups, z, expected):
+        order, starts, lengths, meters, seen = groups
+        rows = np.repeat(meters, lengths)
+        values = kwh[order]
+        slots = (ts[order] % self.season_seconds) * self.season_slots // self.season_seconds
+        keys = rows * self.season_slots + slots
+
+        # Level per (meter, slot)
+        by_slot = np.argsort(keys, kind="stable")
+        slot_starts, slot_lengths = _runs(keys[by_slot])
+        cells = keys[by_slot][slot_starts]
+        mean = self.season_mean.reshape(-1)
+        count = self.season_count.reshape(-1)
+        new = count[cells] == 0
+        mean[cells[new]] = values[by_slot][slot_starts[new]]
+        slot_seen = np.empty(len(values), np.int64)
+        slot_seen[by_slot] = (np.repeat(count[cells], slot_lengths)
+                              + _local_index(slot_starts, slot_lengths, len(values)))
+        warm = (slot_seen >= self.seasonal_warmup) & (seen >= self.warmup)
+
+        def run(folded):
+            level = np.empty_like(folded)
+            level[by_slot], levels = decayed_scan(self.seasonal_alpha * folded[by_slot], 1.0 - self.seasonal_alpha,
+                                                  slot_starts, slot_lengths, mean[cells])
+            # Spread around the levels, per meter: an EWMA of squared residuals
+            spread, residual_var = decayed_scan(self.alpha * (folded - level) ** 2, 1.0 - self.alpha,
+                                                starts, lengths, self.residual_var[meters])
+            return level, np.sqrt(np.maximum(spread, 0.0)), (levels, residual_var)
+
+        level, std, (mean[cells], self.residual_var[meters]) = self._settle(values, warm, run)
+        count[cells] += slot_lengths.astype(count.dtype)
+        z[order] = np.where(warm, self._z(values, level, std), np.nan)
+        expected[order] = level
+
+    # -------------------- Alerts --------------------
+    def detect(self, meters, ts, kwh):
+        """score() and return an alert dict for every anomalous reading.
+
+        Alerts are also kept, newest last, for recent_alerts().
+        """
+        ts = np.asarray(ts, dtype=np.int64)
+        kwh = np.asarray(kwh, dtype=np.float64)
+        with self._lock:
+            result = self._score(meters, ts, kwh)
+            return self._collect(meters, ts, kwh, result)
+
+    def _collect(self, meters, ts, kwh, result):
+        single = isinstance(meters, (str, bytes)) or not np.ndim(meters)
+        alerts = []
+        for i in np.flatnonzero(result["anomaly"]):
+            meter = meters if single else meters[i]
+            alert = {
+                "meter": meter,
+                "ts": int(ts[i]),
+                "kwh": float(kwh[i]),
+                "expected": round(float(result["expected"][i]), 4),
+                "z": round(float(result[MODELS[result["model"][i]]][i]), 2),
+                "model": MODELS[result["model"][i]],
+                "direction": "high" if kwh[i] > result["expected"][i] else "low",
+            }
+            self._alerts[self.index[meter]].append(alert)
+            alerts.append(alert)
+        return alerts
+
+    def recent_alerts(self, meter):
+        with self._lock:
+            row = self.index.get(meter)
+            return list(self._alerts[row]) if row is not None else []
+
+    def prime(self, meter, ts, kwh):
+        """Fold in a meter's history without raising alerts."""
+        if len(kwh):
+            self.score(meter, ts, kwh)
+
+
+def describe(alert):
+    """One line for an alert, as shown on the ML Report page."""
+    when = np.datetime64(alert["ts"], "s").astype(str).replace("T", " ")
+    return (f"{when}: {alert['kwh']:.3f} kWh is unusually {alert['direction']} "
+            f"(expected about {alert['expected']:.3f}, {alert['model']} z={alert['z']:+.1f})")
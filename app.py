@@ -1,11 +1,15 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from fpdf import FPDF
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
+import core
+import scenarios
+from forecasting import forecast
+from tariff import Tariff
+from catalog import ApplianceCatalog
+from inventory import ApplianceInventory
+from virtual_list import VirtualList
+from lazy_imports import lazy_import, use_tk_backend, warm_up
+from knowledge_base import KnowledgeBase
 from tkinter import *
 from tkinter import ttk
 
@@ -28,6 +32,11 @@ DARK_THEME = {
 
 current_theme = LIGHT_THEME
 
+# The plotting stack is only needed by the Analysis pages; import it on
+# first use, or in the background once the window is up.
+plt = lazy_import("matplotlib.pyplot", setup=use_tk_backend)
+backend_tkagg = lazy_import("matplotlib.backends.backend_tkagg", setup=use_tk_backend)
+
 # -------------------- Helper Functions --------------------
 def apply_theme():
     root.configure(bg=current_theme["BACKGROUND"])
@@ -139,6 +148,9 @@ for text, frame_name in menu_buttons:
 # -------------------- Add Appliance Page --------------------
 create_navigation_bar(frames["add_appliance"])
 
+# Appliance types and their wattages (data/appliances.json)
+catalog = ApplianceCatalog.from_file()
+
 appliance_var = tk.StringVar()
 hours_var = tk.StringVar()
 
@@ -146,20 +158,27 @@ ttk.Label(frames["add_appliance"], text="Add an Appliance", font=("Arial", 20)).
 appliance_menu = ttk.Combobox(
     frames["add_appliance"],
     textvariable=appliance_var,
-    values=["Fan", "Air Conditioner", "Refrigerator", "TV", "Washing Machine"],
+    values=catalog.names,
     font=("Arial", 12),
 )
 appliance_menu.pack(pady=5)
 tk.Entry(frames["add_appliance"], textvariable=hours_var, font=("Arial", 12)).pack(pady=5)
 
-user_appliances = {}
-home_listbox = tk.Listbox(frames["add_appliance"], height=8, font=("Arial", 12))
-home_listbox.pack(pady=10)
+# {appliance: hours} with running totals and a ranking by hours
+user_appliances = ApplianceInventory(catalog)
+# Only the rows in view are drawn; rows are keyed by appliance name
+home_list = VirtualList(frames["add_appliance"], format_row=lambda app, hrs: f"{app} - {hrs} hrs/day",
+                        height=8, font=("Arial", 12))
+home_list.pack(pady=10)
+
+def on_appliance_changed(appliance, old_hours, new_hours):
+    # Apply the single change to the list instead of redrawing it
+    if new_hours is None:
+        home_list.delete(appliance)
+    else:
+        home_list.set(appliance, new_hours)
 
-def update_home_list():
-    home_listbox.delete(0, tk.END)
-    for app, hrs in user_appliances.items():
-        home_listbox.insert(tk.END, f"{app} - {hrs} hrs/day")
+user_appliances.subscribe(on_appliance_changed)
 
 def add_appliance():
     appliance, hours = appliance_var.get(), hours_var.get()
@@ -167,17 +186,14 @@ def add_appliance():
         messagebox.showerror("Input Error", "Enter valid values")
         return
     user_appliances[appliance] = int(hours)
-    update_home_list()
     messagebox.showinfo("Success", "Appliance added successfully!")
 
 def remove_appliance():
-    selection = home_listbox.curselection()
-    if not selection:
+    appliance = home_list.selection()
+    if appliance is None:
         messagebox.showerror("Selection Error", "Select an appliance to remove")
         return
-    appliance = home_listbox.get(selection[0]).split(" - ")[0]
     del user_appliances[appliance]
-    update_home_list()
 
 ttk.Button(frames["add_appliance"], text="Add Appliance", command=add_appliance).pack(pady=10)
 ttk.Button(frames["add_appliance"], text="Remove Appliance", command=remove_appliance).pack(pady=5)
@@ -194,9 +210,8 @@ for var in prev_bill_vars:
 
 def predict_bill():
     try:
-        bills = np.array([float(var.get()) for var in prev_bill_vars])
-        model = LinearRegression().fit(np.array([1, 2, 3]).reshape(-1, 1), bills)
-        result_text.set(f"📊 Predicted Bill: ₹{model.predict(np.array([[4]]))[0]:.2f}")
+        bills = [float(var.get()) for var in prev_bill_vars]
+        result_text.set(f"📊 Predicted Bill: ₹{forecast(bills, model='trend'):.2f}")
     except ValueError:
         messagebox.showerror("Input Error", "Enter valid bill amounts")
 
@@ -251,15 +266,15 @@ chatbot_text.pack(pady=10)
 question_var = tk.StringVar()
 tk.Entry(frames["chatbot"], textvariable=question_var, font=("Arial", 12)).pack(pady=5)
 
+# FAQ index shared with the other front ends (data/faq.json)
+knowledge_base = KnowledgeBase.from_file()
+
 # Function to handle chatbot reply
 def chatbot_reply():
-    question = question_var.get().lower()
-    answers = {
-        "how to save energy?": "Turn off unused appliances, use LED bulbs, and limit AC usage.",
-        "why is my bill high?": "Check for high-consumption appliances and reduce their usage.",
-    }
+    question = question_var.get()
+    answer = knowledge_base.answer(question, default="I am not sure, please check with your provider.")
     chatbot_text.insert(tk.END, f"You: {question}\n")
-    chatbot_text.insert(tk.END, f"Bot: {answers.get(question, 'I am not sure, please check with your provider.')}\n\n")
+    chatbot_text.insert(tk.END, f"Bot: {answer}\n\n")
 
 # Ask Button
 ttk.Button(frames["chatbot"], text="Ask", command=chatbot_reply).pack(pady=10)
@@ -286,13 +301,7 @@ def generate_usage_report():
         messagebox.showinfo("No Data", "No appliances data to generate report.")
         return
     
-    report_text = "Appliance Usage Report\n\n"
-    total_hours = sum(user_appliances.values())
-    
-    report_text += f"Total Hours of Appliance Usage: {total_hours} hrs/day\n\n"
-    
-    for appliance, hours in user_appliances.items():
-        report_text += f"{appliance}: {hours} hrs/day\n"
+    report_text = core.usage_report_text(user_appliances)
 
     report_display = tk.Text(frames["report"], height=15, width=70, font=("Arial", 12))
     report_display.pack(pady=10)
@@ -305,63 +314,17 @@ ttk.Button(frames["report"], text="Generate Report", command=generate_usage_repo
 # -------------------- ML Analysis Page --------------------
 create_navigation_bar(frames["mlreport"])
 ttk.Label(frames["mlreport"], text="Energy Usage Analysis", font=("Arial", 24, "bold")).pack(pady=20)
-import pandas as pd
-from sklearn.linear_model import LinearRegression
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-
-# Sample appliance data
-# user_appliances = {
-#     "Fan": 6,
-#     "Air Conditioner": 5,
-#     "Refrigerator": 8,
-#     "Washing Machine": 2,
-#     "TV": 4,
-#     "Heater": 3
-# }
-
-# Data for machine learning model
-data = {
-    "Appliance": ["Fan", "Air Conditioner", "Refrigerator", "Washing Machine", "TV", "Heater"],
-    "Usage_Hours_Per_Day": [6, 5, 8, 2, 4, 3],
-    "Energy_Cost_Per_Day": [30, 100, 20, 10, 25, 50]  # Example energy cost per day
-}
 
-# Convert data into DataFrame
-df = pd.DataFrame(data)
-
-# Features and target variable
-X = df[["Usage_Hours_Per_Day"]]
-y = df["Energy_Cost_Per_Day"]
-
-# Initialize and train the Linear Regression model
-model = LinearRegression()
-model.fit(X, y)
-
-def get_energy_savings(appliance_usage):
-    """
-    Predicts energy savings for reducing appliance usage by 2 hours based on trained model.
-    :param appliance_usage: Current appliance usage in hours per day.
-    :return: Suggested savings in ₹ for reducing usage by 2 hours.
-    """
-    # Use the trained model to predict the energy cost for the current usage
-    predicted_cost = model.predict(pd.DataFrame([[appliance_usage]], columns=["Usage_Hours_Per_Day"]))[0]
-    
-    # Calculate the potential savings by reducing 2 hours of usage
-    reduced_usage_cost = model.predict(pd.DataFrame([[appliance_usage - 2]], columns=["Usage_Hours_Per_Day"]))[0]
-    
-    # Savings = current predicted cost - reduced predicted cost
-    savings = predicted_cost - reduced_usage_cost
-    
-    return savings
+# Costs are priced through the tariff in data/tariff.json
+tariff = Tariff.from_file()
 
 def analyze_usage_with_ml():
     if not user_appliances:
         messagebox.showinfo("No Data", "No appliance data available for analysis.")
         return
 
-    # Sort appliances by usage hours
-    sorted_apps = sorted(user_appliances.items(), key=lambda x: x[1], reverse=True)[:3]
+    # Top appliances by usage hours, straight from the inventory's ranking
+    sorted_apps = user_appliances.top(3)
     apps, hours = zip(*sorted_apps) if sorted_apps else ([], [])
 
     # Display usage in a bar chart
@@ -372,15 +335,15 @@ def analyze_usage_with_ml():
     plt.xlabel("Appliance")
     plt.tight_layout()
     
-    canvas = FigureCanvasTkAgg(plt.gcf(), master=frames["mlreport"])  # Assuming frames["analysis"] is defined
+    canvas = backend_tkagg.FigureCanvasTkAgg(plt.gcf(), master=frames["mlreport"])  # Assuming frames["analysis"] is defined
     canvas.get_tk_widget().pack()
     canvas.draw()
 
-    # Generate feedback based on appliance usage with ML predictions
+    # Best of every reduction, efficient-model swap and off-peak move, all priced at once
     feedback = "Feedback on Reducing Energy Usage:\n"
-    for appliance, usage_hours in user_appliances.items():
-        savings = get_energy_savings(usage_hours)
-        feedback += f"- Reduce {appliance} by 2 hrs: Save ₹{savings:.2f} on your bill.\n"
+    what_if = scenarios.evaluate(list(user_appliances), list(user_appliances.values()), tariff, catalog)
+    for scenario in what_if["ranked"]:
+        feedback += f"- {scenario['label']}: Save ₹{scenario['daily_savings']:.2f}/day on your bill.\n"
     
     feedback_label = ttk.Label(frames["mlreport"], text=feedback, font=("Arial", 12), anchor="w")
     feedback_label.pack(pady=10)
@@ -411,7 +374,7 @@ def generate_analysis_graph():
     ax.set_xlabel("Appliance")
     ax.set_ylabel("Hours per Day")
 
-    canvas = FigureCanvasTkAgg(fig, master=frames["analysis"])
+    canvas = backend_tkagg.FigureCanvasTkAgg(fig, master=frames["analysis"])
     canvas.get_tk_widget().pack(pady=10)
     canvas.draw()
 
@@ -419,6 +382,7 @@ ttk.Button(frames["analysis"], text="Generate Analysis", command=generate_analys
 
 # -------------------- Main Program --------------------
 show_flash_screen()
+warm_up([plt, backend_tkagg])
 
 # Link the scrollbar to the text widget
 root.mainloop()
@@ -0,0 +1,92 @@
+"""Chatbot retrieval benchmark.
+
+Builds a KnowledgeBase over the shipped FAQ plus N synthetic entries and
+reports index build time, single-query latency percentiles (with typo'd
+and reworded questions) and batch throughput.
+
+    python benchmarks/bench_chatbot.py --entries 5000 --queries 2000 --output chatbot.json
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from knowledge_base import DEFAULT_PATH, KnowledgeBase
+
+WORDS = ("energy bill meter tariff appliance fan heater geyser cooler solar inverter "
+         "battery wiring voltage phase load peak night summer winter subsidy connection "
+         "refund payment deposit reading estimate units slab rate tax").split()
+
+
+def synthetic_entries(count, rng):
+    entries = []
+    for i in range(count):
+        words = rng.sample(WORDS, 5)
+        entries.append({"question": f"how does {' '.join(words)} work {i}?", "answer": f"Answer {i}"})
+    return entries
+
+
+def perturb(question, rng):
+    chars = list(question)
+    for _ in range(2):  # two typos
+        position = rng.randrange(len(chars))
+        chars[position] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars).rstrip("?")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="chatbot.json")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with open(DEFAULT_PATH, encoding="utf-8") as f:
+        entries = json.load(f) + synthetic_entries(args.entries, rng)
+
+    started = time.perf_counter()
+    kb = KnowledgeBase(entries)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = [perturb(rng.choice(entries)["question"], rng) for _ in range(args.queries)]
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        kb.answer(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    kb.answer_many(queries)
+    batch_seconds = time.perf_counter() - started
+
+    result = {
+        "entries": len(entries),
+        "queries": len(queries),
+        "build_ms": build_ms,
+        "query_ms": {
+            "p50": statistics.median(latencies),
+            "p99": percentile(latencies, 0.99),
+            "max": max(latencies),
+        },
+        "batch_queries_per_second": len(queries) / batch_seconds,
+    }
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Meter ingestion throughput and memory benchmark.
+
+Streams a synthetic 1-minute interval upload (--rows readings for each of
+--households households) through meter_store.ingest directly and through
+POST /meter/readings on the Flask test client, in NDJSON and CSV. The
+upload is generated lazily as it is read, so nothing holds it in memory
+and peak_traced_mb (tracemalloc over a separate run) shows what ingestion
+itself keeps. Records rows/s, MB/s and the stored row count, which must
+match what was sent.
+
+    python benchmarks/bench_ingest.py --rows 1000000 --households 4 --output ingest.json
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from meter_store import CHUNK_SIZE, ingest
+
+START = 1_700_000_000
+
+
+class SyntheticUpload:
+    """File-like upload that formats readings as they are read."""
+
+    def __init__(self, rows, fmt, block_rows=4096):
+        self.rows = rows
+        self.fmt = fmt
+        self.block_rows = block_rows
+        self.sent_rows = 0
+        self.sent_bytes = 0
+        self._pending = b"ts,kwh\n" if fmt == "csv" else b""
+
+    def _block(self):
+        end = min(self.sent_rows + self.block_rows, self.rows)
+        if self.fmt == "csv":
+            lines = [f"{START + 60 * i},{(i % 97) / 1000:.3f}\n" for i in range(self.sent_rows, end)]
+        else:
+            lines = [f'{{"ts": {START + 60 * i}, "kwh": {(i % 97) / 1000:.3f}}}\n' for i in range(self.sent_rows, end)]
+        self.sent_rows = end
+        return "".join(lines).encode()
+
+    def read(self, size=-1):
+        while (size < 0 or len(self._pending) < size) and self.sent_rows < self.rows:
+            self._pending += self._block()
+        if size < 0:
+            size = len(self._pending)
+        out, self._pending = self._pending[:size], self._pending[size:]
+        self.sent_bytes += len(out)
+        return out
+
+
+def run_direct(store, household, rows, fmt):
+    upload = SyntheticUpload(rows, fmt)
+    started = time.perf_counter()
+    summary = ingest(upload, store, household, fmt)
+    return time.perf_counter() - started, upload.sent_bytes, summary["rows"]
+
+
+def run_http(client, household, rows, fmt):
+    upload = SyntheticUpload(rows, fmt)
+    started = time.perf_counter()
+    response = client.post(
+        "/meter/readings", headers={"X-Household-Id": household},
+        content_type="text/csv" if fmt == "csv" else "application/x-ndjson",
+        environ_overrides={"wsgi.input": upload, "wsgi.input_terminated": True},
+    )
+    elapsed = time.perf_counter() - started
+    if response.status_code != 200:
+        raise RuntimeError(response.get_json())
+    return elapsed, upload.sent_bytes, response.get_json()["accepted"]
+
+
+def peak_traced_mb(store, household, rows, fmt):
+    tracemalloc.start()
+    try:
+        ingest(SyntheticUpload(rows, fmt), store, household, fmt)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000, help="readings per household")
+    parser.add_argument("--households", type=int, default=2)
+    parser.add_argument("--output", default="ingest.json")
+    args = parser.parse_args()
+
+    from main import create_app
+
+    root = tempfile.mkdtemp(prefix="energy-meter-")
+    results = []
+    try:
+        app = create_app("memory", root, trust_household_header=True)
+        store, client = app.extensions["meters"], app.test_client()
+        for path in ("direct", "http"):
+            for fmt in ("ndjson", "csv"):
+                seconds = sent = accepted = 0
+                for h in range(args.households):
+                    household = f"bench-{path}-{fmt}-{h}"
+                    if path == "direct":
+                        elapsed, size, rows = run_direct(store, household, args.rows, fmt)
+                    else:
+                        elapsed, size, rows = run_http(client, household, args.rows, fmt)
+                    seconds += elapsed
+                    sent += size
+                    accepted += rows
+                stored = sum(store.rows(f"bench-{path}-{fmt}-{h}") for h in range(args.households))
+                result = {
+                    "path": path,
+                    "format": fmt,
+                    "rows": accepted,
+                    "stored_rows": stored,
+                    "seconds": seconds,
+                    "rows_per_second": accepted / seconds,
+                    "mb_per_second": sent / seconds / 1e6,
+                }
+                results.append(result)
+                print(f"{path:>6} {fmt:>6}: {result['rows_per_second']:10.0f} rows/s  "
+                      f"{result['mb_per_second']:6.1f} MB/s  stored {stored}/{accepted}")
+
+        memory = {fmt: peak_traced_mb(store, f"bench-memory-{fmt}", args.rows, fmt) for fmt in ("ndjson", "csv")}
+        for fmt, peak in memory.items():
+            print(f"peak traced memory ({fmt}, {args.rows} rows): {peak:.1f} MB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    report = {"rows_per_household": args.rows, "households": args.households, "chunk_size": CHUNK_SIZE,
+              "runs": results, "peak_traced_mb": memory}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return 1 if any(r["stored_rows"] != r["rows"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Local load test for the Flask app.
+
+For each worker count, starts that many server processes on one shared
+SQLite database, then drives them from --clients client processes. Each
+request adds a uniquely named appliance to one of --households households,
+so afterwards every request must show up as exactly one stored row.
+Records, per worker count:
+
+    requests_per_second  completed requests / wall time
+    scaling              requests_per_second / (workers * single-worker rate)
+    errors               non-200 responses and connection failures
+    lost_updates         successful requests whose row is missing
+
+With gunicorn installed the servers are `gunicorn -c gunicorn.conf.py
+wsgi:app` with -w N; otherwise N threaded werkzeug servers on consecutive
+ports, which clients use round-robin. Scaling is bounded by the cores of
+the machine running both sides.
+
+    python benchmarks/bench_load.py --workers 1 2 4 --clients 8 --requests 500 --output load.json
+"""
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port, storage_url):
+    import logging
+    from werkzeug.serving import make_server
+    from main import create_app
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # no per-request log lines
+    app = create_app(storage_url, trust_household_header=True)
+    make_server("127.0.0.1", port, app, threaded=True).serve_forever()
+
+
+def wait_until_up(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_servers(kind, workers, storage_url):
+    """Returns (ports, stop function)."""
+    if kind == "gunicorn":
+        port = free_port()
+        env = dict(os.environ, ENERGY_STORAGE=storage_url, ENERGY_TRUST_HOUSEHOLD_HEADER="1")
+        process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "-w", str(workers),
+             "-b", f"127.0.0.1:{port}", "--access-logfile", "/dev/null", "wsgi:app"],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        wait_until_up(port)
+        return [port], lambda: (process.terminate(), process.wait())
+
+    ports = [free_port() for _ in range(workers)]
+    processes = [multiprocessing.Process(target=serve, args=(port, storage_url), daemon=True) for port in ports]
+    for process in processes:
+        process.start()
+    for port in ports:
+        wait_until_up(port)
+
+    def stop():
+        for process in processes:
+            process.terminate()
+            process.join()
+    return ports, stop
+
+
+def client(client_id, ports, households, requests, results):
+    ok = errors = 0
+    for n in range(requests):
+        port = ports[(client_id + n) % len(ports)]
+        body = json.dumps({"appliance": f"Load {client_id}-{n}", "hours": 1}).encode()
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{port}/add_appliance", data=body, method="POST",
+            headers={"Content-Type": "application/json",
+                     "X-Household-Id": f"bench-{(client_id + n) % households}"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                ok += response.status == 200
+                errors += response.status != 200
+        except (urllib.error.URLError, OSError):
+            errors += 1
+    results.put((ok, errors))
+
+
+def run(kind, workers, clients, requests, households, work_dir):
+    path = os.path.join(work_dir, f"load-{workers}.db")
+    storage_url = f"sqlite:///{path}"
+    from storage import create_storage
+    create_storage(storage_url).close()  # create the schema once, up front
+
+    ports, stop = start_servers(kind, workers, storage_url)
+    try:
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client, args=(c, ports, households, requests, results))
+            for c in range(clients)
+        ]
+        started = time.perf_counter()
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+    finally:
+        stop()
+
+    ok = sum(t[0] for t in totals)
+    storage = create_storage(storage_url)
+    stored = sum(len(storage.list_appliances(f"bench-{h}")) for h in range(households))
+    storage.close()
+    return {
+        "workers": workers,
+        "requests": ok + sum(t[1] for t in totals),
+        "seconds": elapsed,
+        "requests_per_second": ok / elapsed,
+        "errors": sum(t[1] for t in totals),
+        "lost_updates": ok - stored,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="per client")
+    parser.add_argument("--households", type=int, default=100)
+    parser.add_argument("--server", choices=("auto", "gunicorn", "werkzeug"), default="auto")
+    parser.add_argument("--output", default="load.json")
+    args = parser.parse_args()
+
+    kind = args.server
+    if kind == "auto":
+        kind = "gunicorn" if importlib.util.find_spec("gunicorn") else "werkzeug"
+
+    work_dir = tempfile.mkdtemp(prefix="energy-load-")
+    try:
+        runs = [run(kind, w, args.clients, args.requests, args.households, work_dir) for w in args.workers]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    single = runs[0]["requests_per_second"] / runs[0]["workers"]
+    for result in runs:
+        result["scaling"] = result["requests_per_second"] / (result["workers"] * single)
+        print(f"{result['workers']:>3} workers: {result['requests_per_second']:8.0f} req/s  "
+              f"scaling {result['scaling']:.2f}  errors {result['errors']}  lost {result['lost_updates']}")
+
+    report = {"server": kind, "cpus": os.cpu_count(), "clients": args.clients, "runs": runs}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return 1 if any(r["lost_updates"] or r["errors"] for r in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
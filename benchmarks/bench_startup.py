@@ -0,0 +1,102 @@
+"""Startup budget for the desktop app (second.py).
+
+Launches the app in a fresh interpreter several times and records:
+
+    interpreter_ms       launch -> first line of the child script (Python startup)
+    import_ms            time to import second.py
+    first_window_ms      launch -> root window mapped
+    interactive_ms       launch -> home page built and the event loop idle
+    heavy_modules_ready  whether the warm-up thread finished by then
+
+"Launch" is taken in this process just before the child is spawned, so
+every figure includes the interpreter's own startup.
+
+Needs a display (run under xvfb-run on a headless box). Results are written
+as JSON; with --budget-ms the script exits non-zero when the median
+time-to-interactive goes over budget.
+
+    python benchmarks/bench_startup.py --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(launched):
+    # The launch time is wall-clock; move it onto this process's perf_counter
+    started = time.perf_counter()
+    launched -= time.time() - started
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import second
+    imported = time.perf_counter()
+
+    app = second.EnergyBillPredictor()
+
+    def poll():
+        marks = app.startup_marks
+        if "interactive" not in marks:
+            app.root.after(10, poll)
+            return
+        result = {
+            "interpreter_ms": (started - launched) * 1000,
+            "import_ms": (imported - started) * 1000,
+            "first_window_ms": (marks.get("first_window", marks["interactive"]) - launched) * 1000,
+            "interactive_ms": (marks["interactive"] - launched) * 1000,
+            "heavy_modules_ready": all(module.loaded for module in second.HEAVY_MODULES),
+        }
+        print(json.dumps(result))
+        app.root.destroy()
+
+    app.root.after(0, poll)
+    app.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default="startup.json")
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--child", type=float, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        child(args.child)
+        return 0
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("No DISPLAY; run under xvfb-run to measure startup.", file=sys.stderr)
+        return 2
+
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", repr(time.time())],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    summary = {
+        key: statistics.median(run[key] for run in runs)
+        for key in ("interpreter_ms", "import_ms", "first_window_ms", "interactive_ms")
+    }
+    report = {"runs": runs, "median": summary, "budget_ms": args.budget_ms}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for key, value in summary.items():
+        print(f"{key:>16}: {value:8.1f} ms")
+    if args.budget_ms is not None and summary["interactive_ms"] > args.budget_ms:
+        print(f"Over budget: {summary['interactive_ms']:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""Benchmark suite over every compute path, headless.
+
+Micro benchmarks time one typical household through each path many times
+and record min/median/p99 milliseconds:
+
+    forecast      every forecasting model on a year of bills
+    predict_bill  the Tk apps' predict_bill (three typed bills through
+                  forecast(), as app.py and second.py do) and the Flask
+                  POST /predict_bill
+    costs         cost_breakdown, analyze, ml_analysis, reduction_savings,
+                  shift_plan and scenarios.evaluate
+    reports       the report texts and a ReportWriter txt and pdf file
+    chatbot       KnowledgeBase lookups of typo'd FAQ questions
+    charts        AnalysisChart, UsageChart and ScenarioHeatmap updates on Agg
+    meter         disaggregation of a week of 1-minute readings, anomaly
+                  scoring of a day of them
+    flask         the JSON endpoints through the test client
+
+Macro benchmarks run synthetic households, --households of them per run
+(1 to 1M by default), through the batch paths a --chunk at a time:
+batch forecasts, tariff bills, summarize_batch, scheduling, report texts,
+streaming anomaly detection and the Flask batch endpoints. Paths that
+loop over households in Python or send them over HTTP stop at
+LOOP_LIMIT households. Every macro run checks its results (row counts,
+bills against the tariff) and a failure makes the exit status nonzero.
+
+With --baseline, each timing is compared against an earlier report and
+anything slower by more than --tolerance (and NOISE_FLOOR_MS) is listed
+under "regressions", which also makes the exit status nonzero.
+
+    python benchmarks/bench_suite.py --households 1 1000 1000000 --output suite.json
+    python benchmarks/bench_suite.py --baseline suite.json --output suite-new.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+HOUSEHOLDS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+CHUNK = 10_000
+# Python-loop and HTTP paths stop here
+LOOP_LIMIT = 100_000
+REPEAT = 20
+OWNED_SHARE = 0.4
+MONTHS = 12
+START = 1_700_000_000
+# Differences below this are timer noise, not regressions
+NOISE_FLOOR_MS = 0.05
+HOUSEHOLD = {"Fan": 10, "Air Conditioner": 6, "Refrigerator": 24, "TV": 4, "Washing Machine": 1,
+             "Geyser": 1.5, "LED Lights": 6, "Water Pump": 1}
+TYPED_BILLS = ("1450", "1520", "1610")
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_calls(fn, repeat):
+    """Milliseconds per call after one warm-up call."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"repeat": repeat, "min_ms": min(samples), "median_ms": statistics.median(samples),
+            "p99_ms": percentile(samples, 0.99)}
+
+
+def ok(response):
+    if response.status_code != 200:
+        raise RuntimeError(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+# -------------------- Synthetic data --------------------
+def synthetic_chunk(rng, start, size, catalog):
+    """Hours (size, catalog) with owned mask, a year of bills and inventories."""
+    owned = rng.random((size, len(catalog))) < OWNED_SHARE
+    owned[np.arange(size), rng.integers(len(catalog), size=size)] = True
+    hours = np.round(rng.uniform(0.5, 12.0, owned.shape) * 2) / 2 * owned
+    level = rng.uniform(500, 3000, (size, 1))
+    season = 1 + 0.2 * np.sin(2 * np.pi * np.arange(MONTHS) / 12)
+    bills = level * season * rng.normal(1.0, 0.05, (size, MONTHS))
+    ids = [f"h{start + i}" for i in range(size)]
+    inventories = [(household, {catalog.names[j]: float(row[j]) for j in np.flatnonzero(mask)})
+                   for household, row, mask in zip(ids, hours, owned)]
+    return {"ids": ids, "hours": hours, "owned": owned, "bills": bills, "inventories": inventories}
+
+
+def synthetic_readings(rng, catalog, names, days):
+    """1-minute (ts, kWh) readings of names switching on and off in 15-minute runs."""
+    minutes = days * 24 * 60
+    index = catalog.indices(names)
+    watts = (catalog.rated_watts[index] - catalog.standby_watts[index]) / 1000.0
+    on = np.repeat(rng.random((minutes // 15 + 1, len(names))) < 0.2, 15, axis=0)[:minutes]
+    load_kw = 0.1 + on @ watts + rng.normal(0, 0.01, minutes)
+    return START + 60 * np.arange(minutes), np.maximum(load_kw, 0.0) / 60.0
+
+
+# -------------------- Micro --------------------
+def micro_cases(tariff, catalog, client, workdir, rng):
+    import chart_manager
+    import core
+    import scenarios
+    from disaggregation import disaggregate
+    from anomaly import AnomalyDetector
+    from forecasting import MODELS, forecast
+    from knowledge_base import DEFAULT_PATH, KnowledgeBase
+    from reports import ReportWriter
+    from scheduler import shift_plan
+
+    names, hours = list(HOUSEHOLD), list(HOUSEHOLD.values())
+    ranked = sorted(HOUSEHOLD.items(), key=lambda item: item[1], reverse=True)
+    breakdown = core.cost_breakdown(HOUSEHOLD, tariff, catalog)
+    history = synthetic_chunk(rng, 0, 1, catalog)["bills"][0]
+
+    with open(DEFAULT_PATH, encoding="utf-8") as f:
+        questions = [entry["question"] for entry in json.load(f)]
+    kb = KnowledgeBase.from_file()
+    typos = [q.lower().replace("bill", "bil").rstrip("?") for q in questions]
+    question = itertools.cycle(typos)
+
+    analysis_chart = chart_manager.AnalysisChart(chart_manager.agg_canvas_factory)
+    usage_chart = chart_manager.UsageChart(chart_manager.agg_canvas_factory)
+    heatmap = chart_manager.ScenarioHeatmap(chart_manager.agg_canvas_factory)
+    analysis = core.analyze(HOUSEHOLD, tariff, catalog)
+    grid = scenarios.evaluate(names, hours, tariff, catalog)["heatmap"]
+    # Alternate inputs so every update really changes the artists
+    flip = itertools.cycle((1.0, 1.5))
+
+    writer = ReportWriter(tariff, catalog)
+    txt_path, pdf_path = os.path.join(workdir, "report.txt"), os.path.join(workdir, "report.pdf")
+
+    week = synthetic_readings(rng, catalog, ["Fan", "Geyser", "Refrigerator", "Iron"], 7)
+    day_ts, day_kwh = synthetic_readings(rng, catalog, names, 1)
+    fresh = (f"bench-{i}" for i in itertools.count())
+
+    for model in MODELS:
+        yield f"forecast/{model}", lambda model=model: forecast(history, model=model)
+    yield from [
+        ("predict_bill/tk", lambda: forecast([float(bill) for bill in TYPED_BILLS], model="trend")),
+        ("predict_bill/flask", lambda: ok(client.post(
+            "/predict_bill", headers={"X-Household-Id": next(fresh)}, json={
+                "prev_bill1": TYPED_BILLS[0], "prev_bill2": TYPED_BILLS[1], "prev_bill3": TYPED_BILLS[2],
+                "model": "trend"}))),
+        ("costs/cost_breakdown", lambda: core.cost_breakdown(HOUSEHOLD, tariff, catalog)),
+        ("costs/analyze", lambda: core.analyze(HOUSEHOLD, tariff, catalog)),
+        ("costs/ml_analysis", lambda: core.ml_analysis(ranked, tariff, catalog)),
+        ("costs/reduction_savings", lambda: core.reduction_savings(names, hours, tariff, catalog)),
+        ("costs/shift_plan", lambda: shift_plan(names, hours, tariff, catalog)),
+        ("costs/scenarios", lambda: scenarios.evaluate(names, hours, tariff, catalog)),
+        ("reports/usage_report_text", lambda: core.usage_report_text(HOUSEHOLD)),
+        ("reports/breakdown_text", lambda: core.breakdown_text(breakdown)),
+        ("reports/txt", lambda: writer.write("bench", HOUSEHOLD, txt_path=txt_path)),
+        ("reports/pdf", lambda: writer.write("bench", HOUSEHOLD, pdf_path=pdf_path)),
+        ("chatbot/answer", lambda: kb.answer(next(question))),
+        ("chatbot/answer_many", lambda: kb.answer_many(typos)),
+        ("charts/analysis", lambda: analysis_chart.update(
+            names, hours, np.multiply(analysis["energy_costs"], next(flip)), analysis["trend"])),
+        ("charts/usage", lambda: usage_chart.update(names, np.multiply(hours, next(flip)))),
+        ("charts/scenario_heatmap", lambda: heatmap.update(
+            grid["rows"], grid["columns"], grid["values"] * next(flip))),
+        ("meter/disaggregate_week", lambda: disaggregate(*week, ["Fan", "Geyser", "Refrigerator", "Iron"],
+                                                         catalog)),
+        ("meter/anomaly_day", lambda: AnomalyDetector().detect("bench", day_ts, day_kwh)),
+    ]
+
+    # Flask endpoints on one household with a full inventory and a day of readings
+    household = {"X-Household-Id": "bench-flask"}
+    for appliance, value in HOUSEHOLD.items():
+        ok(client.post("/add_appliance", headers=household, json={"appliance": appliance, "hours": value}))
+    upload = "".join(f'{{"ts": {t}, "kwh": {k:.5f}}}\n' for t, k in zip(day_ts, day_kwh))
+    ok(client.post("/meter/readings", headers=household, data=upload, content_type="application/x-ndjson"))
+    yield "flask/add_appliance", lambda: ok(client.post(
+        "/add_appliance", headers=household, json={"appliance": "TV", "hours": next(flip) * 4}))
+    yield "flask/analysis", lambda: ok(client.get("/analysis", headers=household))
+    yield "flask/chatbot", lambda: ok(client.post("/chatbot", json={"message": next(question)}))
+    yield "flask/tariff_bill", lambda: ok(client.post("/tariff/bill", json={"kwh": [120, 250, 480]}))
+    yield "flask/catalog", lambda: ok(client.get("/appliances/catalog"))
+    yield "flask/meter_readings", lambda: ok(client.post(
+        "/meter/readings", headers={"X-Household-Id": next(fresh)}, data=upload,
+        content_type="application/x-ndjson"))
+    yield "flask/disaggregate", lambda: ok(client.post("/meter/disaggregate?apply=0&days=1", headers=household))
+
+    writer.close()
+
+
+def run_micro(tariff, catalog, client, workdir, rng, repeat):
+    results = {}
+    # Cases are built lazily so the Flask ones set up their household first
+    for name, fn in micro_cases(tariff, catalog, client, workdir, rng):
+        results[name] = time_calls(fn, repeat)
+        print(f"{name:<28} {results[name]['median_ms']:10.3f} ms")
+    return results
+
+
+# -------------------- Macro --------------------
+def macro_cases(tariff, catalog, client, detector):
+    """(name, household limit, fn(chunk) -> number of results) for each batch path."""
+    import core
+    from forecasting import MODELS, forecast
+    from main import MAX_BATCH_ROWS
+    from scheduler import inventory_profile, optimize
+
+    def forecasts(model):
+        def run(chunk):
+            result = forecast(chunk["bills"], model=model)
+            return int(np.isfinite(result).sum())
+        return run
+
+    def bills(chunk):
+        kwh = catalog.inventory_kwh(chunk["hours"], chunk["owned"]) * tariff.days_per_month
+        return len(tariff.monthly_bill(kwh))
+
+    def summaries(chunk):
+        rows = core.summarize_batch(chunk["inventories"], tariff, catalog)
+        expected = tariff.monthly_bill(catalog.inventory_kwh(chunk["hours"], chunk["owned"]) * tariff.days_per_month,
+                                       inventory_profile(chunk["hours"], catalog, chunk["owned"]))
+        return int(np.sum(np.abs([row["monthly_bill"] for row in rows] - expected) < 0.01))
+
+    def schedules(chunk):
+        return int(np.isfinite(optimize(chunk["hours"], tariff, catalog, chunk["owned"])["total_savings"]).sum())
+
+    def report_texts(chunk):
+        return sum(1 for _, appliances in chunk["inventories"] if core.usage_report_text(appliances))
+
+    def anomalies(chunk):
+        # One reading for each meter per call, as a live feed delivers them
+        for step in range(4):
+            ts = np.full(len(chunk["ids"]), START + 3600 * step)
+            detector.detect(chunk["ids"], ts, chunk["bills"][:, step] / 720.0)
+        return len(chunk["ids"])
+
+    def predict_batch(chunk):
+        count = 0
+        for start in range(0, len(chunk["ids"]), MAX_BATCH_ROWS):
+            rows = chunk["bills"][start:start + MAX_BATCH_ROWS].round(2).tolist()
+            results = ok(client.post("/predict_bill/batch", json={"households": rows, "model": "trend"}))
+            count += sum("predicted_bill" in row for row in results.get_json()["results"])
+        return count
+
+    def tariff_batch(chunk):
+        kwh = (catalog.inventory_kwh(chunk["hours"], chunk["owned"]) * tariff.days_per_month).round(3).tolist()
+        count = 0
+        for start in range(0, len(kwh), MAX_BATCH_ROWS):
+            count += len(ok(client.post("/tariff/bill", json={"kwh": kwh[start:start + MAX_BATCH_ROWS]}))
+                         .get_json()["bills"])
+        return count
+
+    cases = [(f"forecast_batch/{model}", None, forecasts(model)) for model in MODELS]
+    cases += [
+        ("tariff/monthly_bill", None, bills),
+        ("core/summarize_batch", None, summaries),
+        ("scheduler/optimize", None, schedules),
+        ("reports/usage_report_text", LOOP_LIMIT, report_texts),
+        ("anomaly/detect", None, anomalies),
+        ("flask/predict_bill_batch", LOOP_LIMIT, predict_batch),
+        ("flask/tariff_bill_batch", LOOP_LIMIT, tariff_batch),
+    ]
+    return cases
+
+
+def run_macro(tariff, catalog, client, sizes, chunk_size, seed):
+    from anomaly import AnomalyDetector
+
+    runs, failures = [], []
+    for size in sizes:
+        rng = np.random.default_rng(seed)
+        cases = macro_cases(tariff, catalog, client, AnomalyDetector(capacity=min(size, chunk_size)))
+        seconds = {name: 0.0 for name, _, _ in cases}
+        counts = {name: 0 for name, _, _ in cases}
+        for start in range(0, size, chunk_size):
+            chunk = synthetic_chunk(rng, start, min(chunk_size, size - start), catalog)
+            for name, limit, fn in cases:
+                if limit is not None and size > limit:
+                    continue
+                started = time.perf_counter()
+                counts[name] += fn(chunk)
+                seconds[name] += time.perf_counter() - started
+        for name, limit, _ in cases:
+            if limit is not None and size > limit:
+                runs.append({"case": name, "households": size, "skipped": f"over {limit} households"})
+                continue
+            run = {"case": name, "households": size, "seconds": seconds[name],
+                   "households_per_second": size / seconds[name] if seconds[name] else None,
+                   "checked": counts[name]}
+            runs.append(run)
+            if counts[name] != size:
+                failures.append(f"{name} at {size} households: {counts[name]} correct results")
+            print(f"{name:<28} {size:>9} households {seconds[name]:10.4f} s")
+    return runs, failures
+
+
+# -------------------- Baseline --------------------
+def timings(report):
+    """{key: milliseconds} for every timing in a report; micro timings by
+    their fastest call, which scheduler noise only ever makes slower."""
+    found = {f"micro/{name}": result["min_ms"] for name, result in report.get("micro", {}).items()}
+    for run in report.get("macro", []):
+        if "seconds" in run:
+            found[f"macro/{run['case']}/{run['households']}"] = run["seconds"] * 1000
+    return found
+
+
+def regressions(report, baseline, tolerance):
+    previous = timings(baseline)
+    slower = []
+    for key, ms in sorted(timings(report).items()):
+        before = previous.get(key)
+        if before is not None and ms > before * (1 + tolerance) and ms - before > NOISE_FLOOR_MS:
+            slower.append({"timing": key, "baseline_ms": before, "ms": ms, "ratio": ms / before})
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--households", type=int, nargs="+", default=list(HOUSEHOLDS))
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="households generated and processed at a time")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="calls per micro benchmark")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--skip-macro", action="store_true")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="suite.json")
+    args = parser.parse_args()
+
+    from catalog import ApplianceCatalog
+    from main import create_app
+    from tariff import Tariff
+
+    tariff, catalog = Tariff.from_file(), ApplianceCatalog.from_file()
+    workdir = tempfile.mkdtemp(prefix="energy-bench-")
+    try:
+        app = create_app("memory", os.path.join(workdir, "meters"), trust_household_header=True)
+        client = app.test_client()
+        micro = {} if args.skip_micro else run_micro(
+            tariff, catalog, client, workdir, np.random.default_rng(args.seed), args.repeat)
+        macro, failures = ([], []) if args.skip_macro else run_macro(
+            tariff, catalog, client, args.households, args.chunk, args.seed)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {"households": args.households, "chunk": args.chunk, "repeat": args.repeat,
+                     "seed": args.seed, "loop_limit": LOOP_LIMIT},
+        "micro": micro,
+        "macro": macro,
+        "failures": failures,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = regressions(report, json.load(f), args.tolerance)
+        for slower in report["regressions"]:
+            print(f"regression: {slower['timing']} {slower['baseline_ms']:.3f} -> {slower['ms']:.3f} ms "
+                  f"({slower['ratio']:.2f}x)")
+    for failure in failures:
+        print(f"failed: {failure}")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return 1 if failures or report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
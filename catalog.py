@@ -0,0 +1,97 @@
+"""Appliance catalog: rated wattage, duty cycle and standby draw per type.
+
+Loaded once from data/appliances.json into parallel NumPy columns with a
+name -> index map. An inventory is a dense hours-per-day vector over the
+catalog, so daily kWh for one home (or a households x catalog matrix) is
+a dot product:
+
+    kWh/day = hours @ on_kwh_per_hour + owned @ standby_kwh_per_day
+
+where an appliance draws rated_watts * duty_cycle while in use and
+standby_watts for the rest of the day. Names not in the catalog are
+priced as "Other".
+
+For time-of-use scheduling (scheduler.py) an entry also says when its use
+usually starts (usual_start), which [start, end) hour windows it could
+run in instead (shift_windows; none means it can't be moved) and whether
+a run has to stay in one piece (contiguous, e.g. a wash cycle).
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from tariff import hour_window
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "appliances.json")
+FALLBACK_NAME = "Other"
+
+
+class ApplianceCatalog:
+    def __init__(self, entries):
+        self.entries = [dict(entry) for entry in entries]
+        self.names = [entry["name"] for entry in self.entries]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        if FALLBACK_NAME not in self.index:
+            raise ValueError(f"The catalog needs an '{FALLBACK_NAME}' entry")
+        self.categories = [entry.get("category", "Other") for entry in self.entries]
+        self.rated_watts = np.array([entry["rated_watts"] for entry in self.entries], dtype=np.float64)
+        self.duty_cycle = np.array([entry.get("duty_cycle", 1.0) for entry in self.entries], dtype=np.float64)
+        self.standby_watts = np.array([entry.get("standby_watts", 0.0) for entry in self.entries], dtype=np.float64)
+
+        # kWh per hour of use (on-draw replaces standby for those hours) and
+        # kWh per day of standby for every appliance that is owned
+        self.on_kwh_per_hour = (self.rated_watts * self.duty_cycle - self.standby_watts) / 1000.0
+        self.standby_kwh_per_day = self.standby_watts * 24 / 1000.0
+
+        self.usual_start = np.array([entry.get("usual_start", 0) for entry in self.entries], dtype=np.intp)
+        self.contiguous = np.array([entry.get("contiguous", False) for entry in self.entries], dtype=bool)
+        self.shift_hours = np.zeros((len(self.entries), 24), dtype=bool)
+        for row, entry in enumerate(self.entries):
+            for start, end in entry.get("shift_windows", ()):
+                self.shift_hours[row] |= hour_window(start, end)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def fingerprint(self):
+        payload = json.dumps(self.entries, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def indices(self, names):
+        fallback = self.index[FALLBACK_NAME]
+        return np.fromiter((self.index.get(name, fallback) for name in names), dtype=np.intp, count=len(names))
+
+    def daily_kwh(self, names, hours):
+        """kWh/day for parallel sequences of appliance names and hours per day."""
+        idx = self.indices(list(names))
+        hours = np.asarray(hours, dtype=np.float64)
+        return hours * self.on_kwh_per_hour[idx] + self.standby_kwh_per_day[idx]
+
+    def inventory_vector(self, appliances):
+        """Dense hours-per-day vector over the catalog for an {name: hours} dict."""
+        vector = np.zeros(len(self))
+        np.add.at(vector, self.indices(list(appliances)), np.fromiter(appliances.values(), dtype=np.float64))
+        return vector
+
+    def inventory_kwh(self, hours, owned=None):
+        """Total kWh/day for a (..., catalog) hours array; one dot product per row.
+
+        owned defaults to hours > 0; pass it explicitly for appliances that
+        are plugged in but unused (standby only).
+        """
+        hours = np.asarray(hours, dtype=np.float64)
+        owned = (hours > 0) if owned is None else np.asarray(owned, dtype=np.float64)
+        return hours @ self.on_kwh_per_hour + owned @ self.standby_kwh_per_day
+
+    def to_json(self):
+        return {"fingerprint": self.fingerprint(), "appliances": self.entries}
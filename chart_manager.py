@@ -0,0 +1,212 @@
+"""Persistent charts for the Analysis and ML Report pages.
+
+Each page owns one Figure and one canvas for the whole session. Figures are
+built with matplotlib.figure.Figure rather than pyplot, so they are never
+registered with pyplot's figure manager, and every "Generate" click updates
+the existing bar, scatter, line, pie and heatmap artists in place and asks the
+canvas for a draw_idle(). Artists are only rebuilt (inside the same axes)
+when the number of appliances changes.
+
+matplotlib is imported when the first chart is created, not at import time.
+"""
+import math
+
+import numpy as np
+
+
+def tk_canvas_factory(master, **pack_options):
+    """Canvas factory that embeds the figure in a Tk widget packed into master."""
+    def build(figure):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        canvas = FigureCanvasTkAgg(figure, master=master)
+        canvas.get_tk_widget().pack(**pack_options)
+        return canvas
+    return build
+
+
+def agg_canvas_factory(figure):
+    """Headless canvas, for tests and batch rendering."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    return FigureCanvasAgg(figure)
+
+
+def offscreen_canvas_factory(figure):
+    """Headless canvas that only renders when the figure is saved.
+
+    Agg's draw_idle() draws synchronously; batch jobs that save every
+    update would otherwise render each chart twice.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    class OffscreenCanvas(FigureCanvasAgg):
+        def draw_idle(self, *args, **kwargs):
+            pass
+
+    return OffscreenCanvas(figure)
+
+
+class ChartManager:
+    def __init__(self, canvas_factory, figsize, nrows=1, ncols=1):
+        from matplotlib.figure import Figure
+        self.figure = Figure(figsize=figsize, layout="tight")
+        self.axes = self.figure.subplots(nrows, ncols, squeeze=False).ravel()
+        self.canvas = canvas_factory(self.figure)
+
+    def redraw(self):
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def update_bars(ax, bars, labels, heights, **bar_options):
+        """Set bar heights in place; rebuild the container only if the count changed."""
+        x = np.arange(len(heights))
+        if bars is None or len(bars) != len(heights):
+            if bars is not None:
+                bars.remove()
+            bars = ax.bar(x, heights, **bar_options)
+        else:
+            for bar, height in zip(bars, heights):
+                bar.set_height(height)
+        ax.set_xticks(x, labels)
+        ax.relim()
+        ax.autoscale_view()
+        return bars
+
+    @staticmethod
+    def update_texts(ax, texts, count, **text_options):
+        """Grow or shrink a pool of Text artists to exactly `count` items."""
+        while len(texts) < count:
+            texts.append(ax.text(0, 0, "", **text_options))
+        while len(texts) > count:
+            texts.pop().remove()
+        return texts
+
+
+class AnalysisChart(ChartManager):
+    """Daily cost bars plus hours-vs-cost scatter with a trend line."""
+
+    def __init__(self, canvas_factory, figsize=(10, 10)):
+        super().__init__(canvas_factory, figsize, nrows=2)
+        self.cost_ax, self.scatter_ax = self.axes
+        self.figure.suptitle('Your Energy Usage Analysis', fontsize=16)
+        self.cost_ax.set_title('Daily Energy Cost by Your Appliances')
+        self.cost_ax.set_xlabel('Appliance')
+        self.cost_ax.set_ylabel('Estimated Cost (₹)')
+        self.cost_ax.tick_params(axis='x', rotation=45)
+        self.scatter_ax.set_title('Your Usage Hours vs Cost')
+        self.scatter_ax.set_xlabel('Usage Hours Per Day')
+        self.scatter_ax.set_ylabel('Estimated Cost (₹)')
+
+        self.bars = None
+        self.bar_labels = []
+        self.scatter = self.scatter_ax.scatter([], [])
+        self.trend_line, = self.scatter_ax.plot([], [], color='red', linestyle='--')
+
+    def update(self, appliances, hours, costs, trend=None):
+        """trend is an optional (line_x, line_y) pair for the regression line."""
+        self.bars = self.update_bars(self.cost_ax, self.bars, appliances, costs)
+        self.update_texts(self.cost_ax, self.bar_labels, len(costs), ha='center', va='bottom')
+        for bar, label in zip(self.bars, self.bar_labels):
+            height = bar.get_height()
+            label.set_position((bar.get_x() + bar.get_width() / 2., height))
+            label.set_text(f'₹{height:.1f}')
+
+        self.scatter.set_offsets(np.column_stack([hours, costs]))
+        self.trend_line.set_data(*(trend if trend is not None else ([], [])))
+        self.scatter_ax.relim()
+        self.scatter_ax.update_datalim(self.scatter.get_offsets())
+        self.scatter_ax.autoscale_view()
+        self.redraw()
+
+
+class UsageChart(ChartManager):
+    """Hours-per-day bars and a usage distribution pie, side by side."""
+
+    def __init__(self, canvas_factory, figsize=(8, 4)):
+        super().__init__(canvas_factory, figsize, ncols=2)
+        self.bar_ax, self.pie_ax = self.axes
+        self.bar_ax.set_title("Energy Consumption by Appliance", fontsize=12)
+        self.bar_ax.set_ylabel("Hours/Day")
+        self.bar_ax.set_xlabel("Appliance")
+        self.bar_ax.tick_params(axis='x', rotation=45)
+        self.pie_ax.set_title("Usage Distribution", fontsize=10)
+        self.pie_ax.set_aspect("equal")
+        self.pie_ax.set_xlim(-1.25, 1.25)
+        self.pie_ax.set_ylim(-1.25, 1.25)
+        self.pie_ax.axis("off")
+
+        self.bars = None
+        self.bar_labels = []
+        self.wedges = []
+        self.pie_labels = []
+        self.pie_percents = []
+
+    def update(self, appliances, hours):
+        from matplotlib.patches import Wedge
+        import matplotlib
+
+        self.bars = self.update_bars(self.bar_ax, self.bars, appliances, hours, color='skyblue')
+        self.update_texts(self.bar_ax, self.bar_labels, len(hours), ha='center', va='bottom')
+        for bar, label in zip(self.bars, self.bar_labels):
+            height = bar.get_height()
+            label.set_position((bar.get_x() + bar.get_width() / 2., height))
+            label.set_text(f'{height:g}h')
+
+        # Pie drawn from Wedge patches so angles can be updated in place
+        count = len(hours)
+        while len(self.wedges) < count:
+            self.wedges.append(self.pie_ax.add_patch(Wedge((0, 0), 1, 0, 0)))
+        while len(self.wedges) > count:
+            self.wedges.pop().remove()
+        self.update_texts(self.pie_ax, self.pie_labels, count, ha='center', va='center', fontsize=8)
+        self.update_texts(self.pie_ax, self.pie_percents, count, ha='center', va='center', fontsize=8)
+
+        total = float(sum(hours)) or 1.0
+        colors = matplotlib.colormaps["Pastel1"](np.linspace(0, 1, count))
+        angle = 90.0
+        for wedge, label, percent, name, value, color in zip(
+                self.wedges, self.pie_labels, self.pie_percents, appliances, hours, colors):
+            sweep = 360.0 * value / total
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + sweep)
+            wedge.set_facecolor(color)
+            middle = math.radians(angle + sweep / 2)
+            label.set_position((1.1 * math.cos(middle), 1.1 * math.sin(middle)))
+            label.set_text(name)
+            percent.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))
+            percent.set_text(f'{100.0 * value / total:.1f}%')
+            angle += sweep
+        self.redraw()
+
+
+class ScenarioHeatmap(ChartManager):
+    """Daily savings per appliance (rows) and what-if scenario (columns)."""
+
+    def __init__(self, canvas_factory, figsize=(10, 4)):
+        super().__init__(canvas_factory, figsize)
+        self.ax = self.axes[0]
+        self.ax.set_title("Daily Savings by Scenario (₹)", fontsize=12)
+        self.image = None
+        self.cell_labels = []
+
+    def update(self, rows, columns, values):
+        """values is (rows, columns); NaN cells (no such scenario) stay blank."""
+        values = np.asarray(values, dtype=np.float64).reshape(len(rows), len(columns))
+        cells = np.ma.masked_invalid(values)
+        if self.image is None:
+            self.image = self.ax.imshow(np.zeros((1, 1)), cmap="YlGn", aspect="auto")
+            self.figure.colorbar(self.image, ax=self.ax, label="₹/day")
+        self.image.set_visible(values.size > 0)
+        if values.size:
+            self.image.set_data(cells)
+            self.image.set_extent((-0.5, len(columns) - 0.5, len(rows) - 0.5, -0.5))
+            finite = values[np.isfinite(values)]
+            self.image.set_clim(0.0, finite.max() if finite.size and finite.max() > 0 else 1.0)
+        self.ax.set_xticks(np.arange(len(columns)), columns, rotation=45, ha="right", fontsize=8)
+        self.ax.set_yticks(np.arange(len(rows)), rows)
+
+        self.update_texts(self.ax, self.cell_labels, values.size, ha="center", va="center", fontsize=7)
+        for label, (row, column) in zip(self.cell_labels, np.ndindex(values.shape)):
+            value = values[row, column]
+            label.set_position((column, row))
+            label.set_text(f"{value:.1f}" if np.isfinite(value) else "")
+        self.redraw()
@@ -0,0 +1,145 @@
+"""Command-line analysis of appliance inventories, without Tk.
+
+Reads households from CSV or JSONL a batch at a time, prices each batch
+through core.summarize_batch (or the full core.analyze per household with
+--detail) and streams one JSON object per household to the output.
+
+    python cli.py inventories.csv --output summary.jsonl
+    python cli.py inventories.jsonl --detail --batch-size 500
+
+CSV input has a header with household,appliance,hours columns; rows for
+one household must be consecutive. JSONL input has one
+{"household": id, "appliances": {name: hours}} object per line. Rows
+that can't be read (hours that aren't a number from 0 to 24, broken JSON)
+are reported on stderr and skipped.
+"""
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+
+import core
+from catalog import DEFAULT_PATH as CATALOG_PATH
+from catalog import ApplianceCatalog
+from tariff import DEFAULT_PATH as TARIFF_PATH
+from tariff import Tariff
+
+MAX_HOURS = 24
+
+
+def parse_hours(value):
+    hours = float(value)
+    if not (math.isfinite(hours) and 0 <= hours <= MAX_HOURS):
+        raise ValueError(f"hours must be between 0 and {MAX_HOURS}, got {value!r}")
+    return hours
+
+
+def skip(where, error):
+    """Report a bad input row on stderr; the run carries on without it."""
+    print(f"{where}: skipped ({error})", file=sys.stderr)
+
+
+def read_csv(lines):
+    rows = csv.DictReader(lines)
+    for household, group in itertools.groupby(rows, key=lambda row: row["household"]):
+        appliances = {}
+        for row in group:
+            try:
+                hours = parse_hours(row["hours"])
+            except (TypeError, ValueError) as exc:
+                skip(f"line {rows.line_num}", exc)
+                continue
+            appliances[row["appliance"]] = appliances.get(row["appliance"], 0.0) + hours
+        yield household, appliances
+
+
+def read_jsonl(lines):
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+                appliances = {name: parse_hours(hours) for name, hours in record["appliances"].items()}
+                household = record["household"]
+            except (AttributeError, KeyError, TypeError, ValueError) as exc:
+                skip(f"line {number}", exc)
+                continue
+            yield household, appliances
+
+
+def read_inventories(lines, fmt):
+    return read_csv(lines) if fmt == "csv" else read_jsonl(lines)
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def detail(household, appliances, tariff, catalog):
+    result = core.analyze(appliances, tariff, catalog)
+    ranked = sorted(appliances.items(), key=lambda item: item[1], reverse=True)
+    ml = core.ml_analysis(ranked, tariff, catalog)
+    return {
+        "household": household,
+        "daily_costs": dict(zip(result["appliances"], result["energy_costs"])),
+        "total_daily_cost": result["total_cost"],
+        "monthly_bill": result["monthly_bill"],
+        "usage_levels": {name: core.usage_level(hours) for name, hours in appliances.items()},
+        "recommendations": result["advice"],
+        "savings_if_cut": dict(zip(ml["apps"], ml["savings"])),
+        "total_savings_if_cut": ml["total_savings"],
+        "shifts": ml["shifts"],
+        "total_savings_if_shifted": ml["shift_savings"],
+        "scenarios": ml["scenarios"]["ranked"],
+    }
+
+
+def run(inventories, output, tariff, catalog, batch_size=1000, with_detail=False):
+    """Write one JSON line per household; returns the number written."""
+    count = 0
+    for batch in batches(inventories, batch_size):
+        if with_detail:
+            results = [detail(household, appliances, tariff, catalog) for household, appliances in batch]
+        else:
+            results = core.summarize_batch(batch, tariff, catalog)
+        output.writelines(json.dumps(result) + "\n" for result in results)
+        count += len(results)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze appliance inventories in streaming batches.")
+    parser.add_argument("input", help="CSV or JSONL file, or - for stdin")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="default: from the file extension")
+    parser.add_argument("--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--detail", action="store_true", help="full per-appliance analysis for each household")
+    parser.add_argument("--tariff", default=TARIFF_PATH)
+    parser.add_argument("--catalog", default=CATALOG_PATH)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.input.endswith(".csv") else "jsonl")
+    tariff = Tariff.from_file(args.tariff)
+    catalog = ApplianceCatalog.from_file(args.catalog)
+
+    source = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = run(read_inventories(source, fmt), output, tariff, catalog, args.batch_size, args.detail)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"{count} households", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
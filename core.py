@@ -0,0 +1,281 @@
+"""Headless analysis core shared by the Tk apps, the Flask app and cli.py.
+
+Everything here is plain Python and NumPy: cost estimation, savings from
+cutting usage or moving it to cheaper hours (scheduler.py), what-if
+scenario grids (scenarios.py), usage classification, the hours-vs-cost
+regression and the report texts. Nothing imports Tk or matplotlib, so the
+same analysis runs on a worker thread behind the UI, in a web request or
+over millions of households from the command line.
+
+Long-running functions accept an optional progress(fraction, message)
+callback; the Tk app passes one that also raises when the run has been
+superseded.
+"""
+import numpy as np
+
+import scenarios
+from forecasting import fit_line
+from scheduler import inventory_profile, optimize, shift_plan, usage_profile
+
+# Hours per day above which usage is flagged
+HIGH_USAGE_HOURS = 8
+MODERATE_USAGE_HOURS = 4
+REDUCE_ADVICE_HOURS = 6
+HIGH_PATTERN_HOURS = 5
+CUT_HOURS = 2
+
+
+def _report(progress, fraction, message):
+    if progress is not None:
+        progress(fraction, message)
+
+
+# -------------------- Classification --------------------
+def usage_level(hours):
+    """Report page classification: 'high', 'moderate' or 'efficient'."""
+    if hours > HIGH_USAGE_HOURS:
+        return "high"
+    if hours > MODERATE_USAGE_HOURS:
+        return "moderate"
+    return "efficient"
+
+
+def usage_pattern(hours):
+    """ML page classification: 'Very High', 'High' or 'Normal'."""
+    if hours > HIGH_USAGE_HOURS:
+        return "Very High"
+    if hours > HIGH_PATTERN_HOURS:
+        return "High"
+    return "Normal"
+
+
+# -------------------- Costs and savings --------------------
+# Every figure is priced with time of use, on each appliance's current
+# schedule (scheduler.usage_profile), as the scenario grid and the bill are
+def cost_breakdown(appliances, tariff, catalog):
+    """Per-appliance kWh and daily cost, plus the household's monthly bill."""
+    names = list(appliances)
+    hours = [appliances[name] for name in names]
+    kwh = catalog.daily_kwh(names, hours)
+    profile = usage_profile(names, hours, catalog).sum(axis=0)
+    costs = tariff.appliance_daily_costs(kwh, profile)
+    total_kwh = float(kwh.sum())
+    return {
+        "appliances": names,
+        "hours": hours,
+        "kwh": kwh.tolist(),
+        "costs": costs.tolist(),
+        "daily_kwh": total_kwh,
+        "total_cost": float(costs.sum()),
+        "monthly_bill": float(tariff.monthly_bill(total_kwh * tariff.days_per_month, profile)),
+    }
+
+
+def reduction_savings(names, hours, tariff, catalog, cut_hours=CUT_HOURS):
+    """Daily savings from cutting each appliance by cut_hours on its own,
+    and from cutting every appliance used more than cut_hours at once."""
+    hours = np.asarray(hours, dtype=np.float64)
+    reduced = np.maximum(hours - cut_hours, 0)
+    current_kwh, reduced_kwh = catalog.daily_kwh(names, hours), catalog.daily_kwh(names, reduced)
+    current_profile, reduced_profile = usage_profile(names, hours, catalog), usage_profile(names, reduced, catalog)
+    per_appliance = tariff.daily_savings(current_kwh, reduced_kwh, current_profile, reduced_profile)
+    # Every appliance used more than cut_hours cut at once, as one change
+    reducible = hours > cut_hours
+    cut_kwh = np.where(reducible, reduced_kwh, current_kwh)
+    cut_profile = np.where(reducible[:, None], reduced_profile, current_profile)
+    total = float(tariff.daily_savings([current_kwh.sum()], [cut_kwh.sum()],
+                                       current_profile.sum(axis=0)[None], cut_profile.sum(axis=0)[None])[0])
+    return per_appliance, total
+
+
+def usage_trend(hours, costs, points=100):
+    """Least-squares cost-vs-hours line as (line_x, line_y), or None."""
+    hours = np.asarray(hours, dtype=np.float64)
+    if len(hours) < 2:
+        return None
+    slope, intercept = fit_line(hours, np.asarray(costs, dtype=np.float64))
+    line_x = np.linspace(hours.min(), hours.max(), points)
+    return line_x, slope * line_x + intercept
+
+
+# -------------------- Page analyses --------------------
+def analyze(appliances, tariff, catalog, progress=None):
+    """The Analysis page: costs, regression trend, summary and recommendations."""
+    # Each appliance's share of the tariff bill, per day
+    _report(progress, 0.1, "Estimating costs")
+    breakdown = cost_breakdown(appliances, tariff, catalog)
+    names, hours, energy_costs = breakdown["appliances"], breakdown["hours"], breakdown["costs"]
+
+    _report(progress, 0.5, "Fitting trend")
+    trend = usage_trend(hours, energy_costs)
+
+    _report(progress, 0.8, "Writing summary")
+    currency = tariff.currency
+    total_cost = breakdown["total_cost"]
+    analysis_text = "\nAnalysis Summary:\n\n"
+    analysis_text += f"📊 Total Daily Energy Cost: {currency}{total_cost:.2f}\n\n"
+    analysis_text += "Breakdown by Appliance:\n"
+    for appliance, hour, cost in zip(names, hours, energy_costs):
+        percentage = (cost / total_cost) * 100 if total_cost else 0.0
+        analysis_text += f"\n• {appliance}: {hour} hours/day - {currency}{cost:.2f} ({percentage:.1f}% of total cost)"
+
+    # Recommendations based on usage
+    advice = []
+    for appliance, hour in zip(names, hours):
+        if hour > REDUCE_ADVICE_HOURS:
+            advice.append(f"Consider reducing {appliance} usage ({hour} hours/day is high)")
+        elif hour > MODERATE_USAGE_HOURS:
+            advice.append(f"Monitor {appliance} usage to optimize efficiency")
+    recommendations = "\nRecommendations for Energy Savings:\n"
+    recommendations += "".join(f"\n• {line}" for line in advice)
+
+    return {
+        "appliances": names,
+        "hours": hours,
+        "energy_costs": energy_costs,
+        "total_cost": total_cost,
+        "monthly_bill": breakdown["monthly_bill"],
+        "trend": trend,
+        "advice": advice,
+        "analysis_text": analysis_text,
+        "recommendations": recommendations,
+    }
+
+
+def ml_analysis(ranked, tariff, catalog, progress=None):
+    """The ML Report page for (appliance, hours) pairs ranked by hours."""
+    _report(progress, 0.2, "Ranking appliances")
+    apps = [appliance for appliance, _ in ranked]
+    hours = [hour for _, hour in ranked]
+    currency = tariff.currency
+
+    analysis_text = "🤖 Machine Learning Analysis\n\n"
+    analysis_text += "📊 Usage Patterns:\n"
+    for appliance, hour in ranked:
+        analysis_text += f"• {appliance}: {usage_pattern(hour)} Usage ({hour} hrs/day)\n"
+
+    # Every reduction, efficient-model swap and schedule shift of every
+    # appliance, priced through the tariff in one pass
+    _report(progress, 0.6, "Evaluating scenarios")
+    savings_by_appliance, total_savings = reduction_savings(apps, hours, tariff, catalog)
+    what_if = scenarios.evaluate(apps, hours, tariff, catalog)
+
+    analysis_text += "\n💰 Best Savings Scenarios:\n"
+    for scenario in what_if["ranked"]:
+        analysis_text += (f"• {scenario['label']}: Save {currency}{scenario['daily_savings']:.2f}/day "
+                          f"({currency}{scenario['monthly_savings']:.0f}/month)\n")
+    analysis_text += (f"\n📈 Cutting every appliance over {CUT_HOURS} hrs by {CUT_HOURS} hrs saves "
+                      f"{currency}{total_savings:.2f}/day")
+
+    # Cheapest time-of-use schedule within each appliance's allowed hours
+    _report(progress, 0.8, "Scheduling off-peak use")
+    shifts = shift_plan(apps, hours, tariff, catalog)
+    moves = {move["appliance"]: move for move in shifts}
+    shift_savings = sum(move["daily_savings"] for move in shifts)
+
+    analysis_text += "\n\n🎯 AI Recommendations:\n"
+    for appliance, hour in ranked:
+        move = moves.get(appliance)
+        if move is not None:
+            analysis_text += (f"• Run {appliance} {move['optimized']} instead of {move['current']}: "
+                              f"Save {currency}{move['daily_savings']:.2f}/day\n")
+        elif hour > HIGH_PATTERN_HOURS:
+            analysis_text += f"• Monitor {appliance} usage patterns\n"
+    if shifts:
+        analysis_text += f"\n⏰ Shifting to cheaper hours saves {currency}{shift_savings:.2f}/day"
+
+    return {
+        "apps": apps,
+        "hours": hours,
+        "savings": savings_by_appliance.tolist(),
+        "total_savings": total_savings,
+        "shifts": shifts,
+        "shift_savings": shift_savings,
+        "scenarios": what_if,
+        "analysis_text": analysis_text,
+    }
+
+
+# -------------------- Report texts --------------------
+USAGE_LEVEL_LINES = {
+    "high": "⚠️ High usage",
+    "moderate": "ℹ️ Moderate usage",
+    "efficient": "✅ Efficient usage",
+}
+
+
+def usage_report_text(appliances):
+    """The Report page text for an {appliance: hours} mapping."""
+    report_text = "📊 Appliance Usage Report 📊\n\n"
+    # An ApplianceInventory keeps its total; a plain dict is summed once
+    total_hours = getattr(appliances, "total_hours", None)
+    if total_hours is None:
+        total_hours = sum(appliances.values())
+
+    report_text += f"Total Hours of Appliance Usage: {total_hours} hrs/day\n\n"
+
+    for appliance, hours in appliances.items():
+        percentage = (hours / total_hours) * 100 if total_hours else 0.0
+        report_text += f"🔌 {appliance}: {hours} hrs/day ({percentage:.1f}%)\n"
+
+    report_text += "\n💡 Usage Analysis:\n"
+    for appliance, hours in appliances.items():
+        report_text += f"{USAGE_LEVEL_LINES[usage_level(hours)]}: {appliance} ({hours} hrs/day)\n"
+    return report_text
+
+
+def breakdown_text(breakdown, currency="₹"):
+    text = f"Total Daily Energy Cost: {currency}{breakdown['total_cost']:.2f}\n"
+    text += f"Estimated Monthly Bill: {currency}{breakdown['monthly_bill']:.2f}\n\n"
+    text += "Breakdown by Appliance:\n"
+    total_cost = breakdown["total_cost"] or 1.0
+    for appliance, hours, kwh, cost in zip(breakdown["appliances"], breakdown["hours"],
+                                           breakdown["kwh"], breakdown["costs"]):
+        text += (f"- {appliance}: {hours} hours/day, {kwh:.2f} kWh - {currency}{cost:.2f} "
+                 f"({cost / total_cost * 100:.1f}% of total cost)\n")
+    return text
+
+
+# -------------------- Many households at once --------------------
+def summarize_batch(households, tariff, catalog, cut_hours=CUT_HOURS):
+    """Bill summary for a list of (household, {appliance: hours}) pairs.
+
+    The batch is packed into one (households, catalog) hours matrix, so
+    kWh, bills, the whole-home savings from cutting every appliance used
+    more than cut_hours (as in ml_analysis) and from the cheapest
+    time-of-use schedule are a few array operations regardless of batch
+    size.
+    """
+    hours = np.zeros((len(households), len(catalog)))
+    owned = np.zeros_like(hours)
+    rows, columns, values = [], [], []
+    for row, (_, appliances) in enumerate(households):
+        rows.extend([row] * len(appliances))
+        columns.extend(catalog.indices(list(appliances)).tolist())
+        values.extend(appliances.values())
+    np.add.at(hours, (rows, columns), np.asarray(values, dtype=np.float64))
+    owned[rows, columns] = 1.0
+
+    reduced = np.where(hours > cut_hours, hours - cut_hours, hours)
+    daily_kwh = catalog.inventory_kwh(hours, owned)
+    reduced_kwh = catalog.inventory_kwh(reduced, owned)
+    days = tariff.days_per_month
+    monthly_bill = tariff.monthly_bill(daily_kwh * days, inventory_profile(hours, catalog, owned))
+    reduced_bill = tariff.monthly_bill(reduced_kwh * days, inventory_profile(reduced, catalog, owned))
+    savings = (monthly_bill - reduced_bill) / days
+    shift_savings = optimize(hours, tariff, catalog, owned)["total_savings"]
+    heaviest = np.where(owned.any(axis=1), (hours * catalog.on_kwh_per_hour).argmax(axis=1), -1)
+
+    return [
+        {
+            "household": household,
+            "appliances": len(appliances),
+            "daily_kwh": round(float(kwh), 3),
+            "monthly_bill": round(float(bill), 2),
+            "daily_savings_if_cut": round(float(saving), 2),
+            "daily_savings_if_shifted": round(float(shifted), 2),
+            "heaviest_appliance": catalog.names[top] if top >= 0 else None,
+        }
+        for (household, appliances), kwh, bill, saving, shifted, top
+        in zip(households, daily_kwh, monthly_bill, savings, shift_savings, heaviest)
+    ]
@@ -0,0 +1,242 @@
+"""Estimate per-appliance usage from a household's whole-home meter readings.
+
+At interval resolution (a few minutes or less) each appliance is either
+drawing power or not, so a reading is a baseline plus the wattage
+signatures of the appliances that were on. The engine alternates two
+batched steps over all readings at once:
+
+* start: the signatures begin at the median step change in the readings
+  near each appliance's rating, since switching one appliance moves the
+  meter by its actual draw.
+* decode: for every reading pick the on/off state (a subset of the
+  inventory, at most MAX_ON on together, fewer for large inventories so
+  there are at most MAX_STATES states) that best explains it, weighing
+  the fit, (y - level)^2 / 2 noise^2, against how likely that state is at
+  that hour of day. The cost is linear in y once the squares are expanded,
+  so each hour's best states form a lower envelope of lines and every
+  reading is decoded with one searchsorted.
+* refit: given the states, non-negative least squares over the
+  signatures, min ||y - baseline - states @ watts||^2 with watts kept
+  within a factor of the catalog's rating, so the household's own
+  appliances and always-on load replace the nominal figures. The on
+  probabilities per hour and the noise level are re-estimated too.
+
+Appliances with the same wattage can't be told apart and are split by
+their priors, which start from the hours the inventory already has.
+Hours come back in catalog terms (energy / on_kwh_per_hour), so priced
+through the catalog they reproduce the metered energy.
+
+    result = disaggregate(ts, kwh, {"Fan": 8, "Geyser": 1}, catalog)
+    user_appliances.update(estimated_hours(result))
+"""
+import itertools
+import math
+
+import numpy as np
+
+# Floor for the spread between readings and the states explaining them, in kW
+NOISE_KW = 0.02
+# Prior hours per day for appliances the inventory gives none for
+DEFAULT_HOURS = 4.0
+# Appliances assumed on at once; bounds the states decoded per reading.
+# Larger inventories get a lower MAX_ON so that there are at most
+# MAX_STATES states, and past MAX_APPLIANCES they are refused
+MAX_ON = 5
+MAX_STATES = 50_000
+MAX_APPLIANCES = 64
+ITERATIONS = 4
+# Pseudo-readings pulling each hour-of-day prior toward the starting prior
+PRIOR_WEIGHT = 30.0
+# Fitted signatures stay within these factors of the catalog's
+WATTS_RANGE = (0.5, 1.5)
+# Step changes within this fraction of a rating count as that appliance
+# switching, and it takes this many to trust their median over the rating
+STEP_SPREAD = 0.25
+MIN_STEPS = 10
+MIN_PROBABILITY = 1e-3
+# Estimates use this many days of stored readings, read from at most
+# 90 days of 1-minute data
+DAYS = 30
+MAX_READINGS = 90 * 24 * 60
+
+
+# -------------------- Steps --------------------
+def state_count(count, max_on=MAX_ON):
+    """Number of states appliance_states(count, max_on) returns."""
+    return sum(math.comb(count, on) for on in range(min(max_on, count) + 1))
+
+
+def max_on_for(count, max_on=MAX_ON):
+    """max_on lowered until count appliances have at most MAX_STATES states.
+
+    Raises ValueError for more than MAX_APPLIANCES appliances.
+    """
+    if count > MAX_APPLIANCES:
+        raise ValueError(f"{count} appliances are too many to tell apart (at most {MAX_APPLIANCES})")
+    while max_on > 1 and state_count(count, max_on) > MAX_STATES:
+        max_on -= 1
+    return max_on
+
+
+def appliance_states(count, max_on=MAX_ON):
+    """(S, count) 0/1 matrix of every state with at most max_on appliances on."""
+    states = np.zeros((state_count(count, max_on), count), dtype=np.int8)
+    row = 1
+    for on in range(1, min(max_on, count) + 1):
+        size = math.comb(count, on)
+        chosen = np.fromiter(itertools.chain.from_iterable(itertools.combinations(range(count), on)),
+                             dtype=np.intp, count=size * on).reshape(size, on)
+        states[np.arange(row, row + size)[:, None], chosen] = 1
+        row += size
+    return states
+
+
+def lower_envelope(slopes, intercepts):
+    """Lines (indices) forming min over s of intercepts[s] - slopes[s] * y,
+    and the y values where each hands over to the next."""
+    # Slopes ascending; of equal slopes only the lowest intercept can win
+    order = np.lexsort((intercepts, slopes))
+    order = order[np.r_[True, slopes[order][1:] != slopes[order][:-1]]]
+    m, c = slopes[order], intercepts[order]
+    hull = np.arange(len(order))
+    # A line is never lowest if its right-hand neighbour overtakes its
+    # left-hand one no later than it does. Dropping all such lines at once
+    # leaves the minimum unchanged, so repeat until none are left
+    while len(hull) > 2:
+        a, b, s = hull[:-2], hull[1:-1], hull[2:]
+        drop = (c[s] - c[a]) * (m[b] - m[a]) <= (c[b] - c[a]) * (m[s] - m[a])
+        if not drop.any():
+            break
+        hull = hull[np.r_[True, ~drop, True]]
+    hull = order[hull]
+    breaks = (intercepts[hull[1:]] - intercepts[hull[:-1]]) / (slopes[hull[1:]] - slopes[hull[:-1]])
+    return hull, breaks
+
+
+def step_signatures(load_kw, rated):
+    """Each rating replaced by the median meter step near it, where there
+    are enough of those."""
+    steps = np.abs(np.diff(load_kw))
+    watts = rated.copy()
+    for a, w in enumerate(rated):
+        near = steps[(steps > w * (1 - STEP_SPREAD)) & (steps < w * (1 + STEP_SPREAD))]
+        if len(near) >= MIN_STEPS:
+            watts[a] = np.median(near)
+    return watts
+
+
+def decode(load_kw, hour, levels, log_prior, noise_kw):
+    """Most probable state index per reading; log_prior is (24, S)."""
+    best = np.empty(len(load_kw), dtype=np.int64)
+    slopes = levels / noise_kw ** 2
+    squares = levels ** 2 / (2 * noise_kw ** 2)
+    for h in range(24):
+        rows = np.flatnonzero(hour == h)
+        if len(rows):
+            hull, breaks = lower_envelope(slopes, squares - log_prior[h])
+            best[rows] = hull[np.searchsorted(breaks, load_kw[rows])]
+    return best
+
+
+def fit_signatures(load_kw, on, watts, baseline, bounds, sweeps=50):
+    """Bounded non-negative least squares for the baseline and signatures
+    given the on matrix (T, A), by coordinate descent on the normal
+    equations; returns (watts, baseline)."""
+    design = np.column_stack([np.ones(len(load_kw)), on])
+    gram = design.T @ design
+    target = design.T @ load_kw
+    x = np.concatenate([[baseline], watts])
+    low = np.concatenate([[0.0], bounds[0]])
+    high = np.concatenate([[np.inf], bounds[1]])
+    for _ in range(sweeps):
+        for i in np.flatnonzero(np.diag(gram) > 0):
+            x[i] = min(max(x[i] + (target[i] - gram[i] @ x) / gram[i, i], low[i]), high[i])
+    return x[1:], x[0]
+
+
+# -------------------- Engine --------------------
+def disaggregate(ts, kwh, appliances, catalog, iterations=ITERATIONS, default_hours=DEFAULT_HOURS,
+                 max_on=MAX_ON):
+    """Per-appliance usage behind a series of interval readings.
+
+    appliances is a list of names, or {name: hours per day} whose hours
+    seed the priors. Raises ValueError for too few readings or too many
+    appliances (see max_on_for). Readings are (epoch seconds, kWh in the interval)
+    at a regular interval. Returns {"days", "metered_daily_kwh",
+    "baseline_daily_kwh", "noise_kw", "appliances": {name: {"hours",
+    "daily_kwh", "watts", "share"}}}; hours and kWh are per day, watts is
+    the fitted draw while on.
+    """
+    names = list(appliances)
+    ts = np.asarray(ts, dtype=np.int64)
+    kwh = np.asarray(kwh, dtype=np.float64)
+    if len(ts) < 2 or not names:
+        raise ValueError("Need at least two readings and one appliance")
+    max_on = max_on_for(len(names), max_on)
+    order = np.argsort(ts, kind="stable")
+    ts, kwh = ts[order], kwh[order]
+    interval_hours = float(np.median(np.diff(ts))) / 3600.0
+    if interval_hours <= 0:
+        raise ValueError("Readings need distinct timestamps")
+    days = len(ts) * interval_hours / 24.0
+    load_kw = kwh / interval_hours
+    hour = (ts % 86400) // 3600
+
+    index = catalog.indices(names)
+    rated = np.maximum(catalog.rated_watts[index] - catalog.standby_watts[index], 1.0) / 1000.0
+    duty = catalog.duty_cycle[index]
+    bounds = (rated * WATTS_RANGE[0], rated * WATTS_RANGE[1])
+    watts = step_signatures(load_kw, rated)
+    baseline = max(catalog.standby_watts[index].sum() / 1000.0, float(np.percentile(load_kw, 1)))
+    noise_kw = NOISE_KW
+
+    if isinstance(appliances, dict):
+        hours = np.array([default_hours if appliances[name] is None else appliances[name] for name in names],
+                         dtype=np.float64)
+    else:
+        hours = np.full(len(names), default_hours)
+    # Catalog hours are time in use; the draw is on for duty_cycle of it
+    start_prior = np.clip(hours * duty / 24.0, MIN_PROBABILITY, 1.0 - MIN_PROBABILITY)
+    prior = np.tile(start_prior, (24, 1))
+    readings_per_hour = np.bincount(hour, minlength=24)[:, None]
+
+    states = appliance_states(len(names), max_on)
+    for _ in range(max(iterations, 1)):
+        log_prior = np.log(prior) @ states.T + np.log1p(-prior) @ (1 - states).T
+        on = states[decode(load_kw - baseline, hour, states @ watts, log_prior, noise_kw)]
+        watts, baseline = fit_signatures(load_kw, on, watts, baseline, bounds)
+        residual = load_kw - baseline - on @ watts
+        noise_kw = max(float(np.sqrt(np.mean(residual ** 2))), NOISE_KW)
+        on_by_hour = np.zeros((24, len(names)))
+        np.add.at(on_by_hour, hour, on)
+        prior = np.clip((on_by_hour + PRIOR_WEIGHT * start_prior) / (readings_per_hour + PRIOR_WEIGHT),
+                        MIN_PROBABILITY, 1.0 - MIN_PROBABILITY)
+
+    daily_kwh = on.sum(axis=0) * watts * interval_hours / days
+    in_use = np.minimum(daily_kwh / np.maximum(catalog.on_kwh_per_hour[index], 1e-9), 24.0)
+    appliance_kwh = daily_kwh.sum()
+    return {
+        "days": days,
+        "metered_daily_kwh": float(kwh.sum()) / days,
+        "baseline_daily_kwh": float(baseline) * 24.0,
+        "noise_kw": noise_kw,
+        "appliances": {
+            name: {"hours": float(h), "daily_kwh": float(k), "watts": float(w * 1000.0),
+                   "share": float(k / appliance_kwh) if appliance_kwh else 0.0}
+            for name, h, k, w in zip(names, in_use, daily_kwh, watts)
+        },
+    }
+
+
+def estimate_household(store, household, appliances, catalog, days=DAYS):
+    """disaggregate() over the last days of a household's readings in a MeterStore."""
+    ts, kwh = store.read(household, last=MAX_READINGS)
+    if len(ts):
+        recent = ts >= ts.max() - days * 86400
+        ts, kwh = ts[recent], kwh[recent]
+    return disaggregate(ts, kwh, appliances, catalog)
+
+
+def estimated_hours(result, decimals=1):
+    """{appliance: hours per day} from a disaggregate() result, for an inventory."""
+    return {name: round(estimate["hours"], decimals) for name, estimate in result["appliances"].items()}
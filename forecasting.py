@@ -0,0 +1,184 @@
+"""Bill forecasting over one or many households at once.
+
+Histories of different lengths are packed right-aligned into a padded 2-D
+array with a boolean validity mask, so column -1 is always the latest month
+for every row and each forecast is a single vectorized pass over the batch.
+
+Models (all pure NumPy, no scikit-learn):
+    mean      mean of the last 3 months plus 5% (the original web forecast)
+    trend     closed-form least-squares line through the history
+    seasonal  seasonal-naive: the same month one season ago
+    smoothing simple exponential smoothing
+"""
+import math
+
+import numpy as np
+
+MIN_MONTHS = 3
+UPLIFT = 1.05  # Simple prediction with a 5% increase
+
+
+def pack_histories(histories):
+    """Pack a list of bill histories into (values, mask, errors).
+
+    values is a float64 array of shape (rows, longest history) padded on the
+    left with zeros, mask marks the real entries, and errors maps the row
+    index of every history that could not be used to a message. Bad rows are
+    left fully masked out instead of failing the whole batch.
+    """
+    rows = len(histories)
+    errors = {}
+    cleaned = []
+    for i, history in enumerate(histories):
+        try:
+            # A string is iterable too, but "123" is not three bills
+            if isinstance(history, (str, bytes)):
+                raise TypeError(history)
+            bills = [float(bill) for bill in history]
+        except (TypeError, ValueError):
+            errors[i] = "Bill history must be a list of numbers."
+            bills = []
+        else:
+            if not all(math.isfinite(bill) for bill in bills):
+                errors[i] = "Bill amounts must be finite numbers."
+                bills = []
+            elif len(bills) < MIN_MONTHS:
+                errors[i] = f"Not enough data for prediction. Enter at least {MIN_MONTHS} months' bills."
+                bills = []
+        cleaned.append(bills)
+
+    width = max(MIN_MONTHS, max((len(bills) for bills in cleaned), default=0))
+    lengths = np.fromiter((len(bills) for bills in cleaned), dtype=np.int64, count=rows)
+    mask = np.arange(width) >= (width - lengths)[:, None]
+    values = np.zeros((rows, width))
+    if lengths.any():
+        values[mask] = np.fromiter(
+            (bill for bills in cleaned for bill in bills), dtype=np.float64, count=int(lengths.sum())
+        )
+    return values, mask, errors
+
+
+def mean_uplift_forecast(values, mask, window=MIN_MONTHS, uplift=UPLIFT):
+    """Mean of the last `window` valid months times `uplift`, per row.
+
+    Rows without `window` valid months come back as NaN.
+    """
+    recent = values[:, -window:]
+    recent_mask = mask[:, -window:]
+    counts = recent_mask.sum(axis=1)
+    totals = np.where(recent_mask, recent, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        forecast = totals / counts * uplift
+    forecast[counts < window] = np.nan
+    return forecast
+
+
+def fit_line(x, y):
+    """Closed-form least-squares (slope, intercept) for y = slope * x + intercept.
+
+    Works on 1-D inputs or on 2-D batches (one line per row).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_mean = x.mean(axis=-1, keepdims=True)
+    y_mean = y.mean(axis=-1, keepdims=True)
+    sxx = ((x - x_mean) ** 2).sum(axis=-1)
+    sxy = ((x - x_mean) * (y - y_mean)).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+    intercept = y_mean[..., 0] - slope * x_mean[..., 0]
+    return slope, intercept
+
+
+def linear_trend_forecast(values, mask, horizon=1):
+    """Least-squares trend through each row's valid months, extrapolated.
+
+    Month positions are the column indexes, so for a 3-month history this is
+    the same line LinearRegression fitted on x = [1, 2, 3] and predicted at 4.
+    """
+    x = np.broadcast_to(np.arange(values.shape[1], dtype=np.float64), values.shape)
+    n = mask.sum(axis=1)
+    w = mask.astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = (w * x).sum(axis=1) / n
+        y_mean = (w * values).sum(axis=1) / n
+        dx = np.where(mask, x - x_mean[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        sxy = (dx * (values - y_mean[:, None])).sum(axis=1)
+        slope = np.where(sxx > 0, sxy / sxx, 0.0)
+    target = values.shape[1] - 1 + horizon
+    forecast = y_mean + slope * (target - x_mean)
+    forecast[n == 0] = np.nan
+    return forecast
+
+
+def seasonal_naive_forecast(values, mask, season=12, horizon=1):
+    """Repeat the value from one season before the forecast month.
+
+    Rows whose history is shorter than a season fall back to their latest
+    valid month.
+    """
+    column = values.shape[1] - 1 + horizon - season
+    latest = np.where(mask[:, -1], values[:, -1], np.nan)
+    if 0 <= column < values.shape[1]:
+        return np.where(mask[:, column], values[:, column], latest)
+    return latest
+
+
+def exponential_smoothing_forecast(values, mask, alpha=0.5):
+    """Simple exponential smoothing level after the last valid month.
+
+    Loops over months (columns), never over households, so each step is one
+    vectorized update of the whole batch.
+    """
+    level = np.full(values.shape[0], np.nan)
+    for column in range(values.shape[1]):
+        valid = mask[:, column]
+        current = values[:, column]
+        start = valid & np.isnan(level)
+        level = np.where(start, current, level)
+        update = valid & ~start
+        level = np.where(update, alpha * current + (1 - alpha) * level, level)
+    return level
+
+
+MODELS = {
+    "mean": mean_uplift_forecast,
+    "trend": linear_trend_forecast,
+    "seasonal": seasonal_naive_forecast,
+    "smoothing": exponential_smoothing_forecast,
+}
+
+
+def as_batch(history):
+    """Turn one history or a 2-D batch into (values, mask).
+
+    NaN entries in a 2-D array are treated as missing months.
+    """
+    values = np.asarray(history, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[None, :]
+    mask = ~np.isnan(values)
+    return np.where(mask, values, 0.0), mask
+
+
+def forecast(history, model="trend", **params):
+    """Forecast from a single history (returns a float) or a 2-D batch (an array)."""
+    values, mask = as_batch(history)
+    result = MODELS[model](values, mask, **params)
+    return float(result[0]) if np.ndim(history) == 1 else result
+
+
+def forecast_batch(histories, model="mean"):
+    """Forecast every history and return one result dict per input row."""
+    if model not in MODELS:
+        raise ValueError(f"Unknown forecasting model: {model}")
+    values, mask, errors = pack_histories(histories)
+    forecasts = MODELS[model](values, mask)
+    results = []
+    for i, value in enumerate(forecasts.tolist()):
+        if i in errors:
+            results.append({"index": i, "error": errors[i]})
+        else:
+            results.append({"index": i, "predicted_bill": round(value, 2)})
+    return results
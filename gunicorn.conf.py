@@ -0,0 +1,38 @@
+"""gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+Processes give CPU parallelism (NumPy pricing, chatbot scoring), threads
+cover requests waiting on SQLite. Every value can be overridden from the
+environment without editing this file.
+"""
+import importlib.util
+import multiprocessing
+import os
+
+bind = os.environ.get("ENERGY_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("ENERGY_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+# Each open /events stream holds a gthread thread for as long as the browser
+# tab is open. For many of them, opt in to the gevent worker (pip install
+# gevent; ENERGY_WORKER_CLASS=gevent): an idle stream then waits in a
+# greenlet, and this many connections are allowed per worker. SQLite calls
+# still block the whole worker while they run, including waits for another
+# writer's lock, so gevent suits stream-heavy, write-light deployments.
+# Without gevent installed the setting falls back to gthread.
+worker_class = os.environ.get("ENERGY_WORKER_CLASS", "gthread")
+if worker_class == "gevent" and importlib.util.find_spec("gevent") is None:
+    worker_class = "gthread"
+threads = int(os.environ.get("ENERGY_THREADS", 4))
+worker_connections = int(os.environ.get("ENERGY_WORKER_CONNECTIONS", 2000))
+
+# Each worker opens its own database connections after the fork
+preload_app = False
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then so slow leaks can't accumulate
+max_requests = 10_000
+max_requests_jitter = 1_000
+
+accesslog = "-"
+errorlog = "-"
@@ -0,0 +1,131 @@
+"""Appliance inventory with incrementally maintained usage aggregates.
+
+ApplianceInventory is a drop-in for the {appliance: hours} dict both Tk
+apps keep. Every set or delete updates, in O(log n):
+
+    total_hours / total_kwh     running sums
+    category_hours / _kwh       per-category sums (categories from the catalog)
+    a ranking by hours          sorted list; top(k) is a slice
+
+and then notifies subscribers, so reports and charts can read totals in
+O(1) and the top appliances in O(k) instead of re-summing and re-sorting
+the whole dict on every click. Ties in the ranking keep insertion order,
+which matches sorted(items, key=hours, reverse=True).
+"""
+import bisect
+import itertools
+from collections import defaultdict
+from collections.abc import MutableMapping
+
+
+class ApplianceInventory(MutableMapping):
+    def __init__(self, catalog=None, items=()):
+        self.catalog = catalog
+        self._hours = {}
+        self._kwh = {}
+        self._seq = {}
+        self._ranked = []  # (-hours, seq, name), ascending
+        self._counter = itertools.count()
+        self._listeners = []
+        self.total_hours = 0
+        self.total_kwh = 0.0
+        self.category_hours = defaultdict(float)
+        self.category_kwh = defaultdict(float)
+        self.category_counts = defaultdict(int)
+        self.version = 0
+        self.update(items)
+
+    # -------------------- Mapping interface --------------------
+    def __getitem__(self, name):
+        return self._hours[name]
+
+    def __iter__(self):
+        return iter(self._hours)
+
+    def __len__(self):
+        return len(self._hours)
+
+    def __setitem__(self, name, hours):
+        old = self._hours.get(name)
+        if old is not None:
+            self._discard(name, old)
+            seq = self._seq[name]
+        else:
+            seq = self._seq[name] = next(self._counter)
+        kwh = float(self.catalog.daily_kwh([name], [hours])[0]) if self.catalog is not None else 0.0
+        self._hours[name] = hours
+        self._kwh[name] = kwh
+        bisect.insort(self._ranked, (-hours, seq, name))
+        self.total_hours += hours
+        self.total_kwh += kwh
+        category = self.category(name)
+        self.category_hours[category] += hours
+        self.category_kwh[category] += kwh
+        self.category_counts[category] += 1
+        self._changed(name, old, hours)
+
+    def __delitem__(self, name):
+        old = self._hours[name]
+        self._discard(name, old)
+        del self._hours[name], self._kwh[name], self._seq[name]
+        self._changed(name, old, None)
+
+    def _discard(self, name, hours):
+        ranked = self._ranked
+        del ranked[bisect.bisect_left(ranked, (-hours, self._seq[name], name))]
+        kwh = self._kwh[name]
+        self.total_hours -= hours
+        self.total_kwh -= kwh
+        category = self.category(name)
+        self.category_hours[category] -= hours
+        self.category_kwh[category] -= kwh
+        self.category_counts[category] -= 1
+        if not self.category_counts[category]:
+            del self.category_hours[category], self.category_kwh[category], self.category_counts[category]
+
+    def _changed(self, name, old, new):
+        if not self._hours:
+            # Reset the sums so float drift never survives an empty inventory
+            self.total_hours = 0
+            self.total_kwh = 0.0
+            self.category_hours.clear()
+            self.category_kwh.clear()
+            self.category_counts.clear()
+        self.version += 1
+        for listener in list(self._listeners):
+            listener(name, old, new)
+
+    # -------------------- Aggregates --------------------
+    def category(self, name):
+        if self.catalog is None:
+            return "Other"
+        return self.catalog.categories[self.catalog.index.get(name, self.catalog.index["Other"])]
+
+    def kwh(self, name):
+        return self._kwh[name]
+
+    def share(self, name):
+        """Fraction of total usage hours taken by one appliance."""
+        return self._hours[name] / self.total_hours if self.total_hours else 0.0
+
+    def top(self, k=None):
+        """The k appliances with the most hours, as (name, hours) pairs."""
+        return [(name, -negative) for negative, _, name in self._ranked[:k]]
+
+    def count_above(self, hours):
+        """Number of appliances used strictly more than `hours` per day."""
+        return bisect.bisect_left(self._ranked, (-hours,))
+
+    def snapshot(self):
+        """Plain dict copy for handing to worker threads."""
+        return dict(self._hours)
+
+    # -------------------- Notifications --------------------
+    def subscribe(self, listener):
+        """Call listener(name, old_hours, new_hours) after every change.
+
+        old_hours is None for a new appliance and new_hours is None for a
+        removal. Returns a function that unsubscribes.
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
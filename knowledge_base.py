@@ -0,0 +1,108 @@
+"""FAQ retrieval for the chatbot in main.py and second.py.
+
+Questions are loaded once from data/faq.json and indexed as character
+trigrams with TF-IDF weights in an inverted index (trigram -> postings of
+entry ids and weights). A query is scored against every entry by a single
+np.bincount over the postings of its trigrams, so typos, missing
+punctuation and reworded questions still find the closest entry, and a
+lookup against thousands of entries stays well under a millisecond.
+"""
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "faq.json")
+NGRAM = 3
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^a-z0-9 ]+", " ", text.lower()).split())
+
+
+def ngrams(text, n=NGRAM):
+    padded = f" {normalize(text)} "
+    return Counter(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+class KnowledgeBase:
+    def __init__(self, entries, threshold=0.35):
+        self.questions = [entry["question"] for entry in entries]
+        self.answers = [entry["answer"] for entry in entries]
+        self.threshold = threshold
+        self.exact = {normalize(q): i for i, q in enumerate(self.questions)}
+        self._build_index()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_PATH, **options):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), **options)
+
+    def _build_index(self):
+        counts = [ngrams(question) for question in self.questions]
+        size = len(counts)
+        document_frequency = Counter(gram for grams in counts for gram in grams)
+        self.idf = {gram: math.log((1 + size) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        postings = defaultdict(lambda: ([], []))
+        for doc, grams in enumerate(counts):
+            weights = {gram: (1 + math.log(tf)) * self.idf[gram] for gram, tf in grams.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for gram, weight in weights.items():
+                ids, values = postings[gram]
+                ids.append(doc)
+                values.append(weight / norm)
+        self.postings = {
+            gram: (np.array(ids, dtype=np.int32), np.array(values, dtype=np.float32))
+            for gram, (ids, values) in postings.items()
+        }
+
+    def _query_terms(self, question):
+        weights = {
+            gram: (1 + math.log(tf)) * self.idf[gram]
+            for gram, tf in ngrams(question).items() if gram in self.idf
+        }
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return [(self.postings[gram], weight / norm) for gram, weight in weights.items()]
+
+    def scores(self, question):
+        """Cosine similarity of `question` against every entry."""
+        terms = self._query_terms(question)
+        if not terms:
+            return np.zeros(len(self.questions), dtype=np.float32)
+        ids = np.concatenate([postings[0] for postings, _ in terms])
+        weights = np.concatenate([postings[1] * weight for postings, weight in terms])
+        return np.bincount(ids, weights=weights, minlength=len(self.questions))
+
+    def lookup(self, question):
+        """Return (entry index, score) of the best match, or (None, score)."""
+        exact = self.exact.get(normalize(question))
+        if exact is not None:
+            return exact, 1.0
+        if not self.questions:
+            return None, 0.0
+        scores = self.scores(question)
+        best = int(scores.argmax())
+        score = float(scores[best])
+        return (best, score) if score >= self.threshold else (None, score)
+
+    def answer(self, question, default=None):
+        index, _ = self.lookup(question)
+        return self.answers[index] if index is not None else default
+
+    def answer_many(self, questions, default=None):
+        """Answer a batch of questions; repeated questions are scored once.
+
+        Each lookup is already a single bincount over the postings, which
+        measured faster than packing a chunk of queries into one dense
+        (queries, entries) score matrix.
+        """
+        answers = {}
+        for question in questions:
+            key = normalize(question)
+            if key not in answers:
+                answers[key] = self.answer(question, default)
+        return [answers[normalize(question)] for question in questions]
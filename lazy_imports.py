@@ -0,0 +1,70 @@
+"""Deferred imports for the heavy plotting and data libraries.
+
+matplotlib, pandas and the TkAgg backend take far longer to import than the
+window takes to appear, and only the Analysis and ML Report pages need them.
+A LazyModule stands in for the real module and imports it on first
+attribute access; warm_up() imports a set of them on a background thread
+(e.g. while the splash screen is showing) so the first click doesn't pay.
+"""
+import importlib
+import threading
+import time
+
+
+class LazyModule:
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+        self._lock = threading.Lock()
+        self.load_seconds = None
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    if self._setup:
+                        self._setup()
+                    self._module = importlib.import_module(self._name)
+                    self.load_seconds = time.perf_counter() - started
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.loaded else "not loaded"
+        return f"<LazyModule {self._name!r} ({state})>"
+
+
+def lazy_import(name, setup=None):
+    """Return a LazyModule for `name`; `setup` runs once just before the import."""
+    return LazyModule(name, setup)
+
+
+def use_tk_backend():
+    import matplotlib
+    matplotlib.use("TkAgg")
+
+
+def warm_up(modules, on_loaded=None):
+    """Import `modules` on a daemon thread, in order.
+
+    on_loaded(module, index) is called from the worker thread after each
+    import; Tk callers must hop back to the UI thread (root.after) before
+    touching widgets. Returns the started thread.
+    """
+    def run():
+        for index, module in enumerate(modules):
+            module.load()
+            if on_loaded:
+                on_loaded(module, index)
+
+    thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -1,41 +1,519 @@
-from flask import Flask, render_template, request, jsonify
+from flask import (Blueprint, Flask, Response, current_app, g, render_template, request, jsonify, session,
+                   url_for)
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
+from werkzeug.local import LocalProxy
+from anomaly import PRIME_READINGS, AnomalyDetector
+from catalog import ApplianceCatalog
+from disaggregation import DAYS as DISAGGREGATE_DAYS
+from disaggregation import estimate_household, estimated_hours
+import hashlib
+import json
+import math
 import os
+import secrets
+import uuid
 import numpy as np
+import core
+from forecasting import MODELS, forecast_batch
+from knowledge_base import KnowledgeBase
+from meter_store import FORMATS as METER_FORMATS
+from meter_store import IngestError, MeterStore, ingest
+from pubsub import RESYNC, EventBus
+from render_cache import RenderCache, state_key
+from storage import create_storage
+from tariff import Tariff
 
-app = Flask(__name__)
+bp = Blueprint("energy", __name__)
 
-# Dummy data storage (replace with DB later)
-appliances = []  # Stores added appliances
-bill_history = []  # Stores last 3 months' bills
+MAX_BATCH_ROWS = 100_000
+MAX_HOURS_PER_DAY = 24
 
-@app.route('/')
+# Appliances and bill history live in a per-household store owned by the
+# app (SQLite by default, ENERGY_STORAGE=memory for tests); see create_app
+storage = LocalProxy(lambda: current_app.extensions["storage"])
+# A browser's household id lives in a signed session cookie. The signing
+# key comes from ENERGY_SECRET_KEY, or is generated once into SECRET_KEY_FILE
+# so that every worker process shares it.
+HOUSEHOLD_COOKIE = "household_session"
+HOUSEHOLD_COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+SECRET_KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".secret_key")
+
+# Static files are served with ?v=<content hash> URLs, so browsers can keep
+# them for a year and still pick up a new version on the next page load
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+DASHBOARD_TEMPLATES = ("index.html", "partials/appliance_list.html", "partials/appliance_item.html",
+                       "partials/appliance_form.html")
+DASHBOARD_ASSETS = ("styles.css", "scripts.js")
+FRAGMENT_CACHE_BYTES = 16 * 1024 * 1024
+
+# Live updates: a comment line this often keeps idle proxies from closing
+# the stream; EventSource waits this long before reconnecting
+EVENTS_HEARTBEAT = 15
+EVENTS_RETRY_MS = 3000
+
+# All cost figures are priced through this tariff (data/tariff.json)
+tariff = Tariff.from_file()
+
+# Appliance wattages (data/appliances.json), shared with the page and the API
+catalog = ApplianceCatalog.from_file()
+CATALOG_MAX_AGE = 24 * 60 * 60
+
+# Interval readings from smart meters, one append-only column set per household
+meters = LocalProxy(lambda: current_app.extensions["meters"])
+MAX_METER_READINGS = 10_000
+MAX_ALERTS_SHOWN = 20
+
+# FAQ index for the chatbot, built once at startup from data/faq.json
+knowledge_base = KnowledgeBase.from_file()
+CHATBOT_FALLBACK = "I'm not sure. Please ask something else."
+MAX_CHATBOT_BATCH = 10_000
+
+
+def current_household():
+    """This browser's household id, from its signed session cookie.
+
+    With trust_household_header (ENERGY_TRUST_HOUSEHOLD_HEADER=1) an
+    X-Household-Id header wins instead. Anyone can send that header, so
+    only turn it on behind a proxy that authenticates users and sets it
+    itself, stripping whatever the client sent.
+    """
+    if current_app.config["TRUST_HOUSEHOLD_HEADER"]:
+        household = request.headers.get("X-Household-Id")
+        if household:
+            return household
+    household = session.get("household")
+    if household is None:
+        # First visit: give the browser its own inventory
+        household = session["household"] = g.new_household = uuid.uuid4().hex
+        session.permanent = True
+    return household
+
+
+def secret_key(path=SECRET_KEY_FILE):
+    """ENERGY_SECRET_KEY, or a random key created in path on first use."""
+    key = os.environ.get("ENERGY_SECRET_KEY")
+    if key:
+        return key
+    try:
+        # O_EXCL: of workers starting together, exactly one writes the key
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        pass
+    else:
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    with open(path) as f:
+        key = f.read().strip()
+    if not key:
+        raise RuntimeError(f"{path} is empty; delete it or set ENERGY_SECRET_KEY")
+    return key
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+
+def asset_url(filename):
+    """URL of a static file with its content hash as a cache buster."""
+    versions = current_app.extensions["asset_versions"]
+    version = versions.get(filename)
+    if version is None:
+        version = versions[filename] = file_digest(os.path.join(current_app.static_folder, filename))
+    return url_for("static", filename=filename, v=version)
+
+
+def dashboard_version(app):
+    """Hash of the dashboard's templates and static files; part of its ETag."""
+    paths = [os.path.join(app.root_path, app.template_folder, name) for name in DASHBOARD_TEMPLATES]
+    paths += [os.path.join(app.static_folder, name) for name in DASHBOARD_ASSETS]
+    return hashlib.sha1("".join(file_digest(path) for path in paths).encode()).hexdigest()[:12]
+
+
+def render_fragment(kind, key, template, **context):
+    """A rendered partial, cached under everything it depends on."""
+    return current_app.extensions["fragments"].get_or_compute(
+        kind, key, lambda: Markup(render_template(template, **context)))
+
+
+def render_fragments(appliances):
+    """The dashboard's cached parts, by the id of the element they fill."""
+    return {
+        "appliance-list": render_fragment("appliance-list", state_key(appliances),
+                                          "partials/appliance_list.html", appliances=appliances),
+        "appliance-form": render_fragment("appliance-form", catalog.fingerprint(),
+                                          "partials/appliance_form.html", catalog=catalog),
+    }
+
+
+def publish(household, event):
+    """Push a delta to the household's open /events streams."""
+    return current_app.extensions["events"].publish(household, event)
+
+
+def appliance_event(name, hours):
+    html = render_fragment("appliance-item", state_key({name: hours}),
+                           "partials/appliance_item.html", appliance=name, hours=hours)
+    return {"type": "appliance", "name": name, "hours": hours, "html": html}
+
+
+def snapshot_event(household):
+    version, _ = storage.state_version(household)
+    appliances = storage.list_appliances(household)
+    return {"type": "snapshot", "version": version,
+            "html": render_fragments(appliances)["appliance-list"]}
+
+
+def sse(event, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def request_data():
+    return request.get_json(silent=True) or request.form
+
+
+def parse_number(value, low=-math.inf, high=math.inf):
+    """float(value) if it is a finite number in [low, high], else ValueError.
+
+    float() accepts "nan" and "inf", which would be stored and then come
+    back as NaN/Infinity in JSON that browsers can't parse.
+    """
+    number = float(value)
+    if not (math.isfinite(number) and low <= number <= high):
+        raise ValueError(f"{value!r} is not a number between {low} and {high}")
+    return number
+
+
+def requested_model(data):
+    model = data.get("model", "mean")
+    return model if model in MODELS else None
+
+@bp.route('/')
 def home():
-    return render_template('index.html', appliances=appliances, bill_history=bill_history)
+    """The dashboard, revalidated against the household's state version.
+
+    An unchanged dashboard costs one version lookup and returns 304; a
+    changed one re-renders only the fragments whose inputs changed.
+    """
+    household = current_household()
+    version, modified = storage.state_version(household)
+    etag = hashlib.sha1(f"{household}:{version}:{current_app.extensions['dashboard_version']}:"
+                        f"{catalog.fingerprint()}".encode()).hexdigest()
 
-@app.route('/add_appliance', methods=['POST'])
+    response = current_app.response_class()
+    response.set_etag(etag)
+    if modified is not None:
+        response.last_modified = modified
+    # Revalidate every time, but only in this browser
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.update(("Cookie", "X-Household-Id"))
+    if g.get("new_household") is None and not is_resource_modified(
+            request.environ, etag=etag, last_modified=response.last_modified):
+        response.status_code = 304
+        return response
+
+    appliances = storage.list_appliances(household)
+    response.set_data(render_template('index.html', fragments=render_fragments(appliances)))
+    response.mimetype = "text/html"
+    return response
+
+@bp.route('/add_appliance', methods=['POST'])
 def add_appliance():
-    data = request.json
-    appliances.append(data)
-    return jsonify({"message": "Appliance added successfully!", "appliances": appliances})
+    household = current_household()
+    data = request_data()
+    try:
+        name, hours = data["appliance"], parse_number(data["hours"], 0, MAX_HOURS_PER_DAY)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": f"Send an appliance name and its hours per day (0-{MAX_HOURS_PER_DAY})."}), 400
+    storage.set_appliance(household, name, hours)
+    publish(household, appliance_event(name, hours))
+    appliances = storage.list_appliances(household)
+    bill = core.cost_breakdown(appliances, tariff, catalog)["monthly_bill"]
+    return jsonify({"message": "Appliance added successfully!",
+                    "appliances": appliances,
+                    "fragments": {"appliance-list": render_fragments(appliances)["appliance-list"]},
+                    "estimated_monthly_bill": round(bill, 2)})
+
+@bp.route('/remove_appliance', methods=['POST'])
+def remove_appliance():
+    household = current_household()
+    name = request_data().get("appliance")
+    if not name or not storage.remove_appliance(household, name):
+        return jsonify({"error": "No such appliance."}), 404
+    publish(household, {"type": "appliance_removed", "name": name})
+    return jsonify({"message": "Appliance removed.", "appliances": storage.list_appliances(household)})
+
+@bp.route('/events')
+def events():
+    """Server-sent events with the household's changes as JSON deltas.
+
+    Every stream opens with a snapshot of the appliance list, and sends a
+    fresh one whenever its queue overflowed, so clients never have to
+    reconcile missed deltas. Events come through the storage's event log, so
+    a change handled by any worker process reaches every stream. Under
+    the default gthread worker each open stream holds a thread; see
+    gunicorn.conf.py for the gevent option.
+    """
+    household = current_household()
+    app = current_app._get_current_object()
+
+    # Runs after the request has returned, so it only borrows an app
+    # context for the moments it reads storage
+    def snapshot():
+        with app.app_context():
+            return snapshot_event(household)
+
+    def stream():
+        with app.extensions["events"].subscribe(household) as subscription:
+            yield f"retry: {EVENTS_RETRY_MS}\n"
+            yield sse(snapshot())
+            while True:
+                item = subscription.get(timeout=EVENTS_HEARTBEAT)
+                if item is None:
+                    if subscription.closed:
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                event_id, event = item
+                if event is RESYNC:
+                    event = snapshot()
+                yield sse(event, event_id)
+
+    response = Response(stream(), mimetype="text/event-stream")
+    response.cache_control.no_cache = True
+    response.headers["X-Accel-Buffering"] = "no"  # don't let nginx buffer the stream
+    return response
+
+@bp.route('/meter/readings', methods=['POST'])
+def upload_meter_readings():
+    """Append interval readings streamed as NDJSON or CSV.
+
+    Lines are {"ts": epoch seconds or ISO 8601, "kwh": energy} objects, or
+    CSV rows under a header with ts (or timestamp) and kwh columns. The
+    format comes from ?format= or the Content-Type (text/csv for CSV). The
+    body is read a chunk at a time, never all at once, so uploads can be
+    sent with chunked transfer encoding and be as large as needed.
+    """
+    household = current_household()
+    fmt = request.args.get("format") or ("csv" if request.mimetype == "text/csv" else "ndjson")
+    if fmt not in METER_FORMATS:
+        return jsonify({"error": f"Unknown format. Choose one of: {', '.join(METER_FORMATS)}"}), 400
+
+    # Every stored block is scored for anomalies as it lands
+    detector = current_app.extensions["anomaly"]
+    if household not in detector:
+        detector.prime(household, *meters.read(household, last=PRIME_READINGS))
+    alerts = []
+    try:
+        summary = ingest(request.stream, meters, household, fmt,
+                         on_flush=lambda ts, kwh: alerts.extend(detector.detect(household, ts, kwh)))
+    except IngestError as exc:
+        return jsonify({"error": str(exc), "accepted": exc.accepted,
+                        "alerts": alerts[-MAX_ALERTS_SHOWN:]}), 400
+    if summary["rows"]:
+        publish(household, {"type": "reading", "ts": summary["last_ts"], "kwh": summary["last_kwh"],
+                            "rows": summary["rows"]})
+    if alerts:
+        publish(household, {"type": "anomaly", "alerts": alerts[-MAX_ALERTS_SHOWN:], "count": len(alerts)})
+    return jsonify({"message": "Readings stored.", "accepted": summary["rows"], **summary,
+                    "alert_count": len(alerts), "alerts": alerts[-MAX_ALERTS_SHOWN:]})
+
+@bp.route('/meter/readings')
+def meter_readings():
+    """The household's latest readings (?limit=, at most MAX_METER_READINGS)."""
+    household = current_household()
+    limit = min(max(request.args.get("limit", 100, type=int), 0), MAX_METER_READINGS)
+    ts, kwh = meters.read(household, last=limit)
+    return jsonify({"rows": meters.rows(household), "ts": ts.tolist(), "kwh": kwh.tolist()})
 
-@app.route('/predict_bill', methods=['POST'])
+@bp.route('/meter/anomalies')
+def meter_anomalies():
+    """Recent unusual readings for the household, newest last."""
+    return jsonify({"alerts": current_app.extensions["anomaly"].recent_alerts(current_household())})
+
+@bp.route('/meter/disaggregate', methods=['POST'])
+def disaggregate_meter():
+    """Estimate each appliance's hours per day from the household's readings.
+
+    Splits the last ?days= (default DISAGGREGATE_DAYS) of readings between
+    the appliances in the inventory and, unless ?apply=0, stores the
+    estimated hours in place of the typed ones.
+    """
+    household = current_household()
+    appliances = storage.list_appliances(household)
+    if not appliances:
+        return jsonify({"error": "Add your appliances first so the readings can be split between them."}), 400
+    days = min(max(request.args.get("days", DISAGGREGATE_DAYS, type=float), 1), 90)
+    try:
+        result = estimate_household(meters, household, appliances, catalog, days)
+    except ValueError as exc:
+        return jsonify({"error": f"Can't estimate usage: {exc}"}), 400
+
+    hours = estimated_hours(result)
+    if request.args.get("apply", "1") != "0":
+        for name, value in hours.items():
+            storage.set_appliance(household, name, value)
+            publish(household, appliance_event(name, value))
+        appliances = storage.list_appliances(household)
+    return jsonify({"estimates": result, "hours": hours, "appliances": appliances,
+                    "fragments": {"appliance-list": render_fragments(appliances)["appliance-list"]}})
+
+@bp.route('/appliances/catalog')
+def appliance_catalog():
+    """Rated watts, duty cycle and standby draw per appliance type."""
+    response = jsonify(catalog.to_json())
+    response.set_etag(catalog.fingerprint())
+    response.cache_control.public = True
+    response.cache_control.max_age = CATALOG_MAX_AGE
+    return response.make_conditional(request)
+
+@bp.route('/analysis')
+def analysis():
+    """The Analysis and ML Report figures for the household's appliances."""
+    appliances = storage.list_appliances(current_household())
+    if not appliances:
+        return jsonify({"error": "Add appliances first."}), 400
+    result = core.analyze(appliances, tariff, catalog)
+    ranked = sorted(appliances.items(), key=lambda item: item[1], reverse=True)
+    ml = core.ml_analysis(ranked, tariff, catalog)
+    return jsonify({
+        "appliances": result["appliances"],
+        "hours": result["hours"],
+        "daily_costs": result["energy_costs"],
+        "total_daily_cost": result["total_cost"],
+        "monthly_bill": result["monthly_bill"],
+        "recommendations": result["advice"],
+        "savings_if_cut": dict(zip(ml["apps"], ml["savings"])),
+        "total_savings_if_cut": ml["total_savings"],
+        "shifts": ml["shifts"],
+        "total_savings_if_shifted": ml["shift_savings"],
+        "scenarios": ml["scenarios"]["ranked"],
+    })
+
+@bp.route('/tariff/bill', methods=['POST'])
+def tariff_bill():
+    """Price a list of monthly kWh readings: {"kwh": [..]} -> {"bills": [..]}."""
+    kwh = (request.get_json(silent=True) or {}).get("kwh")
+    if not isinstance(kwh, list) or len(kwh) > MAX_BATCH_ROWS:
+        return jsonify({"error": f"Send up to {MAX_BATCH_ROWS} monthly kWh values as a 'kwh' list."}), 400
+    try:
+        # None and "nan" both convert to NaN
+        kwh = np.asarray(kwh, dtype=float)
+    except (TypeError, ValueError):
+        kwh = None
+    if kwh is None or kwh.ndim != 1 or not np.isfinite(kwh).all() or (kwh < 0).any():
+        return jsonify({"error": "kWh values must be finite, non-negative numbers."}), 400
+    bills = tariff.monthly_bill(kwh)
+    return jsonify({"tariff": tariff.name, "bills": np.round(bills, 2).tolist()})
+
+@bp.route('/predict_bill', methods=['POST'])
 def predict_bill():
-    if len(bill_history) < 3:
-        return jsonify({"error": "Not enough data for prediction. Enter at least 3 months' bills."})
-    
-    prediction = np.mean(bill_history) * 1.05  # Simple prediction with a 5% increase
-    return jsonify({"predicted_bill": round(prediction, 2)})
+    household = current_household()
+    data = request_data()
+    try:
+        # Check every amount before storing any of them
+        bills = [parse_number(data[key]) for key in ("prev_bill1", "prev_bill2", "prev_bill3") if data.get(key)]
+    except (TypeError, ValueError):
+        return jsonify({"error": "Enter valid bill amounts"}), 400
+    for bill in bills:
+        storage.add_bill(household, bill)
+    model = requested_model(data)
+    if model is None:
+        return jsonify({"error": f"Unknown model. Choose one of: {', '.join(MODELS)}"}), 400
+
+    window = 3 if model == "mean" else None
+    result = forecast_batch([storage.bill_history(household, limit=window)], model)[0]
+    result.pop("index")
+    if "predicted_bill" in result:
+        publish(household, {"type": "prediction", "model": model, **result})
+    return jsonify(result)
 
-@app.route('/chatbot', methods=['POST'])
+@bp.route('/predict_bill/batch', methods=['POST'])
+def predict_bill_batch():
+    """Forecast many households in one request.
+
+    Body: {"households": [{"household": "h1", "bills": [..]}, [..], ...],
+           "model": "mean" | "trend" | "seasonal" | "smoothing"}.
+    A row may be a bare list of bills, or an object whose bills default to
+    that household's stored history. Results come back in input order, with
+    an "error" entry for any row that could not be forecast.
+    """
+    data = request.get_json(silent=True) or {}
+    rows = data.get("households")
+    if not isinstance(rows, list):
+        return jsonify({"error": "Send a JSON body with a 'households' list."}), 400
+    model = requested_model(data)
+    if model is None:
+        return jsonify({"error": f"Unknown model. Choose one of: {', '.join(MODELS)}"}), 400
+    if len(rows) > MAX_BATCH_ROWS:
+        return jsonify({"error": f"At most {MAX_BATCH_ROWS} households per batch."}), 413
+
+    histories = []
+    for row in rows:
+        if isinstance(row, dict):
+            bills = row.get("bills")
+            if bills is None and row.get("household"):
+                bills = storage.bill_history(str(row["household"]))
+            histories.append(bills if bills is not None else [])
+        else:
+            histories.append(row)
+
+    results = forecast_batch(histories, model)
+    for row, result in zip(rows, results):
+        if isinstance(row, dict) and "household" in row:
+            result["household"] = row["household"]
+    return jsonify({"results": results})
+
+@bp.route('/chatbot', methods=['POST'])
 def chatbot():
-    user_message = request.json.get('message', '').lower()
-    responses = {
-        "how to reduce electricity bill?": "Use energy-efficient appliances and turn off unused devices.",
-        "what is the average electricity cost?": "It varies by region. In most places, it's around $0.12/kWh.",
-        "how does power consumption work?": "Power is measured in watts. More wattage = more consumption.",
-    }
-    response = responses.get(user_message, "I'm not sure. Please ask something else.")
+    user_message = str(request_data().get('message', ''))
+    response = knowledge_base.answer(user_message, default=CHATBOT_FALLBACK)
     return jsonify({"response": response})
 
+@bp.route('/chatbot/batch', methods=['POST'])
+def chatbot_batch():
+    messages = (request.get_json(silent=True) or {}).get("messages")
+    if not isinstance(messages, list):
+        return jsonify({"error": "Send a JSON body with a 'messages' list."}), 400
+    if len(messages) > MAX_CHATBOT_BATCH:
+        return jsonify({"error": f"At most {MAX_CHATBOT_BATCH} messages per batch."}), 413
+    responses = knowledge_base.answer_many([str(m) for m in messages], default=CHATBOT_FALLBACK)
+    return jsonify({"responses": responses})
+
+def create_app(storage_url=None, meter_dir=None, trust_household_header=None):
+    """Build an app with its own storage backend.
+
+    storage_url is "memory" or "sqlite:///path" (default: ENERGY_STORAGE);
+    meter readings go under meter_dir (default: ENERGY_METER_DIR).
+    trust_household_header (default: ENERGY_TRUST_HOUSEHOLD_HEADER=1) takes
+    the household from X-Household-Id; see current_household().
+    Run it in production through wsgi.py and gunicorn.conf.py.
+    """
+    if trust_household_header is None:
+        trust_household_header = os.environ.get("ENERGY_TRUST_HOUSEHOLD_HEADER") == "1"
+    app = Flask(__name__)
+    app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
+    app.config.update(
+        SECRET_KEY=secret_key(),
+        SESSION_COOKIE_NAME=HOUSEHOLD_COOKIE,
+        SESSION_COOKIE_SAMESITE="Lax",
+        PERMANENT_SESSION_LIFETIME=HOUSEHOLD_COOKIE_MAX_AGE,
+        TRUST_HOUSEHOLD_HEADER=trust_household_header,
+    )
+    app.extensions["storage"] = create_storage(storage_url)
+    app.extensions["meters"] = MeterStore(meter_dir)
+    app.extensions["anomaly"] = AnomalyDetector()
+    app.extensions["fragments"] = RenderCache(FRAGMENT_CACHE_BYTES)
+    app.extensions["events"] = EventBus(app.extensions["storage"])
+    app.extensions["asset_versions"] = {}
+    app.extensions["dashboard_version"] = dashboard_version(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(bp)
+    return app
+
 if __name__ == '__main__':
-    app.run(debug=True)
+    # Development server only; see wsgi.py for production
+    create_app().run(debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True)
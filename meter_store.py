@@ -0,0 +1,286 @@
+"""Append-only columnar store for interval meter readings, and its ingester.
+
+Each household gets a directory holding one raw little-endian file per
+column (ts.i8: epoch seconds, kwh.f8: energy in the interval), so reading
+a household back is a single np.fromfile per column and appending is a
+write at the end of each file. Rows are never rewritten; the row count is
+the shortest column, and an append first trims any tail left by a write
+that died half way.
+
+ingest() reads an upload (NDJSON or CSV) in fixed-size chunks, parses
+each chunk's lines in one go into preallocated NumPy column buffers and
+flushes them to the store whenever they fill up, so memory stays bounded
+by chunk_size + buffer_rows whatever the upload size.
+
+    store = MeterStore("meter_data")
+    ingest(request.stream, store, "home-1", fmt="csv")
+    ts, kwh = store.read("home-1")
+"""
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+
+import numpy as np
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "meter_data")
+COLUMNS = (("ts", np.dtype("<i8")), ("kwh", np.dtype("<f8")))
+
+CHUNK_SIZE = 256 * 1024
+BUFFER_ROWS = 64 * 1024
+FORMATS = ("ndjson", "csv")
+TIMESTAMP_FIELDS = ("ts", "timestamp", "time")
+ENERGY_FIELD = "kwh"
+# Readings must fall in [1970, 2200); a line may be at most this long
+TS_RANGE = (0, 7_258_118_400)
+MAX_LINE = 64 * 1024
+
+
+class IngestError(ValueError):
+    """A malformed upload; rows before the offending chunk were stored."""
+
+    def __init__(self, message, accepted):
+        super().__init__(message)
+        self.accepted = accepted
+
+
+# -------------------- Store --------------------
+def column_path(directory, name, dtype):
+    return os.path.join(directory, f"{name}.{dtype.kind}{dtype.itemsize}")
+
+
+class MeterStore:
+    def __init__(self, root=None, stripes=64):
+        self.root = root or os.environ.get("ENERGY_METER_DIR", DEFAULT_ROOT)
+        # Threads in this process share a lock per stripe; flock on the
+        # household's lock file orders writers from other processes
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def directory(self, household):
+        """root/<2-char shard>/<quoted household>; keeps directories small."""
+        shard = hashlib.sha1(str(household).encode()).hexdigest()[:2]
+        return os.path.join(self.root, shard, urllib.parse.quote(str(household), safe=""))
+
+    def _lock(self, household):
+        return self._locks[hash(household) % len(self._locks)]
+
+    def _rows(self, directory):
+        rows = []
+        for name, dtype in COLUMNS:
+            try:
+                rows.append(os.path.getsize(column_path(directory, name, dtype)) // dtype.itemsize)
+            except FileNotFoundError:
+                rows.append(0)
+        return min(rows)
+
+    def rows(self, household):
+        return self._rows(self.directory(household))
+
+    def append(self, household, ts, kwh):
+        """Append equal-length columns; returns the household's new row count."""
+        columns = [np.ascontiguousarray(ts, dtype=COLUMNS[0][1]),
+                   np.ascontiguousarray(kwh, dtype=COLUMNS[1][1])]
+        if len(columns[0]) != len(columns[1]):
+            raise ValueError("Column lengths differ")
+        directory = self.directory(household)
+        with self._lock(household):
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, ".lock"), "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                rows = self._rows(directory)
+                for (name, dtype), values in zip(COLUMNS, columns):
+                    with open(column_path(directory, name, dtype), "ab") as f:
+                        f.truncate(rows * dtype.itemsize)  # drop a torn tail, if any
+                        f.write(values.tobytes())
+        return rows + len(columns[0])
+
+    def read(self, household, start=None, end=None, last=None):
+        """(ts, kwh) arrays in arrival order, optionally only the last rows
+        and/or those within [start, end)."""
+        directory = self.directory(household)
+        rows = self._rows(directory)
+        skip = max(rows - last, 0) if last is not None else 0
+        if rows - skip <= 0:
+            return np.empty(0, COLUMNS[0][1]), np.empty(0, COLUMNS[1][1])
+        ts, kwh = (np.fromfile(column_path(directory, name, dtype), dtype=dtype, count=rows - skip,
+                               offset=skip * dtype.itemsize)
+                   for name, dtype in COLUMNS)
+        if start is not None or end is not None:
+            keep = np.ones(len(ts), dtype=bool)
+            if start is not None:
+                keep &= ts >= start
+            if end is not None:
+                keep &= ts < end
+            ts, kwh = ts[keep], kwh[keep]
+        return ts, kwh
+
+    def households(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in sorted(os.listdir(self.root)):
+            for name in sorted(os.listdir(os.path.join(self.root, shard))):
+                yield urllib.parse.unquote(name)
+
+
+class ColumnBuffer:
+    """Preallocated ts/kwh columns that flush to a store when full."""
+
+    def __init__(self, flush, capacity=BUFFER_ROWS):
+        self.ts = np.empty(capacity, COLUMNS[0][1])
+        self.kwh = np.empty(capacity, COLUMNS[1][1])
+        self.size = 0
+        self._flush = flush
+
+    def extend(self, ts, kwh):
+        done = 0
+        while done < len(ts):
+            take = min(len(ts) - done, len(self.ts) - self.size)
+            self.ts[self.size:self.size + take] = ts[done:done + take]
+            self.kwh[self.size:self.size + take] = kwh[done:done + take]
+            self.size += take
+            done += take
+            if self.size == len(self.ts):
+                self.flush()
+
+    def flush(self):
+        if self.size:
+            self._flush(self.ts[:self.size], self.kwh[:self.size])
+            self.size = 0
+
+
+# -------------------- Parsing --------------------
+def parse_timestamps(values):
+    """Epoch seconds from numbers or ISO 8601 strings (UTC, optional Z).
+
+    Raises ValueError for NaN, infinities, NaT or times outside TS_RANGE.
+    """
+    try:
+        seconds = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        text = [str(value).rstrip("Zz") for value in values]
+        # NaT becomes the minimum int64 and fails the range check
+        seconds = np.asarray(text, dtype="datetime64[s]").astype(np.int64)
+    low, high = TS_RANGE
+    valid = np.isfinite(seconds) & (seconds >= low) & (seconds < high)
+    if not valid.all():
+        bad = values[int(np.argmin(valid))]
+        raise ValueError(f"timestamp {bad!r} is not a time between 1970 and 2200")
+    return seconds.astype(np.int64)
+
+
+def _columns(ts, kwh):
+    ts = parse_timestamps(ts)
+    kwh = np.asarray(kwh, dtype=np.float64)
+    if not np.isfinite(kwh).all():
+        raise ValueError("kwh values must be finite numbers")
+    return ts, kwh
+
+
+def parse_ndjson(lines):
+    try:
+        records = json.loads(b"[" + b",".join(lines) + b"]")
+    except ValueError:
+        # Find the offending line for the error message
+        for number, line in enumerate(lines, 1):
+            try:
+                json.loads(line)
+            except ValueError as exc:
+                raise ValueError(f"line {number} of the chunk is not JSON: {exc}") from None
+        raise
+    if not records:
+        return _columns([], [])
+    field = TIMESTAMP_FIELDS[0]
+    try:
+        field = next((name for name in TIMESTAMP_FIELDS if name in records[0]), field)
+        return _columns([record[field] for record in records], [record[ENERGY_FIELD] for record in records])
+    except (KeyError, TypeError) as exc:
+        raise ValueError(f"every record needs '{field}' and '{ENERGY_FIELD}' fields ({exc})") from None
+
+
+def csv_header(line):
+    """Column positions of (timestamp, kwh) in a CSV header line."""
+    names = [name.strip().lower() for name in line.decode("utf-8-sig").split(",")]
+    ts_index = next((names.index(name) for name in TIMESTAMP_FIELDS if name in names), None)
+    if ts_index is None or ENERGY_FIELD not in names:
+        raise ValueError(f"CSV header needs a timestamp column ({', '.join(TIMESTAMP_FIELDS)}) and '{ENERGY_FIELD}'")
+    return ts_index, names.index(ENERGY_FIELD)
+
+
+def parse_csv(lines, header):
+    ts_index, kwh_index = header
+    try:
+        rows = [line.decode().split(",") for line in lines]
+        return _columns([row[ts_index] for row in rows], [row[kwh_index] for row in rows])
+    except IndexError:
+        raise ValueError("a row has fewer columns than the header") from None
+
+
+def chunked_lines(stream, chunk_size=CHUNK_SIZE, max_line=MAX_LINE):
+    """Lists of complete, non-blank lines, one list per chunk read.
+
+    Raises ValueError for a line longer than max_line bytes, before more
+    than chunk_size of it is buffered past that.
+    """
+    tail = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        if len(tail) > max_line or max(map(len, lines), default=0) > max_line:
+            raise ValueError(f"a line is longer than {max_line} bytes")
+        lines = [line.rstrip(b"\r") for line in lines if line.strip()]
+        if lines:
+            yield lines
+    if tail.strip():
+        yield [tail.rstrip(b"\r")]
+
+
+def ingest(stream, store, household, fmt="ndjson", chunk_size=CHUNK_SIZE, buffer_rows=BUFFER_ROWS,
+           on_flush=None):
+    """Stream readings from a binary file-like object into the store.
+
+    on_flush(ts, kwh), if given, sees every block right after it is stored
+    (the anomaly detector hooks in here). Returns {"rows", "stored_rows",
+    "first_ts", "last_ts", "last_kwh"}.
+    Raises IngestError on malformed input; rows from earlier chunks are
+    kept and counted in its accepted attribute.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+    summary = {"rows": 0, "stored_rows": store.rows(household),
+               "first_ts": None, "last_ts": None, "last_kwh": None}
+    stored = {"rows": 0}
+
+    def flush(ts, kwh):
+        summary["stored_rows"] = store.append(household, ts, kwh)
+        stored["rows"] += len(ts)
+        if on_flush is not None:
+            on_flush(ts, kwh)
+
+    buffer = ColumnBuffer(flush, buffer_rows)
+    header = None
+    try:
+        for lines in chunked_lines(stream, chunk_size):
+            if fmt == "csv":
+                if header is None:
+                    header = csv_header(lines[0])
+                    lines = lines[1:]
+                ts, kwh = parse_csv(lines, header)
+            else:
+                ts, kwh = parse_ndjson(lines)
+            if not len(ts):
+                continue
+            buffer.extend(ts, kwh)
+            if summary["first_ts"] is None:
+                summary["first_ts"] = int(ts[0])
+            summary["last_ts"], summary["last_kwh"] = int(ts[-1]), float(kwh[-1])
+            summary["rows"] += len(ts)
+    except ValueError as exc:
+        buffer.flush()
+        raise IngestError(f"{exc} (after {summary['rows']} rows)", stored["rows"]) from None
+    buffer.flush()
+    return summary
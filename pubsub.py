@@ -0,0 +1,181 @@
+"""Publish/subscribe for live dashboard updates, across worker processes.
+
+A Broker fans events out to this process's subscribers by topic (the Flask
+app uses the household id). Every subscriber has its own bounded queue and
+publishing never blocks: when a slow client's queue is full its backlog is
+dropped and it is told to resync, i.e. to reload the whole state it shows
+instead of applying deltas it has missed.
+
+An EventBus puts the storage's event log in front of the Broker, so a
+change handled by any worker reaches streams held by every other one:
+publish() appends to the log, and one poller per process reads whatever is
+new every POLL_INTERVAL and hands it to the local Broker. Idle streams
+cost nothing; the poll is a single indexed query per process, however many
+streams are open. Event ids are the log's, so they agree between workers.
+
+Waiting uses threading primitives only, so under gunicorn's gevent worker
+(which monkeypatches threading and time.sleep) an idle subscriber and the
+poller are parked greenlets, not OS threads.
+"""
+import collections
+import itertools
+import json
+import logging
+import threading
+import time
+
+QUEUE_SIZE = 64
+# How often each process looks for events published by the others, and
+# how many it takes at a time
+POLL_INTERVAL = 0.25
+POLL_BATCH = 1000
+
+log = logging.getLogger(__name__)
+
+# Delivered in place of the events a full queue had to drop
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    def __init__(self, broker, topic, maxsize=QUEUE_SIZE):
+        self.topic = topic
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._broker = broker
+        self._events = collections.deque()
+        self._ready = threading.Condition(threading.Lock())
+
+    def put(self, event_id, event):
+        with self._ready:
+            if self.closed:
+                return
+            if len(self._events) >= self.maxsize:
+                # Everything queued is stale once the client resyncs
+                self.dropped += len(self._events)
+                self._events.clear()
+                self._events.append((event_id, RESYNC))
+            self._events.append((event_id, event))
+            self._ready.notify()
+
+    def get(self, timeout=None):
+        """Next (id, event), or None on timeout or once closed."""
+        with self._ready:
+            if not self._events and not self.closed:
+                self._ready.wait(timeout)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        with self._ready:
+            self.closed = True
+            self._events.clear()
+            self._ready.notify_all()
+        self._broker.unsubscribe(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    def __init__(self, queue_size=QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, topic):
+        subscription = Subscription(self, topic, self.queue_size)
+        with self._lock:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[subscription.topic]
+
+    def publish(self, topic, event, event_id=None):
+        """Queue event for every subscriber of topic; returns how many."""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+            if event_id is None:
+                event_id = next(self._ids)
+        for subscription in subscribers:
+            subscription.put(event_id, event)
+        return len(subscribers)
+
+    def resync(self):
+        """Tell every subscriber to reload, after events were lost."""
+        with self._lock:
+            subscribers = [s for subscribers in self._topics.values() for s in subscribers]
+        for subscription in subscribers:
+            subscription.put(None, RESYNC)
+
+    def subscriber_count(self, topic=None):
+        with self._lock:
+            if topic is not None:
+                return len(self._topics.get(topic, ()))
+            return sum(len(subscribers) for subscribers in self._topics.values())
+
+
+class EventBus:
+    """Broker fed from a storage event log shared by all worker processes."""
+
+    def __init__(self, storage, broker=None, interval=POLL_INTERVAL, batch=POLL_BATCH):
+        self.storage = storage
+        self.broker = broker or Broker()
+        self.interval = interval
+        self.batch = batch
+        self.last_id = None
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def publish(self, topic, event):
+        """Append event to the shared log; returns its id."""
+        return self.storage.append_event(topic, json.dumps(event))
+
+    def subscribe(self, topic):
+        self._start()
+        return self.broker.subscribe(topic)
+
+    def subscriber_count(self, topic=None):
+        return self.broker.subscriber_count(topic)
+
+    def _start(self):
+        # The poller only runs in processes that hold streams
+        with self._lock:
+            if self._poller is None:
+                self.last_id = self.storage.last_event_id()
+                self._poller = threading.Thread(target=self._run, name="event-bus", daemon=True)
+                self._poller.start()
+
+    def poll(self):
+        """Hand events newer than last_id to the Broker; returns how many were read."""
+        rows = self.storage.events_after(self.last_id, self.batch)
+        # A gap means the log was trimmed past us: deltas were lost
+        if rows and rows[0][0] > self.last_id + 1:
+            self.broker.resync()
+        for event_id, topic, payload in rows:
+            if self.broker.subscriber_count(topic):
+                self.broker.publish(topic, json.loads(payload), event_id)
+        if rows:
+            self.last_id = rows[-1][0]
+        return len(rows)
+
+    def _run(self):
+        while True:
+            try:
+                full = self.poll() == self.batch
+            except Exception:
+                log.exception("Polling the event log failed")
+                full = False
+            if not full:
+                time.sleep(self.interval)
@@ -0,0 +1,102 @@
+"""Content-addressed LRU cache for analysis results and report text.
+
+Entries are keyed by state_key(): a SHA-256 over the appliance/hours state
+plus whatever tariff parameters the result depends on. The same inventory
+always maps to the same key, so revisiting a page after no changes is a
+dictionary lookup. The cache is bounded by an approximate byte size and
+evicts least-recently-used entries first; hits, misses and evictions are
+counted for diagnostics.
+"""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+
+def state_key(appliances, **params):
+    """Stable hash of an {appliance: hours} mapping and keyword parameters.
+
+    Insertion order is part of the key, since reports and charts list
+    appliances in that order.
+    """
+    payload = json.dumps(
+        {"appliances": list(appliances.items()), "params": params},
+        sort_keys=True, default=str, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def approximate_size(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    nbytes = getattr(value, "nbytes", None)  # NumPy arrays
+    return nbytes if nbytes is not None else sys.getsizeof(value)
+
+
+class RenderCache:
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind, key, default=None):
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end((kind, key))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, kind, key, value):
+        size = approximate_size(value)
+        with self._lock:
+            old = self._entries.pop((kind, key), None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            if size > self.max_bytes:
+                return value  # too big to ever fit; don't flush everything else
+            self._entries[(kind, key)] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def get_or_compute(self, kind, key, compute):
+        missing = object()
+        value = self.get(kind, key, missing)
+        if value is missing:
+            value = self.put(kind, key, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
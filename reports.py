@@ -0,0 +1,271 @@
+"""Headless report pipeline: usage report, cost breakdown and chart per household.
+
+A ReportWriter renders one household to a UTF-8 text report and a PDF (fpdf)
+with the analysis chart drawn on the Agg backend. It keeps one persistent
+AnalysisChart and a small LRU of rendered chart images, so identical inventories are
+only drawn once per process.
+
+generate_reports() runs a whole billing run: households are read lazily
+(e.g. from read_households() over a JSONL file), grouped into chunks and
+fanned out over a ProcessPoolExecutor with a bounded number of chunks in
+flight. Workers write their files straight to disk and send back a one-line
+summary, which is streamed into manifest.csv, so memory stays flat however
+many households there are.
+
+    python reports.py households.jsonl --out reports/ --workers 8
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from catalog import DEFAULT_PATH as CATALOG_PATH
+from catalog import ApplianceCatalog
+from core import breakdown_text, cost_breakdown, usage_report_text, usage_trend
+from render_cache import state_key
+from tariff import DEFAULT_PATH as TARIFF_PATH
+from tariff import Tariff
+
+MANIFEST_FIELDS = ["household", "appliances", "daily_kwh", "monthly_bill", "txt", "pdf", "error"]
+
+
+def pdf_safe(text):
+    """The built-in PDF fonts are Latin-1 only: spell out the rupee, drop emoji."""
+    text = text.replace("₹", "Rs. ")
+    return text.encode("latin-1", "ignore").decode("latin-1")
+
+
+def safe_filename(household):
+    """Readable file stem for a household id, unique per id.
+
+    Ids that clean up to the same text ("a/b" and "a_b") keep apart by a
+    short hash of the id itself.
+    """
+    digest = hashlib.sha1(str(household).encode()).hexdigest()[:8]
+    return f"{re.sub(r'[^A-Za-z0-9_.-]', '_', str(household))[:100]}-{digest}"
+
+
+def report_paths(out_dir, household):
+    """out_dir/<2-char shard>/<household>-<hash>.{txt,pdf}; keeps directories small."""
+    shard = hashlib.sha1(str(household).encode()).hexdigest()[:2]
+    stem = os.path.join(out_dir, shard, safe_filename(household))
+    return stem + ".txt", stem + ".pdf"
+
+
+class ReportWriter:
+    def __init__(self, tariff=None, catalog=None, charts=True, chart_cache_size=256, dpi=72, chart_root=None):
+        self.tariff = tariff or Tariff.from_file()
+        self.catalog = catalog or ApplianceCatalog.from_file()
+        self.charts = charts
+        self.dpi = dpi
+        self.chart_cache_size = chart_cache_size
+        self._chart = None
+        self._chart_files = OrderedDict()
+        self._chart_dir = tempfile.mkdtemp(prefix="energy-charts-", dir=chart_root) if charts else None
+
+    def close(self):
+        if self._chart_dir:
+            shutil.rmtree(self._chart_dir, ignore_errors=True)
+            self._chart_dir = None
+
+    def chart_image(self, breakdown):
+        """Image path of the analysis chart for this breakdown, rendered at most once."""
+        key = state_key(dict(zip(breakdown["appliances"], breakdown["hours"])),
+                        tariff=self.tariff.fingerprint(), catalog=self.catalog.fingerprint())
+        path = self._chart_files.get(key)
+        if path is not None:
+            self._chart_files.move_to_end(key)
+            return path
+
+        if self._chart is None:
+            from chart_manager import AnalysisChart, offscreen_canvas_factory
+            self._chart = AnalysisChart(offscreen_canvas_factory, figsize=(7, 7))
+            # Tight layout re-measures every label on each save; the page size
+            # is fixed, so fixed margins are enough and about a third faster
+            self._chart.figure.set_layout_engine("none")
+            self._chart.figure.subplots_adjust(left=0.12, right=0.97, bottom=0.08, top=0.9, hspace=0.8)
+        hours, costs = breakdown["hours"], breakdown["costs"]
+        self._chart.update(breakdown["appliances"], hours, costs, usage_trend(hours, costs, points=2))
+
+        # JPEG: fpdf embeds it as-is, while PNGs with alpha are re-encoded row by row
+        path = os.path.join(self._chart_dir, f"{key[:32]}.jpg")
+        self._chart.figure.savefig(path, dpi=self.dpi, pil_kwargs={"quality": 85})
+        self._chart_files[key] = path
+        while len(self._chart_files) > self.chart_cache_size:
+            _, evicted = self._chart_files.popitem(last=False)
+            os.remove(evicted)
+        return path
+
+    def render_pdf(self, household, usage_text, breakdown, path):
+        from fpdf import FPDF
+
+        pdf = FPDF()
+        pdf.set_auto_page_break(True, margin=15)
+        pdf.add_page()
+        pdf.set_font("Helvetica", "B", 16)
+        pdf.cell(0, 10, pdf_safe(f"Energy Report - {household}"), 0, 1, "C")
+        pdf.set_font("Helvetica", "", 11)
+        for text in (usage_text, breakdown_text(breakdown, self.tariff.currency)):
+            pdf.multi_cell(0, 6, pdf_safe(text).strip())
+            pdf.ln(4)
+        if self.charts and breakdown["appliances"]:
+            pdf.add_page()
+            pdf.image(self.chart_image(breakdown), x=15, y=15, w=180)
+        pdf.output(path)
+
+    def write(self, household, appliances, txt_path=None, pdf_path=None):
+        """Write one household's report files; returns a manifest row."""
+        usage_text = usage_report_text(appliances)
+        breakdown = cost_breakdown(appliances, self.tariff, self.catalog)
+        if txt_path:
+            os.makedirs(os.path.dirname(txt_path) or ".", exist_ok=True)
+            with open(txt_path, "w", encoding="utf-8") as f:
+                f.write(usage_text)
+                f.write("\n")
+                f.write(breakdown_text(breakdown, self.tariff.currency))
+        if pdf_path:
+            os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+            self.render_pdf(household, usage_text, breakdown, pdf_path)
+        return {
+            "household": household,
+            "appliances": len(breakdown["appliances"]),
+            "daily_kwh": round(breakdown["daily_kwh"], 3),
+            "monthly_bill": round(breakdown["monthly_bill"], 2),
+            "txt": txt_path or "",
+            "pdf": pdf_path or "",
+            "error": "",
+        }
+
+
+# -------------------- Batch runs --------------------
+_writer = None
+
+
+def _init_worker(tariff_path, catalog_path, charts, chart_root):
+    global _writer
+    _writer = ReportWriter(Tariff.from_file(tariff_path), ApplianceCatalog.from_file(catalog_path), charts,
+                           chart_root=chart_root)
+
+
+def _write_chunk(chunk, out_dir, formats):
+    rows = []
+    for household, appliances in chunk:
+        txt_path, pdf_path = report_paths(out_dir, household)
+        try:
+            rows.append(_writer.write(household, appliances,
+                                      txt_path if "txt" in formats else None,
+                                      pdf_path if "pdf" in formats else None))
+        except Exception as error:  # one bad household must not sink the run
+            rows.append({"household": household, "error": f"{type(error).__name__}: {error}"})
+    return rows
+
+
+def read_households(path):
+    """Yield (household, {appliance: hours}) from a JSONL file, one line at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                yield record["household"], record["appliances"]
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def generate_reports(households, out_dir, workers=None, formats=("txt", "pdf"), charts=True,
+                     chunk_size=32, max_in_flight=None, tariff_path=TARIFF_PATH,
+                     catalog_path=CATALOG_PATH, on_progress=None):
+    """Write reports for an iterable of (household, appliances) pairs.
+
+    workers=0 renders in this process (no pool). Returns run statistics;
+    per-household results are in out_dir/manifest.csv. Chart images go in
+    a scratch directory that is removed once the run is over; pool workers
+    exit without running cleanup code, so this process removes it.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    max_in_flight = max_in_flight or max(2 * workers, 1)
+    stats = {"households": 0, "errors": 0, "seconds": 0.0}
+    started = time.perf_counter()
+
+    with open(os.path.join(out_dir, "manifest.csv"), "w", newline="", encoding="utf-8") as manifest_file:
+        manifest = csv.DictWriter(manifest_file, MANIFEST_FIELDS)
+        manifest.writeheader()
+
+        def record(rows):
+            for row in rows:
+                manifest.writerow(row)
+                stats["households"] += 1
+                stats["errors"] += bool(row.get("error"))
+            if on_progress:
+                on_progress(stats["households"])
+
+        chunks = chunked(households, chunk_size)
+        chart_root = tempfile.mkdtemp(prefix="energy-charts-") if charts else None
+        try:
+            if workers == 0:
+                _init_worker(tariff_path, catalog_path, charts, chart_root)
+                try:
+                    for chunk in chunks:
+                        record(_write_chunk(chunk, out_dir, formats))
+                finally:
+                    _writer.close()
+            else:
+                _run_pool(chunks, out_dir, formats, workers, max_in_flight, record,
+                          (tariff_path, catalog_path, charts, chart_root))
+        finally:
+            if chart_root:
+                shutil.rmtree(chart_root, ignore_errors=True)
+
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def _run_pool(chunks, out_dir, formats, workers, max_in_flight, record, initargs):
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=initargs) as pool:
+        in_flight = set()
+        for chunk in chunks:
+            # Never read further ahead than the pool can take
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    record(future.result())
+            in_flight.add(pool.submit(_write_chunk, chunk, out_dir, formats))
+        for future in in_flight:
+            record(future.result())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write usage reports for a batch of households.")
+    parser.add_argument("households", help="JSONL file of {\"household\": id, \"appliances\": {name: hours}}")
+    parser.add_argument("--out", default="reports")
+    parser.add_argument("--workers", type=int, default=None, help="processes (0 = run in this process)")
+    parser.add_argument("--formats", default="txt,pdf")
+    parser.add_argument("--no-charts", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=32)
+    args = parser.parse_args(argv)
+
+    stats = generate_reports(read_households(args.households), args.out, workers=args.workers,
+                             formats=tuple(args.formats.split(",")), charts=not args.no_charts,
+                             chunk_size=args.chunk_size)
+    print(json.dumps(stats), file=sys.stderr)
+    return 1 if stats["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""What-if savings for every appliance over a whole grid of scenarios at once.
+
+A scenario changes one appliance: use it fewer hours (REDUCTIONS), swap it
+for a more efficient model (SUBSTITUTIONS, as a share of its current
+draw) and/or run it in the cheapest hours scheduler.py finds for it
+(SHIFTS, the share of its runtime moved). A shortened runtime is scheduled
+afresh, so the cheapest hours depend on the reduction too. For A
+appliances that is an (A, reductions, substitutions, shifts) grid, priced
+in one broadcast pass through the tariff's time-of-use bill
+
+    bill = (energy charge(kWh) * sum(kWh_j * price_j) / kWh + fixed) * (1 + tax)
+
+where price_j is the average hourly multiplier over appliance j's slots.
+Each scenario only moves the household's kWh and price-weighted kWh by
+its own appliance's difference, so the few hundred cells cost about the
+same as pricing one household, slab effects included.
+
+    result = evaluate(["Geyser", "Fan"], [2, 8], tariff, catalog)
+    result["ranked"][0]["label"]
+"""
+import warnings
+
+import numpy as np
+
+from scheduler import appliance_schedules, describe_slots
+
+REDUCTIONS = (0, 1, 2, 3, 4)
+# (label, heatmap label, share of the current in-use draw)
+SUBSTITUTIONS = (
+    ("current model", "", 1.0),
+    ("25% more efficient model", "eff -25%", 0.75),
+    ("50% more efficient model", "eff -50%", 0.5),
+)
+SHIFTS = (0.0, 1.0)
+TOP_SCENARIOS = 10
+# Rows per appliance in the ranked table, so one big load doesn't fill it
+PER_APPLIANCE = 2
+
+
+def evaluate(names, hours, tariff, catalog, reductions=REDUCTIONS, substitutions=SUBSTITUTIONS,
+             shifts=SHIFTS, top=TOP_SCENARIOS, per_appliance=PER_APPLIANCE):
+    """Daily savings of every scenario for parallel appliance names and hours.
+
+    Returns {"grid": (A, reductions, substitutions, shifts) daily savings,
+    NaN where a scenario doesn't apply (cutting more hours than are used,
+    moving an appliance that can't move), "ranked": the best `top`
+    scenarios as dicts, at most per_appliance for each appliance,
+    "heatmap": {"rows", "columns", "values"} with the best shift per
+    reduction and substitution}. Stopping an appliance altogether is in
+    the grid and heatmap but not ranked: it always saves the most and
+    isn't a change anyone asked advice on.
+    """
+    names = list(names)
+    hours = np.asarray(hours, dtype=np.float64)
+    columns = [" + ".join(part for part in (f"-{cut}h" if cut else "", short) if part) or "shift only"
+               for cut in reductions for _, short, _ in substitutions]
+    if not names:
+        return {
+            "grid": np.empty((0, len(reductions), len(substitutions), len(shifts))),
+            "ranked": [],
+            "heatmap": {"rows": [], "columns": columns, "values": np.empty((0, len(columns)))},
+        }
+    index = catalog.indices(names)
+    on_kwh = catalog.on_kwh_per_hour[index]
+    prices = tariff.hourly_multipliers
+    days = tariff.days_per_month
+
+    # Today's schedule, then the current and cheapest one for the hours
+    # left after each reduction: (A, 1 + reductions, 24)
+    left = np.maximum(hours[:, None] - np.r_[0.0, np.asarray(reductions, dtype=np.float64)], 0.0)
+    current, optimized = appliance_schedules(np.repeat(names, left.shape[1]), left.ravel(), tariff, catalog)
+    current, optimized = current.reshape(left.shape + (-1,)), optimized.reshape(left.shape + (-1,))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price_now = np.where(left > 0, current @ prices / left, 1.0)
+        price_moved = np.where(left > 0, optimized @ prices / left, 1.0)
+    price_today = price_now[:, 0]
+    price_now, price_moved, optimized = price_now[:, 1:], price_moved[:, 1:], optimized[:, 1:]
+
+    # Household totals today: kWh and kWh weighted by price
+    in_use = hours * on_kwh
+    standby = catalog.standby_kwh_per_day[index].sum()
+    total = in_use.sum() + standby
+    weighted = in_use @ price_today + standby * prices.mean()
+
+    cut = np.asarray(reductions, dtype=np.float64)[None, :, None, None]
+    share = np.array([factor for _, _, factor in substitutions])[None, None, :, None]
+    moved = np.asarray(shifts, dtype=np.float64)[None, None, None, :]
+    by_appliance = (slice(None), None, None, None)
+    by_reduction = (slice(None), slice(None), None, None)
+
+    new_in_use = np.maximum(hours[by_appliance] - cut, 0.0) * on_kwh[by_appliance] * share
+    new_price = price_now[by_reduction] + moved * (price_moved - price_now)[by_reduction]
+    new_total = total + new_in_use - in_use[by_appliance]
+    new_weighted = weighted + new_in_use * new_price - (in_use * price_today)[by_appliance]
+    savings = (_bill(tariff, total, weighted) - _bill(tariff, new_total, new_weighted)) / days
+
+    # Cutting more than is used, changing or moving what is no longer used,
+    # or moving what has no cheaper hours isn't a scenario
+    savings = np.where((cut > 0) & (cut > hours[by_appliance]), np.nan, savings)
+    savings = np.where((cut >= hours[by_appliance]) & ((share != 1.0) | (moved > 0)), np.nan, savings)
+    savings = np.where((moved > 0) & (price_moved >= price_now)[by_reduction], np.nan, savings)
+    savings[:, 0, 0, 0] = np.nan  # changes nothing
+
+    ranked = []
+    listed = np.zeros(len(names), dtype=int)
+    for flat in np.argsort(np.nan_to_num(-savings.ravel(), nan=np.inf), kind="stable"):
+        row, r, s, f = np.unravel_index(flat, savings.shape)
+        if len(ranked) == top or not savings[row, r, s, f] > 0:
+            break
+        if listed[row] == per_appliance or (reductions[r] and reductions[r] >= hours[row]):
+            continue
+        listed[row] += 1
+        parts = []
+        if reductions[r]:
+            parts.append(f"use {reductions[r]} {'hr' if reductions[r] == 1 else 'hrs'} less")
+        if substitutions[s][2] != 1.0:
+            parts.append(f"switch to a {substitutions[s][0]}")
+        if shifts[f]:
+            parts.append(f"move it to {describe_slots(optimized[row, r])}")
+        ranked.append({
+            "appliance": names[row],
+            "reduce_hours": reductions[r],
+            "substitution": substitutions[s][0],
+            "shift": shifts[f],
+            "daily_savings": float(savings[row, r, s, f]),
+            "monthly_savings": float(savings[row, r, s, f] * days),
+            "label": f"{names[row]}: {', '.join(parts)}",
+        })
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows stay NaN
+        best = np.nanmax(savings, axis=-1).reshape(len(names), -1)
+    return {
+        "grid": savings,
+        "ranked": ranked,
+        "heatmap": {"rows": names, "columns": columns, "values": best},
+    }
+
+
+def _bill(tariff, daily_kwh, weighted_kwh):
+    """Monthly bill from daily kWh and price-weighted daily kWh."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        factor = np.where(daily_kwh > 0, weighted_kwh / daily_kwh, 1.0)
+    return tariff.priced_bill(daily_kwh * tariff.days_per_month, factor)
+
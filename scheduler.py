@@ -0,0 +1,191 @@
+"""Time-of-use load shifting: when to run each appliance to pay least.
+
+A day is 24 one-hour slots. An appliance's current schedule is its daily
+runtime from the catalog's usual_start onwards; it may be moved into its
+shift_windows (and can always stay where it is). The tariff prices slot h
+at hourly_multipliers[h], and since its time-of-use factor is linear in
+the consumption profile for a fixed total, appliances can be scheduled
+independently and the bill difference splits exactly between them:
+
+* splittable runs (a water pump) fill their cheapest allowed slots, a
+  greedy over slots sorted by price, which is optimal for unit-capacity
+  slots;
+* contiguous runs (a wash cycle) take the cheapest allowed start, every
+  start being priced at once with prefix sums over the doubled day.
+
+Both work on (..., catalog) hours arrays, so one household and a batch of
+thousands cost the same few array operations. Ties keep the current slot,
+so an appliance is only moved when that actually saves money.
+
+    plan = shift_plan(["Washing Machine", "Fan"], [2, 8], tariff, catalog)
+"""
+import numpy as np
+
+from tariff import HOURS
+
+SLOTS = 24
+# Preference for the current slot between equally priced ones
+STAY_BONUS = 1e-9
+
+
+def run_profile(hours, start):
+    """(..., 24) share of each slot in use for a run of hours from start."""
+    offset = (HOURS - np.asarray(start)[..., None]) % SLOTS
+    return np.clip(np.asarray(hours, dtype=np.float64)[..., None] - offset, 0.0, 1.0)
+
+
+def usage_profile(names, hours, catalog):
+    """(appliances, 24) kWh in each hour for parallel names and hours, on
+    the current schedule; standby draw is spread over the day."""
+    index = catalog.indices(list(names))
+    hours = np.clip(np.asarray(hours, dtype=np.float64), 0.0, SLOTS)
+    return (run_profile(hours, catalog.usual_start[index]) * catalog.on_kwh_per_hour[index, None]
+            + catalog.standby_kwh_per_day[index, None] / SLOTS)
+
+
+def inventory_profile(hours, catalog, owned=None):
+    """(..., 24) household kWh in each hour for a (..., catalog) hours array."""
+    hours = np.clip(np.asarray(hours, dtype=np.float64), 0.0, SLOTS)
+    owned = (hours > 0) if owned is None else np.asarray(owned, dtype=np.float64)
+    in_use = np.einsum("...ch,c->...h", run_profile(hours, catalog.usual_start), catalog.on_kwh_per_hour)
+    return in_use + (owned @ catalog.standby_kwh_per_day)[..., None] / SLOTS
+
+
+def cheapest_slots(hours, allowed, current, prices):
+    """Fill the cheapest allowed slots with hours of splittable runtime."""
+    key = np.where(allowed, prices - STAY_BONUS * current, np.inf)
+    order = np.argsort(key, axis=-1, kind="stable")
+    capacity = np.take_along_axis(allowed, order, axis=-1).astype(np.float64)
+    before = np.cumsum(capacity, axis=-1) - capacity
+    filled = np.clip(hours[..., None] - before, 0.0, capacity)
+    schedule = np.empty_like(filled)
+    np.put_along_axis(schedule, order, filled, axis=-1)
+    return schedule
+
+
+def cheapest_block(hours, allowed, start, prices):
+    """Cheapest allowed start for runs that have to stay in one piece."""
+    hours = np.minimum(hours, SLOTS)
+    full = np.floor(hours).astype(np.intp)
+    partial = hours - full
+    length = np.ceil(hours).astype(np.intp)
+    starts = HOURS + np.zeros(hours.shape + (1,), dtype=np.intp)
+
+    day = np.concatenate([prices, prices])
+    price_sum = np.concatenate([[0.0], np.cumsum(day)])
+    allowed_sum = np.concatenate([np.zeros(allowed.shape[:-1] + (1,), dtype=np.intp),
+                                  np.cumsum(np.concatenate([allowed, allowed], axis=-1), axis=-1)], axis=-1)
+
+    end = starts + full[..., None]
+    cost = price_sum[end] - price_sum[starts] + partial[..., None] * day[end % (2 * SLOTS)]
+    fits = (np.take_along_axis(allowed_sum, starts + length[..., None], axis=-1)
+            - np.take_along_axis(allowed_sum, starts, axis=-1)) == length[..., None]
+    cost = np.where(fits, cost - STAY_BONUS * (starts == start[..., None]), np.inf)
+    return run_profile(hours, cost.argmin(axis=-1))
+
+
+def kwh_value(tariff, daily_kwh):
+    """Bill per kWh at price multiplier 1 for households using daily_kwh.
+
+    The bill is (energy charge(total) * profile @ prices / total + fixed)
+    * (1 + tax), so moving a kWh saves this times its drop in multiplier.
+    """
+    daily_kwh = np.asarray(daily_kwh, dtype=np.float64)
+    monthly = daily_kwh * tariff.days_per_month
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(monthly > 0, tariff.energy_charge(monthly) * (1 + tariff.tax_rate) / monthly, 0.0)
+
+
+def optimize(hours, tariff, catalog, owned=None):
+    """Cheapest schedule for a (..., catalog) hours-per-day array.
+
+    Returns {"current", "optimized"} (..., catalog, 24) slot usage and
+    {"daily_savings"} (..., catalog) per day, plus "total_savings" (...),
+    which is exactly the drop in the time-of-use bill.
+    """
+    hours = np.clip(np.asarray(hours, dtype=np.float64), 0.0, SLOTS)
+    owned = (hours > 0) if owned is None else np.asarray(owned, dtype=bool)
+    prices = tariff.hourly_multipliers
+    start = np.broadcast_to(catalog.usual_start, hours.shape)
+    current = run_profile(hours, start)
+    allowed = catalog.shift_hours | (current > 0)
+
+    # Only appliances with shift windows can move; the rest stay as they are
+    optimized = current.copy()
+    movable = catalog.shift_hours.any(axis=1)
+    block = movable & catalog.contiguous
+    split = movable & ~catalog.contiguous
+    if block.any():
+        optimized[..., block, :] = cheapest_block(hours[..., block], allowed[..., block, :], start[..., block], prices)
+    if split.any():
+        optimized[..., split, :] = cheapest_slots(hours[..., split], allowed[..., split, :], current[..., split, :],
+                                                  prices)
+
+    price_drop = ((current - optimized) * catalog.on_kwh_per_hour[:, None]) @ prices
+    daily_savings = kwh_value(tariff, catalog.inventory_kwh(hours, owned))[..., None] * price_drop
+    return {
+        "current": current,
+        "optimized": optimized,
+        "daily_savings": daily_savings,
+        "total_savings": daily_savings.sum(axis=-1),
+    }
+
+
+def describe_slots(usage):
+    """'22:00-00:30, 06:00-07:00' for a 24-slot usage row."""
+    ranges = []
+    hour = 0
+    while hour < SLOTS:
+        if usage[hour] <= 0:
+            hour += 1
+            continue
+        start = hour
+        while hour < SLOTS and usage[hour] >= 1:
+            hour += 1
+        end = hour + usage[hour] if hour < SLOTS else float(hour)
+        hour += 1
+        ranges.append((start, end))
+    # A run through midnight reads as one range
+    if len(ranges) > 1 and ranges[0][0] == 0 and ranges[-1][1] == SLOTS:
+        ranges[0] = (ranges.pop()[0], ranges[0][1])
+    if ranges == [(0, SLOTS)]:
+        return "all day"
+    return ", ".join(f"{_clock(start)}-{_clock(end)}" for start, end in ranges)
+
+
+def _clock(hour):
+    minutes = int(round(hour * 60)) % (SLOTS * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def appliance_schedules(names, hours, tariff, catalog):
+    """(current, optimized) (appliances, 24) slot usage for parallel names and hours."""
+    index = catalog.indices(list(names))
+    dense = np.zeros((len(names), len(catalog)))
+    rows = np.arange(len(names))
+    dense[rows, index] = np.asarray(hours, dtype=np.float64)
+    # One row per appliance keeps duplicates of a catalog type apart
+    result = optimize(dense, tariff, catalog)
+    return result["current"][rows, index], result["optimized"][rows, index]
+
+
+def shift_plan(names, hours, tariff, catalog):
+    """Moves worth making for parallel appliance names and hours per day.
+
+    A list of {"appliance", "hours", "current", "optimized", "daily_savings"}
+    (schedules as readable hour ranges), largest saving first; appliances
+    that are already in their cheapest slots are left out.
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    current, optimized = appliance_schedules(names, hours, tariff, catalog)
+    on_kwh = catalog.on_kwh_per_hour[catalog.indices(list(names))]
+    # The household's total sets the price of each kWh
+    per_kwh = kwh_value(tariff, catalog.daily_kwh(names, hours).sum())
+    savings = per_kwh * ((current - optimized) * on_kwh[:, None]) @ tariff.hourly_multipliers
+    plan = [
+        {"appliance": name, "hours": float(hour), "current": describe_slots(now), "optimized": describe_slots(best),
+         "daily_savings": float(saving)}
+        for name, hour, now, best, saving in zip(names, hours, current, optimized, savings)
+        if saving > STAY_BONUS
+    ]
+    return sorted(plan, key=lambda move: move["daily_savings"], reverse=True)
@@ -1,17 +1,55 @@
+import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, PhotoImage
+from tkinter import ttk, messagebox, filedialog, PhotoImage
 import numpy as np
-from sklearn.linear_model import LinearRegression
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import pandas as pd
+import core
+from forecasting import forecast
+from lazy_imports import lazy_import, warm_up
+from splash_cache import gradient_image_path
+from chart_manager import AnalysisChart, ScenarioHeatmap, UsageChart, tk_canvas_factory
+from task_executor import TaskExecutor
+from render_cache import RenderCache, state_key
+from knowledge_base import KnowledgeBase
+from tariff import Tariff
+from catalog import ApplianceCatalog
+from inventory import ApplianceInventory
+from virtual_list import VirtualList
+from reports import ReportWriter
+from meter_store import MeterStore, ingest
+from anomaly import PRIME_READINGS, AnomalyDetector, describe
+from disaggregation import estimate_household, estimated_hours
+
+# Only the Analysis and ML Report pages need these; they are imported on
+# first use, or earlier by the warm-up thread started behind the splash.
+# Charts use matplotlib.figure directly (see chart_manager), never pyplot.
+HEAVY_MODULES = [
+    lazy_import("matplotlib.figure"),
+    lazy_import("matplotlib.backends.backend_tkagg"),
+]
 
 class EnergyBillPredictor:
-    def __init__(self):
+    def __init__(self, prebuild_pages=False, render_cache_bytes=32 * 1024 * 1024):
+        # perf_counter() timestamps of startup milestones (see benchmarks/bench_startup.py)
+        self.startup_marks = {"init": time.perf_counter()}
         self.root = tk.Tk()
+        self.root.bind("<Map>", self.mark_first_window, add="+")
         self.root.title("Energy Bill Predictor")
         self.root.geometry("1024x700")
         self.root.configure(bg="#F0F8FF")
+        # Data and model work for the analysis pages runs off the Tk thread
+        self.tasks = TaskExecutor(self.root)
+        # Analysis results and report text keyed by the appliance state
+        self.render_cache = RenderCache(render_cache_bytes)
+        # Every cost figure comes from the tariff in data/tariff.json
+        self.tariff = Tariff.from_file()
+        self.catalog = ApplianceCatalog.from_file()
+        # Chatbot FAQ index, loaded once from data/faq.json
+        self.knowledge_base = KnowledgeBase.from_file()
+        # Imported smart-meter readings, scored for unusual consumption
+        self.meters = MeterStore()
+        self.detector = AnomalyDetector()
+        self.meter_id = "My Home"
         # Initialize themes
         self.LIGHT_THEME = {
             "PRIMARY_COLOR": "#2E86C1",
@@ -26,8 +64,30 @@ class EnergyBillPredictor:
         }
         
         self.current_theme = self.LIGHT_THEME
+        
+        # Appliance list orderings: label -> (sort key, reverse)
+        self.APPLIANCE_SORTS = {
+            "Order added": (None, False),
+            "Name": (lambda app, hrs: app.lower(), False),
+            "Most hours": (lambda app, hrs: hrs, True),
+        }
         self.frames = {}
-        self.user_appliances = {}
+        # {appliance: hours} with running totals and a ranking by hours
+        self.user_appliances = ApplianceInventory(self.catalog)
+        self.current_page = None
+        
+        # Pages are built the first time show_frame switches to them;
+        # with prebuild_pages the rest are built one per idle callback.
+        self.prebuild_pages = prebuild_pages
+        self.page_builders = {
+            "home": self.create_home_page,
+            "add_appliance": self.create_add_appliance_page,
+            "predict": self.create_predict_page,
+            "chatbot": self.create_chatbot_page,
+            "report": self.create_report_page,
+            "analysis": self.create_analysis_page,
+            "mlreport": self.create_mlreport_page,
+        }
         
         # Initialize menu buttons
         self.menu_buttons = [
@@ -40,24 +100,18 @@ class EnergyBillPredictor:
             ("📉 ML Report", "mlreport")
         ]
         
+        # Import the plotting stack in the background while the splash shows
+        self.warm_up_thread = warm_up(HEAVY_MODULES)
+        
         # Start with splash screen
         self.show_splash_screen()
         
-    def gradient_color(self, color1, color2, ratio):
-        r1 = int(color1[1:3], 16)
-        g1 = int(color1[3:5], 16)
-        b1 = int(color1[5:7], 16)
+    def mark_first_window(self, event=None):
+        self.startup_marks.setdefault("first_window", time.perf_counter())
         
-        r2 = int(color2[1:3], 16)
-        g2 = int(color2[3:5], 16)
-        b2 = int(color2[5:7], 16)
+    def mark_interactive(self):
+        self.startup_marks.setdefault("interactive", time.perf_counter())
         
-        r = int(r1 * (1-ratio) + r2 * ratio)
-        g = int(g1 * (1-ratio) + g2 * ratio)
-        b = int(b1 * (1-ratio) + b2 * ratio)
-        
-        return f'#{r:02x}{g:02x}{b:02x}'
-
     def show_splash_screen(self):
         splash_frame = tk.Frame(self.root, bg=self.current_theme["PRIMARY_COLOR"])
         splash_frame.pack(fill="both", expand=True)
@@ -65,30 +119,32 @@ class EnergyBillPredictor:
         canvas = tk.Canvas(splash_frame, width=1024, height=700, highlightthickness=0)
         canvas.pack(fill="both", expand=True)
         
-        # Create gradient background
-        for i in range(700):
-            color = self.gradient_color(
+        # Gradient background, rendered once and cached on disk per theme
+        try:
+            background = PhotoImage(file=gradient_image_path(
                 self.current_theme["PRIMARY_COLOR"],
                 self.current_theme["SECONDARY_COLOR"],
-                i/700
-            )
-            canvas.create_line(0, i, 1024, i, fill=color)
-        
-        def create_circle(progress):
-            canvas.delete("progress")
-            radius = 50
-            x, y = 512, 450
-            start = 90
-            extent = progress * 360
-            
-            canvas.create_arc(x-radius, y-radius, x+radius, y+radius,
-                            start=start, extent=extent,
-                            fill=self.current_theme["SUCCESS_COLOR"],
-                            tags="progress")
-            
-            canvas.create_text(x, y, text=f"{int(progress * 100)}%",
-                            font=("Helvetica", 16, "bold"),
-                            fill="white", tags="progress")
+                1024, 700
+            ))
+            canvas.create_image(0, 0, image=background, anchor="nw")
+            canvas.background = background
+        except (OSError, tk.TclError):
+            canvas.configure(bg=self.current_theme["PRIMARY_COLOR"])
+        
+        # Progress ring, created once and updated in place
+        radius = 50
+        x, y = 512, 450
+        progress_arc = canvas.create_arc(x-radius, y-radius, x+radius, y+radius,
+                                         start=90, extent=0,
+                                         fill=self.current_theme["SUCCESS_COLOR"])
+        progress_text = canvas.create_text(x, y, text="0%",
+                                           font=("Helvetica", 16, "bold"),
+                                           fill="white")
+        
+        def set_progress(progress):
+            # A full 360 degree extent draws nothing, so stop just short of it
+            canvas.itemconfigure(progress_arc, extent=min(progress * 360, 359.9))
+            canvas.itemconfigure(progress_text, text=f"{int(progress * 100)}%")
         
         # Try to load logo
         try:
@@ -109,20 +165,34 @@ class EnergyBillPredictor:
                           font=("Helvetica", 36, "bold"),
                           fill="#FFFFFF", anchor="center")
         
-        canvas.create_text(512, 550, text="Loading...",
-                          font=("Helvetica", 14),
-                          fill="#FFFFFF", anchor="center")
-        
-        def update_progress(step=0):
-            if step <= 100:
-                progress = step / 100
-                create_circle(progress)
-                self.root.after(30, lambda: update_progress(step + 2))
+        status_text = canvas.create_text(512, 550, text="Loading...",
+                                         font=("Helvetica", 14),
+                                         fill="#FFFFFF", anchor="center")
+        
+        # Progress follows the real work: UI tasks run here one per tick,
+        # the plotting imports finish on the warm-up thread.
+        ui_tasks = [("Building home page", self.initialize_main_content)]
+        total = len(ui_tasks) + len(HEAVY_MODULES)
+        
+        def update_progress():
+            if ui_tasks:
+                label, task = ui_tasks.pop(0)
+                canvas.itemconfigure(status_text, text=f"{label}...")
+                canvas.update_idletasks()
+                task()
+            elif self.warm_up_thread.is_alive():
+                canvas.itemconfigure(status_text, text="Loading analysis tools...")
+            
+            done = total - len(ui_tasks) - sum(not module.loaded for module in HEAVY_MODULES)
+            set_progress(done / total)
+            
+            if ui_tasks or self.warm_up_thread.is_alive():
+                self.root.after(30, update_progress)
             else:
                 splash_frame.destroy()
-                self.initialize_main_content()
+                self.root.after_idle(self.mark_interactive)
         
-        update_progress()
+        self.root.after(0, update_progress)
         self.root.update()
 
     def create_scrollable_frame(self, parent):
@@ -146,23 +216,27 @@ class EnergyBillPredictor:
         return scrollable_frame
 
     def initialize_main_content(self):
-        # Create frames
-        for _, frame_name in self.menu_buttons:
+        # One navigation bar shared by every page
+        self.create_navigation_bar(self.root)
+
+        # Show home page; the others are built on first visit
+        self.show_frame('home')
+        if self.prebuild_pages:
+            self.root.after_idle(self.prebuild_next_page)
+
+    def ensure_page(self, frame_name):
+        if frame_name not in self.frames:
             frame = ttk.Frame(self.root)
             scrollable_frame = self.create_scrollable_frame(frame)
             self.frames[frame_name] = (frame, scrollable_frame)
+            self.page_builders[frame_name]()
+        return self.frames[frame_name]
 
-        # Create pages
-        self.create_home_page()
-        self.create_add_appliance_page()
-        self.create_predict_page()
-        self.create_chatbot_page()
-        self.create_report_page()
-        self.create_analysis_page()
-        self.create_mlreport_page()
-
-        # Show home page
-        self.show_frame('home')
+    def prebuild_next_page(self):
+        pending = [name for name in self.page_builders if name not in self.frames]
+        if pending:
+            self.ensure_page(pending[0])
+            self.root.after_idle(self.prebuild_next_page)
 
     def create_navigation_bar(self, parent):
         nav_bar = tk.Frame(parent, bg=self.current_theme["PRIMARY_COLOR"], height=60)
@@ -183,17 +257,19 @@ class EnergyBillPredictor:
             btn.pack(side="left", padx=5, pady=5)
 
     def show_frame(self, frame_name):
-        # Hide all frames
-        for frame, _ in self.frames.values():
+        selected, _ = self.ensure_page(frame_name)
+        
+        # Hide the page currently shown
+        if self.current_page and self.current_page != frame_name:
+            frame, _ = self.frames[self.current_page]
             frame.pack_forget()
         
         # Show selected frame
-        frame, _ = self.frames[frame_name]
-        frame.pack(fill="both", expand=True)
+        selected.pack(fill="both", expand=True)
+        self.current_page = frame_name
 
     def create_home_page(self):
         frame, scrollable_frame = self.frames['home']
-        self.create_navigation_bar(frame)
         
         ttk.Label(scrollable_frame,
                  text="Welcome to Energy Bill Predictor",
@@ -209,7 +285,6 @@ class EnergyBillPredictor:
 
     def create_add_appliance_page(self):
         frame, scrollable_frame = self.frames['add_appliance']
-        self.create_navigation_bar(frame)
         
         # Title
         ttk.Label(scrollable_frame,
@@ -228,7 +303,7 @@ class EnergyBillPredictor:
         appliance_menu = ttk.Combobox(
             appliance_frame,
             textvariable=self.appliance_var,
-            values=["Fan", "Air Conditioner", "Refrigerator", "TV", "Washing Machine"],
+            values=self.catalog.names,
             font=("Helvetica", 12),
             state="readonly",
             width=30
@@ -282,15 +357,46 @@ class EnergyBillPredictor:
         )
         remove_button.pack(side="left", padx=5)
         
-        # Listbox to show added appliances
-        self.appliance_listbox = tk.Listbox(
+        # Filter and sort for the appliance list
+        view_frame = ttk.Frame(scrollable_frame)
+        view_frame.pack(pady=(10, 0), padx=20)
+        
+        ttk.Label(view_frame,
+                 text="Filter:",
+                 font=("Helvetica", 12)).pack(side="left", padx=5)
+        
+        self.filter_var = tk.StringVar()
+        ttk.Entry(
+            view_frame,
+            textvariable=self.filter_var,
+            font=("Helvetica", 12),
+            width=20
+        ).pack(side="left", padx=5)
+        
+        self.sort_var = tk.StringVar(value="Order added")
+        ttk.Combobox(
+            view_frame,
+            textvariable=self.sort_var,
+            values=list(self.APPLIANCE_SORTS),
+            font=("Helvetica", 12),
+            state="readonly",
+            width=14
+        ).pack(side="left", padx=5)
+        
+        # Only the rows in view are drawn; rows are keyed by appliance name
+        self.appliance_list = VirtualList(
             scrollable_frame,
+            format_row=lambda app, hrs: f"{app} - {hrs} hrs/day",
             height=8,
+            width=50,
             font=("Helvetica", 12),
-            selectmode="single",
-            width=50
+            select_background=self.current_theme["PRIMARY_COLOR"]
         )
-        self.appliance_listbox.pack(pady=10, padx=20)
+        self.appliance_list.pack(pady=10, padx=20)
+        self.update_appliance_list()
+        self.user_appliances.subscribe(self.on_appliance_changed)
+        self.filter_var.trace_add("write", lambda *args: self.apply_appliance_view())
+        self.sort_var.trace_add("write", lambda *args: self.apply_appliance_view())
         
         # Add some instructions
         instruction_text = """
@@ -318,7 +424,6 @@ class EnergyBillPredictor:
             return
             
         self.user_appliances[appliance] = int(hours)
-        self.update_appliance_list()
         
         # Clear the inputs
         self.appliance_var.set("")
@@ -327,19 +432,28 @@ class EnergyBillPredictor:
         messagebox.showinfo("Success", f"{appliance} added successfully!")
         
     def remove_appliance(self):
-        selection = self.appliance_listbox.curselection()
-        if not selection:
+        appliance = self.appliance_list.selection()
+        if appliance is None:
             messagebox.showerror("Error", "Please select an appliance to remove")
             return
             
-        appliance = self.appliance_listbox.get(selection[0]).split(" - ")[0]
         del self.user_appliances[appliance]
-        self.update_appliance_list()
         
     def update_appliance_list(self):
-        self.appliance_listbox.delete(0, tk.END)
-        for app, hrs in self.user_appliances.items():
-            self.appliance_listbox.insert(tk.END, f"{app} - {hrs} hrs/day")
+        self.appliance_list.reset(self.user_appliances.items())
+        
+    def on_appliance_changed(self, appliance, old_hours, new_hours):
+        # Apply the single change to the list instead of redrawing it
+        if new_hours is None:
+            self.appliance_list.delete(appliance)
+        else:
+            self.appliance_list.set(appliance, new_hours)
+        
+    def apply_appliance_view(self):
+        sort_key, reverse = self.APPLIANCE_SORTS[self.sort_var.get()]
+        text = self.filter_var.get().strip().lower()
+        self.appliance_list.set_view(sort_key, reverse,
+                                     (lambda app, hrs: text in app.lower()) if text else None)
         
     # def create_predict_page(self):
     #     frame, scrollable_frame = self.frames['predict']
@@ -372,7 +486,6 @@ class EnergyBillPredictor:
 
     def create_predict_page(self):
         frame, scrollable_frame = self.frames['predict']
-        self.create_navigation_bar(frame)
         
         # Main container with padding
         main_container = ttk.Frame(scrollable_frame)
@@ -421,9 +534,8 @@ class EnergyBillPredictor:
         def predict_bill():
             try:
                 # Remove currency symbol and convert to float
-                bills = np.array([float(var.get().replace('₹', '')) for var in prev_bill_vars])
-                model = LinearRegression().fit(np.array([1, 2, 3]).reshape(-1, 1), bills)
-                predicted = model.predict(np.array([[4]]))[0]
+                bills = [float(var.get().replace('₹', '')) for var in prev_bill_vars]
+                predicted = forecast(bills, model="trend")
                 result_text.set(f"📊 Predicted Bill: ₹{predicted:,.2f}")
             except ValueError:
                 messagebox.showerror("Input Error", "Please enter valid bill amounts")
@@ -479,7 +591,6 @@ class EnergyBillPredictor:
 
     def create_chatbot_page(self):
         frame, scrollable_frame = self.frames['chatbot']
-        self.create_navigation_bar(frame)
         chatbot_text = tk.Text(scrollable_frame, height=15, width=70, font=("Arial", 12))
         chatbot_text.pack(pady=10)
 
@@ -492,13 +603,10 @@ class EnergyBillPredictor:
 
         # Function to handle chatbot reply
         def chatbot_reply():
-            question = question_var.get().lower()
-            answers = {
-                "how to save energy?": "Turn off unused appliances, use LED bulbs, and limit AC usage.",
-                "why is my bill high?": "Check for high-consumption appliances and reduce their usage.",
-            }
+            question = question_var.get()
+            answer = self.knowledge_base.answer(question, default="I am not sure, please check with your provider.")
             chatbot_text.insert(tk.END, f"You: {question}\n")
-            chatbot_text.insert(tk.END, f"Bot: {answers.get(question, 'I am not sure, please check with your provider.')}\n\n")
+            chatbot_text.insert(tk.END, f"Bot: {answer}\n\n")
 
         # Ask Button
         ttk.Button(scrollable_frame, text="Ask", command=chatbot_reply).pack(pady=10)
@@ -518,7 +626,6 @@ class EnergyBillPredictor:
     
     def create_report_page(self):
         frame, scrollable_frame = self.frames['report']
-        self.create_navigation_bar(frame)
         
         # Title
         ttk.Label(scrollable_frame,
@@ -540,25 +647,9 @@ class EnergyBillPredictor:
                 messagebox.showinfo("No Data", "No appliances data to generate report.")
                 return
             
-            report_text = "📊 Appliance Usage Report 📊\n\n"
-            total_hours = sum(self.user_appliances.values())
-            
-            report_text += f"Total Hours of Appliance Usage: {total_hours} hrs/day\n\n"
-            
-            # Add appliance details
-            for appliance, hours in self.user_appliances.items():
-                percentage = (hours / total_hours) * 100
-                report_text += f"🔌 {appliance}: {hours} hrs/day ({percentage:.1f}%)\n"
-            
-            # Add usage analysis
-            report_text += "\n💡 Usage Analysis:\n"
-            for appliance, hours in self.user_appliances.items():
-                if hours > 8:
-                    report_text += f"⚠️ High usage: {appliance} ({hours} hrs/day)\n"
-                elif hours > 4:
-                    report_text += f"ℹ️ Moderate usage: {appliance} ({hours} hrs/day)\n"
-                else:
-                    report_text += f"✅ Efficient usage: {appliance} ({hours} hrs/day)\n"
+            key = state_key(self.user_appliances)
+            report_text = self.render_cache.get_or_compute(
+                "report", key, lambda: core.usage_report_text(self.user_appliances))
             
             # Insert the report text
             self.report_display.insert(tk.END, report_text)
@@ -575,10 +666,49 @@ class EnergyBillPredictor:
             pady=10
         )
         generate_button.pack(pady=10)
+        
+        def export_report(task, user_appliances, folder):
+            # Runs on a worker thread; same writer as the batch pipeline in reports.py
+            writer = ReportWriter(self.tariff, self.catalog)
+            try:
+                return writer.write("My Home", user_appliances,
+                                    txt_path=os.path.join(folder, "usage_report.txt"),
+                                    pdf_path=os.path.join(folder, "Energy_Report.pdf"))
+            finally:
+                writer.close()
+        
+        def export_done(row):
+            messagebox.showinfo("Report Saved", f"Saved {row['txt']} and {row['pdf']}")
+        
+        def export_failed(error):
+            messagebox.showerror("Export Error", str(error))
+        
+        def export():
+            if not self.user_appliances:
+                messagebox.showinfo("No Data", "No appliances data to generate report.")
+                return
+            # Never the working directory, which may be the app's own folder
+            folder = filedialog.askdirectory(title="Save the report in", initialdir=os.path.expanduser("~"),
+                                             mustexist=True)
+            if not folder:
+                return
+            self.tasks.submit("export", export_report, self.user_appliances.snapshot(), folder,
+                              on_done=export_done, on_error=export_failed)
+        
+        export_button = tk.Button(
+            scrollable_frame,
+            text="Export PDF",
+            command=export,
+            font=("Arial", 12, "bold"),
+            bg="#2E86C1",
+            fg="white",
+            padx=20,
+            pady=10
+        )
+        export_button.pack(pady=10)
 
     def create_analysis_page(self):
         frame, scrollable_frame = self.frames['analysis']
-        self.create_navigation_bar(frame)
         
         # Title
         ttk.Label(scrollable_frame,
@@ -593,126 +723,73 @@ class EnergyBillPredictor:
         self.analysis_text_frame = ttk.Frame(scrollable_frame)
         self.analysis_text_frame.pack(pady=20, padx=20, fill="x")
         
-        def generate_analysis():
-            # Clear previous charts and analysis
-            for widget in self.chart_frame.winfo_children():
-                widget.destroy()
+        # Status line for background runs
+        self.analysis_status = ttk.Label(scrollable_frame, text="", font=("Helvetica", 11))
+        self.analysis_status.pack()
+        
+        # One figure for the page's lifetime, created on the first click
+        self.analysis_chart = None
+        self.analysis_shown_key = None
+        
+        def compute_analysis(task, user_appliances):
+            # Runs on a worker thread: no Tk calls in here
+            return core.analyze(user_appliances, self.tariff, self.catalog,
+                                progress=task.progress)
+        
+        def show_analysis(result, key):
+            # Back on the Tk thread: only artist and label updates here
+            self.analysis_status.configure(text="")
             for widget in self.analysis_text_frame.winfo_children():
                 widget.destroy()
-                
+            self.analysis_shown_key = key
+            if self.analysis_chart is None:
+                self.analysis_chart = AnalysisChart(tk_canvas_factory(self.chart_frame, pady=20))
+            self.analysis_chart.update(result["appliances"], result["hours"],
+                                       result["energy_costs"], result["trend"])
+            
+            for text in (result["analysis_text"], result["recommendations"]):
+                ttk.Label(
+                    self.analysis_text_frame,
+                    text=text,
+                    font=("Helvetica", 12),
+                    justify="left"
+                ).pack(pady=10)
+        
+        def show_progress(fraction, message):
+            self.analysis_status.configure(text=f"{message}... {int(fraction * 100)}%")
+        
+        def show_error(error):
+            self.analysis_status.configure(text="")
+            messagebox.showerror("Analysis Error", str(error))
+        
+        def generate_analysis():
             if not self.user_appliances:
+                # Clear previous analysis
+                for widget in self.analysis_text_frame.winfo_children():
+                    widget.destroy()
+                if self.analysis_chart:
+                    self.analysis_chart.update([], [], [])
+                self.analysis_shown_key = None
                 messagebox.showwarning("No Data", "Please add appliances first in the 'Add Appliance' section!")
                 return
-                
-            # Create DataFrame from user's appliances
-            appliances = list(self.user_appliances.keys())
-            hours = list(self.user_appliances.values())
-            
-            # Estimate energy costs (example calculation - you can modify this)
-            energy_costs = []
-            for appliance, hour in self.user_appliances.items():
-                # Different base costs for different appliances
-                base_cost = {
-                    "Fan": 5,
-                    "Air Conditioner": 20,
-                    "Refrigerator": 15,
-                    "TV": 8,
-                    "Washing Machine": 12
-                }.get(appliance, 10)  # Default cost if appliance not in dict
-                
-                cost = base_cost * hour
-                energy_costs.append(cost)
-            
-            data = {
-                "Appliance": appliances,
-                "Usage_Hours_Per_Day": hours,
-                "Energy_Cost_Per_Day": energy_costs
-            }
-            df = pd.DataFrame(data)
-            
-            # Create figure for matplotlib
-            fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 10))
-            fig.suptitle('Your Energy Usage Analysis', fontsize=16)
-            
-            # Bar plot for current usage
-            bars = ax1.bar(df['Appliance'], df['Energy_Cost_Per_Day'])
-            ax1.set_title('Daily Energy Cost by Your Appliances')
-            ax1.set_xlabel('Appliance')
-            ax1.set_ylabel('Estimated Cost (₹)')
-            ax1.tick_params(axis='x', rotation=45)
             
-            # Add value labels on the bars
-            for bar in bars:
-                height = bar.get_height()
-                ax1.text(bar.get_x() + bar.get_width()/2., height,
-                        f'₹{int(height)}',
-                        ha='center', va='bottom')
-            
-            # Scatter plot with regression line
-            X = df['Usage_Hours_Per_Day']
-            y = df['Energy_Cost_Per_Day']
-            
-            ax2.scatter(X, y)
-            ax2.set_title('Your Usage Hours vs Cost')
-            ax2.set_xlabel('Usage Hours Per Day')
-            ax2.set_ylabel('Estimated Cost (₹)')
-            
-            # Add regression line if we have more than one point
-            if len(X) > 1:
-                model = LinearRegression()
-                model.fit(X.values.reshape(-1, 1), y)
-                line_x = np.linspace(X.min(), X.max(), 100)
-                line_y = model.predict(line_x.reshape(-1, 1))
-                ax2.plot(line_x, line_y, color='red', linestyle='--')
-            
-            # Adjust layout
-            plt.tight_layout()
-            
-            # Create canvas for matplotlib figure
-            canvas = FigureCanvasTkAgg(fig, master=self.chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(pady=20)
-            
-            # Calculate total daily cost
-            total_cost = sum(energy_costs)
-            
-            # Add analysis text
-            analysis_text = f"""
-            Analysis Summary:
-            
-            📊 Total Daily Energy Cost: ₹{total_cost:.2f}
-            
-            Breakdown by Appliance:
-            """
-            
-            for appliance, hours, cost in zip(appliances, hours, energy_costs):
-                percentage = (cost / total_cost) * 100
-                analysis_text += f"\n• {appliance}: {hours} hours/day - ₹{cost:.2f} ({percentage:.1f}% of total cost)"
-            
-            analysis_label = ttk.Label(
-                self.analysis_text_frame,
-                text=analysis_text,
-                font=("Helvetica", 12),
-                justify="left"
-            )
-            analysis_label.pack(pady=10)
-            
-            # Add recommendations based on usage
-            recommendations = "\nRecommendations for Energy Savings:\n"
+            key = state_key(self.user_appliances, tariff=self.tariff.fingerprint(),
+                            catalog=self.catalog.fingerprint())
+            if key == self.analysis_shown_key:
+                return  # Already on screen
+            cached = self.render_cache.get("analysis", key)
+            if cached is not None:
+                show_analysis(cached, key)
+                return
             
-            for appliance, hours in self.user_appliances.items():
-                if hours > 6:
-                    recommendations += f"\n• Consider reducing {appliance} usage ({hours} hours/day is high)"
-                elif hours > 4:
-                    recommendations += f"\n• Monitor {appliance} usage to optimize efficiency"
+            def done(result):
+                show_analysis(self.render_cache.put("analysis", key, result), key)
             
-            recommendations_label = ttk.Label(
-                self.analysis_text_frame,
-                text=recommendations,
-                font=("Helvetica", 12),
-                justify="left"
-            )
-            recommendations_label.pack(pady=10)
+            # A newer click supersedes any run still in flight
+            self.analysis_status.configure(text="Analyzing...")
+            self.tasks.submit("analysis", compute_analysis, self.user_appliances.snapshot(),
+                              on_done=done, on_error=show_error,
+                              on_progress=show_progress)
         
         # Create styled button for generating analysis
         generate_button = tk.Button(
@@ -753,7 +830,6 @@ class EnergyBillPredictor:
     
     def create_mlreport_page(self):
         frame, scrollable_frame = self.frames['mlreport']
-        self.create_navigation_bar(frame)
         
         # Title
         ttk.Label(scrollable_frame,
@@ -768,124 +844,90 @@ class EnergyBillPredictor:
         self.ml_analysis_frame = ttk.Frame(scrollable_frame)
         self.ml_analysis_frame.pack(pady=20, padx=20, fill="x")
         
-        def get_energy_savings(appliance, usage_hours):
-            # Base costs for different appliances (₹ per hour)
-            base_costs = {
-                "Fan": 2,
-                "Air Conditioner": 15,
-                "Refrigerator": 4,
-                "TV": 3,
-                "Washing Machine": 5
-            }
-            
-            # Get base cost for the appliance
-            base_cost = base_costs.get(appliance, 5)  # Default 5 if appliance not found
-            
-            # Calculate current daily cost
-            current_cost = base_cost * usage_hours
-            
-            # Calculate cost with 2 hours reduced
-            reduced_hours = max(0, usage_hours - 2)  # Ensure hours don't go below 0
-            reduced_cost = base_cost * reduced_hours
-            
-            # Return potential savings
-            return current_cost - reduced_cost
+        # Status line for background runs
+        self.ml_status = ttk.Label(scrollable_frame, text="", font=("Helvetica", 11))
+        self.ml_status.pack()
         
-        def analyze_usage_with_ml():
-            # Clear previous charts and analysis
-            for widget in self.ml_chart_frame.winfo_children():
-                widget.destroy()
+        # Alerts from imported meter readings
+        self.ml_alerts_frame = ttk.Frame(scrollable_frame)
+        self.ml_alerts_frame.pack(pady=10, padx=20, fill="x")
+        
+        # One figure each for the page's lifetime, created on the first click
+        self.ml_chart = None
+        self.ml_heatmap = None
+        self.ml_shown_key = None
+        
+        def compute_ml_analysis(task, sorted_apps):
+            # Runs on a worker thread: no Tk calls in here
+            # sorted_apps comes from the inventory's ranking, most hours first
+            return core.ml_analysis(sorted_apps, self.tariff, self.catalog,
+                                    progress=task.progress)
+        
+        def show_ml_analysis(result, key):
+            # Back on the Tk thread: only artist and label updates here
+            self.ml_status.configure(text="")
             for widget in self.ml_analysis_frame.winfo_children():
                 widget.destroy()
+            self.ml_shown_key = key
             
-            if not self.user_appliances:
-                messagebox.showwarning("No Data", "Please add appliances first in the 'Add Appliance' section!")
-                return
-            
-            # Create figure for plots - smaller size
-            fig = plt.figure(figsize=(8, 4))
-            plt.clf()  # Clear the figure
-            
-            # Sort appliances by usage hours
-            sorted_apps = sorted(self.user_appliances.items(), key=lambda x: x[1], reverse=True)
-            apps, hours = zip(*sorted_apps)
-            
-            # Create bar chart
-            # First subplot with smaller font sizes
-            plt.subplot(1, 2, 1)
-            bars = plt.bar(apps, hours, color='skyblue')
-            plt.title("Energy Consumption", fontsize=10)
-            plt.ylabel("Hours/Day", fontsize=8)
-            plt.xlabel("Appliance", fontsize=8)
-            plt.xticks(rotation=45, fontsize=8)
-            plt.title("Energy Consumption by Appliance", fontsize=12)
-            plt.ylabel("Hours/Day")
-            plt.xlabel("Appliance")
-            plt.xticks(rotation=45)
-            
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                plt.text(bar.get_x() + bar.get_width()/2., height,
-                        f'{int(height)}h',
-                        ha='center', va='bottom')
-            
-            # Create pie chart
-            plt.subplot(1, 2, 2)
-            total_hours = sum(hours)
-            plt.pie(hours, labels=apps, autopct='%1.1f%%',
-                    startangle=90, colors=plt.cm.Pastel1(np.linspace(0, 1, len(apps))),
-                    textprops={'fontsize': 8})
-            plt.title("Usage Distribution", fontsize=10)
-            
-            plt.tight_layout()
-            
-            # Create canvas for matplotlib figure
-            canvas = FigureCanvasTkAgg(fig, master=self.ml_chart_frame)
-            canvas.draw()
-            canvas.get_tk_widget().pack(pady=20)
-            
-            # Generate ML Analysis text
-            analysis_text = "🤖 Machine Learning Analysis\n\n"
-            
-            # Add usage patterns analysis
-            analysis_text += "📊 Usage Patterns:\n"
-            for appliance, hours in sorted_apps:
-                if hours > 8:
-                    analysis_text += f"• {appliance}: Very High Usage ({hours} hrs/day)\n"
-                elif hours > 5:
-                    analysis_text += f"• {appliance}: High Usage ({hours} hrs/day)\n"
-                else:
-                    analysis_text += f"• {appliance}: Normal Usage ({hours} hrs/day)\n"
+            # Bar and pie charts, updated in place on the page's persistent figure
+            if self.ml_chart is None:
+                self.ml_chart = UsageChart(tk_canvas_factory(self.ml_chart_frame, pady=20))
+            self.ml_chart.update(result["apps"], result["hours"])
             
-            # Add savings predictions
-            analysis_text += "\n💰 Predicted Daily Savings:\n"
-            total_savings = 0
-            for appliance, hours in sorted_apps:
-                if hours > 2:
-                    savings = get_energy_savings(appliance, hours)
-                    total_savings += savings
-                    analysis_text += f"• Reduce {appliance} by 2 hrs: Save ₹{savings:.2f}\n"
-            
-            analysis_text += f"\n📈 Total Potential Daily Savings: ₹{total_savings:.2f}"
-            
-            # Add recommendations
-            analysis_text += "\n\n🎯 AI Recommendations:\n"
-            for appliance, hours in sorted_apps:
-                if hours > 8:
-                    analysis_text += f"• Consider using {appliance} in off-peak hours\n"
-                elif hours > 5:
-                    analysis_text += f"• Monitor {appliance} usage patterns\n"
+            # Savings of every what-if scenario, one row per appliance
+            if self.ml_heatmap is None:
+                self.ml_heatmap = ScenarioHeatmap(tk_canvas_factory(self.ml_chart_frame, pady=10))
+            heatmap = result["scenarios"]["heatmap"]
+            self.ml_heatmap.update(heatmap["rows"], heatmap["columns"], heatmap["values"])
             
             # Create text widget for analysis
             analysis_label = ttk.Label(
                 self.ml_analysis_frame,
-                text=analysis_text,
+                text=result["analysis_text"],
                 font=("Helvetica", 12),
                 justify="left"
             )
             analysis_label.pack(pady=10)
         
+        def show_progress(fraction, message):
+            self.ml_status.configure(text=f"{message}... {int(fraction * 100)}%")
+        
+        def show_error(error):
+            self.ml_status.configure(text="")
+            messagebox.showerror("Analysis Error", str(error))
+        
+        def analyze_usage_with_ml():
+            if not self.user_appliances:
+                # Clear previous analysis
+                for widget in self.ml_analysis_frame.winfo_children():
+                    widget.destroy()
+                if self.ml_chart:
+                    self.ml_chart.update([], [])
+                if self.ml_heatmap:
+                    self.ml_heatmap.update([], [], [])
+                self.ml_shown_key = None
+                messagebox.showwarning("No Data", "Please add appliances first in the 'Add Appliance' section!")
+                return
+            
+            key = state_key(self.user_appliances, tariff=self.tariff.fingerprint(),
+                            catalog=self.catalog.fingerprint())
+            if key == self.ml_shown_key:
+                return  # Already on screen
+            cached = self.render_cache.get("ml_analysis", key)
+            if cached is not None:
+                show_ml_analysis(cached, key)
+                return
+            
+            def done(result):
+                show_ml_analysis(self.render_cache.put("ml_analysis", key, result), key)
+            
+            # A newer click supersedes any run still in flight
+            self.ml_status.configure(text="Analyzing...")
+            self.tasks.submit("mlreport", compute_ml_analysis, self.user_appliances.top(),
+                              on_done=done, on_error=show_error,
+                              on_progress=show_progress)
+        
         # Create styled button for analysis
         generate_button = tk.Button(
             scrollable_frame,
@@ -910,12 +952,78 @@ class EnergyBillPredictor:
         generate_button.bind("<Enter>", on_enter)
         generate_button.bind("<Leave>", on_leave)
         
+        def import_readings(task, path, user_appliances):
+            # Runs on a worker thread: store the file and score each block as it lands,
+            # then split the readings between the appliances
+            fmt = "csv" if path.lower().endswith(".csv") else "ndjson"
+            if self.meter_id not in self.detector:
+                self.detector.prime(self.meter_id, *self.meters.read(self.meter_id, last=PRIME_READINGS))
+            alerts = []
+            with open(path, "rb") as f:
+                summary = ingest(f, self.meters, self.meter_id, fmt,
+                                 on_flush=lambda ts, kwh: alerts.extend(
+                                     self.detector.detect(self.meter_id, ts, kwh)))
+            hours = {}
+            if user_appliances:
+                try:
+                    hours = estimated_hours(estimate_household(self.meters, self.meter_id,
+                                                               user_appliances, self.catalog))
+                except ValueError:
+                    pass  # Too few readings, or too many appliances, to tell them apart
+            return summary, alerts, hours
+        
+        def show_alerts(result):
+            summary, alerts, hours = result
+            # Measured usage replaces the typed hours
+            self.user_appliances.update(hours)
+            for widget in self.ml_alerts_frame.winfo_children():
+                widget.destroy()
+            alerts_text = f"⚡ Imported {summary['rows']} meter readings\n\n"
+            if alerts:
+                alerts_text += f"⚠️ Unusual Consumption ({len(alerts)} readings):\n"
+                alerts_text += "".join(f"• {describe(alert)}\n" for alert in alerts[-10:])
+            else:
+                alerts_text += "✅ No unusual consumption found"
+            if hours:
+                alerts_text += "\n\n📊 Hours per day measured from your meter:\n"
+                alerts_text += "".join(f"• {name}: {value} hrs/day\n" for name, value in hours.items())
+            ttk.Label(self.ml_alerts_frame,
+                    text=alerts_text,
+                    font=("Helvetica", 12),
+                    justify="left").pack(pady=10)
+        
+        def import_failed(error):
+            messagebox.showerror("Import Error", str(error))
+        
+        def import_meter_readings():
+            path = filedialog.askopenfilename(
+                title="Import Meter Readings",
+                filetypes=[("Meter readings", "*.csv *.ndjson *.jsonl"), ("All files", "*.*")])
+            if path:
+                self.tasks.submit("meter_import", import_readings, path, self.user_appliances.snapshot(),
+                                  on_done=show_alerts, on_error=import_failed)
+        
+        tk.Button(
+            scrollable_frame,
+            text="Import Meter Readings",
+            command=import_meter_readings,
+            font=("Arial", 12, "bold"),
+            bg="#2E86C1",
+            fg="white",
+            padx=20,
+            pady=10,
+            cursor="hand2"
+        ).pack(pady=10)
+        
         # Add instructions
         instructions = """
         Instructions:
         1. First add your appliances in the 'Add Appliance' section
         2. Click 'Generate ML Analysis' to see detailed insights
-        3. View usage patterns and AI-powered recommendations
+        3. View usage patterns, AI-powered recommendations and the savings of
+           every what-if scenario
+        4. Import smart-meter readings (CSV or NDJSON) to flag unusual consumption
+           and measure each appliance's hours per day
         """
         
         ttk.Label(scrollable_frame,
@@ -923,7 +1031,10 @@ class EnergyBillPredictor:
                 font=("Helvetica", 12),
                 justify="left").pack(pady=20, padx=20)
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.tasks.shutdown()
 
 if __name__ == "__main__":
     app = EnergyBillPredictor()
@@ -0,0 +1,58 @@
+"""Pre-rendered splash backgrounds.
+
+The splash gradient used to be 700 separate canvas lines. It is now computed
+once as a NumPy image, written as a PNG (which Tk's PhotoImage loads
+natively) and cached on disk under a key made from the theme colors and
+size, so later launches just load one small file.
+"""
+import hashlib
+import os
+import struct
+import zlib
+
+import numpy as np
+
+CACHE_DIR = os.environ.get(
+    "ENERGY_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "energy-bill-predictor"),
+)
+
+
+def hex_to_rgb(color):
+    return np.array([int(color[i:i + 2], 16) for i in (1, 3, 5)], dtype=np.float64)
+
+
+def gradient_pixels(color1, color2, width, height):
+    """Vertical gradient from color1 (top) to color2 (bottom) as uint8 (h, w, 3)."""
+    ratio = (np.arange(height, dtype=np.float64) / height)[:, None]
+    rows = hex_to_rgb(color1) * (1 - ratio) + hex_to_rgb(color2) * ratio
+    return np.broadcast_to(rows.astype(np.uint8)[:, None, :], (height, width, 3))
+
+
+def encode_png(pixels):
+    """Minimal 8-bit RGB PNG encoder (no Pillow needed)."""
+    height, width, _ = pixels.shape
+    raw = np.zeros((height, 1 + width * 3), dtype=np.uint8)
+    raw[:, 1:] = pixels.reshape(height, width * 3)  # filter byte 0 on every row
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)) + chunk(b"IEND", b""))
+
+
+def gradient_image_path(color1, color2, width, height, cache_dir=None):
+    """Return the path of the cached gradient PNG, rendering it on a miss."""
+    cache_dir = cache_dir or CACHE_DIR
+    key = hashlib.sha1(f"{color1}:{color2}:{width}x{height}".encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"splash-{key}.png")
+    if not os.path.exists(path):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(encode_png(gradient_pixels(color1, color2, width, height)))
+        os.replace(tmp, path)
+    return path
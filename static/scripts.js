@@ -5,13 +5,34 @@ $(document).ready(function () {
         $('#toggle-theme').toggleClass('btn-dark').toggleClass('btn-light');
     });
 
+    function applianceRow(name) {
+        return $('#appliance-list > li').filter(function () {
+            return $(this).attr('data-appliance') === name;
+        });
+    }
+
+    function showPrediction(bill) {
+        $('#prediction-result').text(`Predicted Bill: ₹${bill.toFixed(2)}`);
+    }
+
     // Add appliance form submission
     $('#add-appliance-form').submit(function (e) {
         e.preventDefault();
         const appliance = $('#appliance').val();
         const hours = $('#hours').val();
-        $.post('/add_appliance', { appliance, hours }, function () {
-            location.reload();
+        // Swap in the re-rendered parts instead of reloading the page
+        $.post('/add_appliance', { appliance, hours }, function (data) {
+            $.each(data.fragments, function (id, html) {
+                $('#' + id).html(html);
+            });
+        });
+    });
+
+    // Remove buttons are re-rendered with the list, so delegate
+    $('#appliance-list').on('click', '.remove-appliance', function () {
+        const appliance = $(this).closest('li').attr('data-appliance');
+        $.post('/remove_appliance', { appliance }, function () {
+            applianceRow(appliance).remove();
         });
     });
 
@@ -23,7 +44,50 @@ $(document).ready(function () {
         const prev_bill3 = $('#prev_bill3').val();
 
         $.post('/predict_bill', { prev_bill1, prev_bill2, prev_bill3 }, function (data) {
-            $('#prediction-result').text(`Predicted Bill: ₹${data.predicted_bill.toFixed(2)}`);
+            showPrediction(data.predicted_bill);
         });
     });
+
+    // Live updates from other tabs and devices, patched into the page in place
+    if (window.EventSource) {
+        const events = new EventSource('/events');
+
+        events.addEventListener('snapshot', function (e) {
+            $('#appliance-list').html(JSON.parse(e.data).html);
+        });
+
+        events.addEventListener('appliance', function (e) {
+            const data = JSON.parse(e.data);
+            const row = applianceRow(data.name);
+            if (row.length) {
+                row.replaceWith(data.html);
+            } else {
+                $('#appliance-list').append(data.html);
+            }
+        });
+
+        events.addEventListener('appliance_removed', function (e) {
+            applianceRow(JSON.parse(e.data).name).remove();
+        });
+
+        events.addEventListener('prediction', function (e) {
+            showPrediction(JSON.parse(e.data).predicted_bill);
+        });
+
+        events.addEventListener('reading', function (e) {
+            const data = JSON.parse(e.data);
+            const at = new Date(data.ts * 1000).toLocaleString();
+            $('#latest-reading').text(`Latest meter reading: ${data.kwh.toFixed(3)} kWh at ${at}`);
+        });
+
+        events.addEventListener('anomaly', function (e) {
+            const list = $('#meter-alerts').empty();
+            JSON.parse(e.data).alerts.slice(-5).forEach(function (alert) {
+                const at = new Date(alert.ts * 1000).toLocaleString();
+                list.append($('<li>').text(
+                    `⚠️ ${at}: ${alert.kwh.toFixed(3)} kWh is unusually ${alert.direction} ` +
+                    `(expected about ${alert.expected.toFixed(3)})`));
+            });
+        });
+    }
 });
@@ -0,0 +1,319 @@
+"""Storage backends for household appliances and monthly bills.
+
+Both backends expose the same small API keyed by household id:
+
+    storage.set_appliance(household_id, name, hours)
+    storage.list_appliances(household_id)      -> {name: hours}
+    storage.add_bill(household_id, amount)
+    storage.bill_history(household_id, limit)  -> [amount, ...] oldest first
+    storage.state_version(household_id)       -> (version, modified epoch or None)
+
+The state version goes up on every change to a household's appliances or
+bills, so it can back ETag / Last-Modified headers without reading the
+state itself.
+
+They also keep a short log of live-update events, which every worker
+process reads to fan changes out to its own /events streams (pubsub.py):
+
+    storage.append_event(household_id, payload)  -> event id
+    storage.events_after(event_id, limit)       -> [(id, household_id, payload), ...]
+    storage.last_event_id()
+
+MemoryStorage keeps everything in lock-striped dicts and is what the tests
+use. SQLiteStorage persists to an embedded database in WAL mode, with one
+clustered (household_id, ...) primary key per table so every lookup is an
+index range scan for a single household, never a table scan. Both are safe
+to share between the threads of a worker; SQLite also between processes.
+"""
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# The default database sits next to the app, wherever it is started from
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "energy.db")
+# Events kept for workers to catch up on; older ones are trimmed away
+EVENT_LOG_SIZE = 10_000
+EVENT_TRIM_EVERY = 1_000
+
+
+class Storage:
+    def set_appliance(self, household_id, name, hours):
+        raise NotImplementedError
+
+    def remove_appliance(self, household_id, name):
+        raise NotImplementedError
+
+    def list_appliances(self, household_id):
+        raise NotImplementedError
+
+    def add_bill(self, household_id, amount):
+        raise NotImplementedError
+
+    def bill_history(self, household_id, limit=None):
+        raise NotImplementedError
+
+    def state_version(self, household_id):
+        raise NotImplementedError
+
+    def append_event(self, household_id, payload):
+        raise NotImplementedError
+
+    def events_after(self, event_id, limit=1000):
+        raise NotImplementedError
+
+    def last_event_id(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _Stripe:
+    __slots__ = ("lock", "appliances", "bills", "versions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.appliances = {}
+        self.bills = {}
+        self.versions = {}
+
+    def touch(self, household_id):
+        # Caller holds the lock
+        version, _ = self.versions.get(household_id, (0, None))
+        self.versions[household_id] = (version + 1, time.time())
+
+
+class MemoryStorage(Storage):
+    """Dicts behind striped locks: each household hashes to one of `stripes`
+    shards with its own lock, so requests for different households rarely
+    wait on each other while updates to one household stay serialized."""
+
+    def __init__(self, stripes=64):
+        self._stripes = [_Stripe() for _ in range(stripes)]
+        self._events = deque(maxlen=EVENT_LOG_SIZE)
+        self._events_lock = threading.Lock()
+        self._last_event = 0
+
+    def _stripe(self, household_id):
+        return self._stripes[hash(household_id) % len(self._stripes)]
+
+    def set_appliance(self, household_id, name, hours):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            stripe.appliances.setdefault(household_id, {})[name] = hours
+            stripe.touch(household_id)
+
+    def remove_appliance(self, household_id, name):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            removed = stripe.appliances.get(household_id, {}).pop(name, None) is not None
+            if removed:
+                stripe.touch(household_id)
+            return removed
+
+    def list_appliances(self, household_id):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            return dict(stripe.appliances.get(household_id, {}))
+
+    def add_bill(self, household_id, amount):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            stripe.bills.setdefault(household_id, []).append(float(amount))
+            stripe.touch(household_id)
+
+    def bill_history(self, household_id, limit=None):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            bills = stripe.bills.get(household_id, [])
+            return list(bills[-limit:] if limit else bills)
+
+    def state_version(self, household_id):
+        stripe = self._stripe(household_id)
+        with stripe.lock:
+            return stripe.versions.get(household_id, (0, None))
+
+    def append_event(self, household_id, payload):
+        with self._events_lock:
+            self._last_event += 1
+            self._events.append((self._last_event, household_id, payload))
+            return self._last_event
+
+    def events_after(self, event_id, limit=1000):
+        with self._events_lock:
+            # Newest first, so an idle poll looks at one entry
+            newer = []
+            for event in reversed(self._events):
+                if event[0] <= event_id:
+                    break
+                newer.append(event)
+        return newer[::-1][:limit]
+
+    def last_event_id(self):
+        with self._events_lock:
+            return self._last_event
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS appliances (
+    household_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hours REAL NOT NULL,
+    PRIMARY KEY (household_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS bills (
+    household_id TEXT NOT NULL,
+    month INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (household_id, month)
+) WITHOUT ROWID;
+
+-- Live-update events, read by every worker; AUTOINCREMENT ids never repeat
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    household_id TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+
+-- Bumped by triggers in the same transaction as every change
+CREATE TABLE IF NOT EXISTS household_state (
+    household_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+TOUCH_STATE = """
+    INSERT INTO household_state (household_id, version, modified)
+    VALUES ({row}.household_id, 1, (julianday('now') - 2440587.5) * 86400.0)
+    ON CONFLICT (household_id) DO UPDATE
+    SET version = version + 1, modified = excluded.modified;
+"""
+TRIGGERS = "".join(
+    f"CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_state AFTER {event} ON {table} "
+    f"BEGIN {TOUCH_STATE.format(row='OLD' if event == 'DELETE' else 'NEW')} END;\n"
+    for table in ("appliances", "bills")
+    for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+# Statements are module constants so sqlite3's per-connection statement
+# cache hands back the already-prepared statement on every call.
+SET_APPLIANCE = (
+    "INSERT INTO appliances (household_id, name, hours) VALUES (?, ?, ?) "
+    "ON CONFLICT (household_id, name) DO UPDATE SET hours = excluded.hours"
+)
+REMOVE_APPLIANCE = "DELETE FROM appliances WHERE household_id = ? AND name = ?"
+LIST_APPLIANCES = "SELECT name, hours FROM appliances WHERE household_id = ? ORDER BY name"
+ADD_BILL = (
+    "INSERT INTO bills (household_id, month, amount) "
+    "SELECT ?, COALESCE(MAX(month), 0) + 1, ? FROM bills WHERE household_id = ?"
+)
+BILL_HISTORY = "SELECT amount FROM bills WHERE household_id = ? ORDER BY month DESC LIMIT ?"
+STATE_VERSION = "SELECT version, modified FROM household_state WHERE household_id = ?"
+APPEND_EVENT = "INSERT INTO events (household_id, payload) VALUES (?, ?)"
+TRIM_EVENTS = "DELETE FROM events WHERE id <= ?"
+EVENTS_AFTER = "SELECT id, household_id, payload FROM events WHERE id > ? ORDER BY id LIMIT ?"
+LAST_EVENT_ID = "SELECT COALESCE(MAX(id), 0) FROM events"
+
+
+class SQLiteStorage(Storage):
+    def __init__(self, path, pool_size=8, timeout=5.0):
+        self.path = path
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        for _ in range(pool_size):
+            self._pool.put(self._connect(timeout))
+        with self._connection() as conn:
+            conn.executescript(SCHEMA + TRIGGERS)
+
+    def _connect(self, timeout):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=64,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def set_appliance(self, household_id, name, hours):
+        with self._connection() as conn:
+            conn.execute(SET_APPLIANCE, (household_id, name, hours))
+
+    def remove_appliance(self, household_id, name):
+        with self._connection() as conn:
+            return conn.execute(REMOVE_APPLIANCE, (household_id, name)).rowcount > 0
+
+    def list_appliances(self, household_id):
+        with self._connection() as conn:
+            return dict(conn.execute(LIST_APPLIANCES, (household_id,)).fetchall())
+
+    def add_bill(self, household_id, amount):
+        with self._connection() as conn:
+            # IMMEDIATE takes the write lock up front so two workers can't
+            # both read the same MAX(month) for a household.
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(ADD_BILL, (household_id, float(amount), household_id))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def bill_history(self, household_id, limit=None):
+        with self._connection() as conn:
+            rows = conn.execute(BILL_HISTORY, (household_id, limit or -1)).fetchall()
+        return [amount for (amount,) in reversed(rows)]
+
+    def state_version(self, household_id):
+        with self._connection() as conn:
+            row = conn.execute(STATE_VERSION, (household_id,)).fetchone()
+        return tuple(row) if row else (0, None)
+
+    def append_event(self, household_id, payload):
+        with self._connection() as conn:
+            event_id = conn.execute(APPEND_EVENT, (household_id, payload)).lastrowid
+            if event_id % EVENT_TRIM_EVERY == 0:
+                conn.execute(TRIM_EVENTS, (event_id - EVENT_LOG_SIZE,))
+        return event_id
+
+    def events_after(self, event_id, limit=1000):
+        with self._connection() as conn:
+            return conn.execute(EVENTS_AFTER, (event_id, limit)).fetchall()
+
+    def last_event_id(self):
+        with self._connection() as conn:
+            return conn.execute(LAST_EVENT_ID).fetchone()[0]
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+def create_storage(url=None):
+    """Build a backend from a URL: "memory" or "sqlite:///path/to/file.db".
+
+    Falls back to the ENERGY_STORAGE environment variable, then to an
+    energy.db file next to the app.
+    """
+    url = url or os.environ.get("ENERGY_STORAGE", f"sqlite:///{DEFAULT_DB}")
+    if url == "memory":
+        return MemoryStorage()
+    if url.startswith("sqlite:///"):
+        return SQLiteStorage(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported storage URL: {url}")
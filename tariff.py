@@ -0,0 +1,133 @@
+"""Slab tariff engine.
+
+A Tariff is loaded from data/tariff.json and turns kWh into money for one
+household or for arrays of millions of meter-months in a single NumPy pass:
+
+    energy charge  tiered slabs, evaluated with np.interp over the cumulative
+                   slab charges (so cost is piecewise-linear in kWh)
+    time of use    optional 24-hour consumption profile weighted by the
+                   per-hour band multipliers
+    fixed charge   per month
+    tax            applied to the whole bill
+
+Every cost figure the front ends show (analysis costs, savings estimates)
+comes from here, so they agree with each other and with the bill. kWh per
+appliance comes from the wattage catalog in catalog.py.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "tariff.json")
+HOURS = np.arange(24)
+
+
+def hour_window(start, end):
+    """24-hour mask of [start, end), wrapping past midnight when end <= start."""
+    if start < end:
+        return (HOURS >= start) & (HOURS < end)
+    return (HOURS >= start) | (HOURS < end)
+
+
+class Tariff:
+    def __init__(self, slabs, fixed_charge=0.0, tax_rate=0.0, tou_bands=(),
+                 days_per_month=30, currency="₹", name="Custom"):
+        if not slabs:
+            raise ValueError("A tariff needs at least one slab")
+        self.name = name
+        self.currency = currency
+        self.days_per_month = days_per_month
+        self.fixed_charge = float(fixed_charge)
+        self.tax_rate = float(tax_rate)
+        self.slabs = [dict(slab) for slab in slabs]
+        self.tou_bands = [dict(band) for band in tou_bands]
+
+        # Usage above the last limit has to cost something
+        if self.slabs[-1]["upto"] is not None:
+            raise ValueError("The last slab must have no upper limit (\"upto\": null)")
+        limits = [slab["upto"] for slab in self.slabs[:-1]]
+        if any(b <= a for a, b in zip([0] + limits, limits)):
+            raise ValueError("Slab limits must be increasing")
+        rates = np.array([slab["rate"] for slab in self.slabs], dtype=np.float64)
+
+        # Breakpoints of the piecewise-linear energy charge
+        self._bounds = np.array([0.0] + limits, dtype=np.float64)
+        widths = np.diff(self._bounds)
+        self._cumulative = np.concatenate([[0.0], np.cumsum(widths * rates[:len(widths)])])
+        self._top_rate = rates[-1]
+
+        self.hourly_multipliers = np.ones(24)
+        for band in self.tou_bands:
+            self.hourly_multipliers[hour_window(band["start"], band["end"])] = band["multiplier"]
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def fingerprint(self):
+        """Stable hash of the tariff parameters, for cache keys."""
+        payload = json.dumps([self.slabs, self.fixed_charge, self.tax_rate, self.tou_bands,
+                              self.days_per_month], sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+    def energy_charge(self, monthly_kwh):
+        """Slab charge for monthly kWh; any shape in, same shape out."""
+        kwh = np.maximum(np.asarray(monthly_kwh, dtype=np.float64), 0.0)
+        charge = np.interp(kwh, self._bounds, self._cumulative)
+        return charge + np.maximum(kwh - self._bounds[-1], 0.0) * self._top_rate
+
+    def tou_factor(self, hourly_profile):
+        """Weighted multiplier for a (..., 24) share of consumption per hour."""
+        profile = np.asarray(hourly_profile, dtype=np.float64)
+        totals = profile.sum(axis=-1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            factor = (profile @ self.hourly_multipliers) / totals
+        return np.where(totals > 0, factor, 1.0)
+
+    def monthly_bill(self, monthly_kwh, hourly_profile=None):
+        """Total bill (fixed + energy, with TOU and tax) for each kWh value."""
+        factor = 1.0 if hourly_profile is None else self.tou_factor(hourly_profile)
+        return self.priced_bill(monthly_kwh, factor)
+
+    def priced_bill(self, monthly_kwh, factor):
+        """Total bill for monthly kWh whose time-of-use multiplier averages factor."""
+        return (self.energy_charge(monthly_kwh) * factor + self.fixed_charge) * (1 + self.tax_rate)
+
+    def appliance_daily_costs(self, daily_kwh, hourly_profile=None):
+        """Split a household's usage-dependent bill across its appliances.
+
+        daily_kwh has shape (..., appliances). Each appliance gets the share
+        of the monthly energy charge (with TOU and tax, without the fixed
+        charge) proportional to its kWh, expressed per day.
+        """
+        daily_kwh = np.asarray(daily_kwh, dtype=np.float64)
+        total = daily_kwh.sum(axis=-1)
+        variable = (self.monthly_bill(total * self.days_per_month, hourly_profile)
+                    - self.fixed_charge * (1 + self.tax_rate))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(total[..., None] > 0, daily_kwh / total[..., None], 0.0)
+        return share * (variable / self.days_per_month)[..., None]
+
+    def daily_savings(self, daily_kwh, reduced_kwh, hourly_kwh=None, reduced_hourly_kwh=None):
+        """Per-day bill reduction from cutting each appliance to reduced_kwh.
+
+        Both arrays are (..., appliances); appliance j is reduced on its own
+        while the others stay as they are, so slab effects are exact. With
+        (..., appliances, 24) hourly_kwh and reduced_hourly_kwh, the kWh
+        each appliance uses in each hour before and after, time-of-use
+        prices apply too.
+        """
+        daily_kwh = np.asarray(daily_kwh, dtype=np.float64)
+        reduced_kwh = np.asarray(reduced_kwh, dtype=np.float64)
+        total = daily_kwh.sum(axis=-1, keepdims=True)
+        profile = reduced_profile = None
+        if hourly_kwh is not None:
+            hourly_kwh = np.asarray(hourly_kwh, dtype=np.float64)
+            profile = hourly_kwh.sum(axis=-2, keepdims=True)
+            reduced_profile = profile - hourly_kwh + np.asarray(reduced_hourly_kwh, dtype=np.float64)
+        current = self.monthly_bill(total * self.days_per_month, profile)
+        reduced = self.monthly_bill((total - daily_kwh + reduced_kwh) * self.days_per_month, reduced_profile)
+        return (current - reduced) / self.days_per_month
@@ -0,0 +1,121 @@
+"""Run analysis work off the Tk thread.
+
+Tk is not thread-safe, so workers never touch widgets. A TaskExecutor runs
+functions on a thread pool (NumPy releases the GIL for the heavy parts)
+and polls for finished futures with root.after, calling the on_done /
+on_error / on_progress callbacks back on the UI thread.
+
+Tasks are grouped by key: submitting a new task under a key supersedes the
+previous one. A superseded task that hasn't started is cancelled; one that
+is already running sees task.cancelled become True and its result is
+dropped, so only the latest click ever reaches the widgets.
+"""
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    pass
+
+
+class Task:
+    def __init__(self, key, generation):
+        self.key = key
+        self.generation = generation
+        self._cancelled = threading.Event()
+        self._progress = queue.SimpleQueue()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def check(self):
+        """Raise TaskCancelled if a newer task replaced this one."""
+        if self.cancelled:
+            raise TaskCancelled(self.key)
+
+    def report(self, fraction, message=""):
+        """Called from the worker; delivered to on_progress on the UI thread."""
+        self._progress.put((fraction, message))
+
+    def progress(self, fraction, message=""):
+        """check() then report(): the progress callback for core.py functions."""
+        self.check()
+        self.report(fraction, message)
+
+
+class TaskExecutor:
+    def __init__(self, root, max_workers=2, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._pending = []
+        self._latest = {}
+        self._poll_id = None
+
+    def submit(self, key, fn, *args, on_done, on_error=None, on_progress=None):
+        """Run fn(task, *args) on the pool; results come back via the callbacks."""
+        previous = self._latest.get(key)
+        if previous:
+            previous[0].cancel()
+            previous[1].cancel()
+
+        task = Task(key, previous[0].generation + 1 if previous else 1)
+        future = self.pool.submit(fn, task, *args)
+        self._latest[key] = (task, future)
+        self._pending.append((task, future, on_done, on_error, on_progress))
+        if self._poll_id is None:
+            self._poll_id = self.root.after(self.poll_ms, self._poll)
+        return task
+
+    def busy(self, key):
+        latest = self._latest.get(key)
+        return latest is not None and not latest[1].done()
+
+    def _poll(self):
+        still_pending = []
+        for entry in self._pending:
+            task, future, on_done, on_error, on_progress = entry
+            while not task._progress.empty():
+                fraction, message = task._progress.get()
+                if on_progress and not task.cancelled:
+                    on_progress(fraction, message)
+
+            if not future.done():
+                still_pending.append(entry)
+                continue
+            if task.cancelled or future.cancelled():
+                continue
+            if self._latest.get(task.key, (None,))[0] is task:
+                del self._latest[task.key]
+
+            error = future.exception()
+            if error is None:
+                on_done(future.result())
+            elif isinstance(error, TaskCancelled):
+                continue
+            elif on_error:
+                on_error(error)
+            else:
+                self.root.report_callback_exception(type(error), error, error.__traceback__)
+
+        self._pending = still_pending
+        self._poll_id = self.root.after(self.poll_ms, self._poll) if still_pending else None
+
+    def shutdown(self):
+        for task, future, *_ in self._pending:
+            task.cancel()
+            future.cancel()
+        self._pending = []
+        if self._poll_id is not None:
+            try:
+                self.root.after_cancel(self._poll_id)
+            except tk.TclError:
+                pass  # root already destroyed
+            self._poll_id = None
+        self.pool.shutdown(wait=False)
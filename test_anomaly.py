@@ -0,0 +1,53 @@
+import numpy as np
+
+
+def daily_load(days, seed=0):
+    """Hourly readings with an evening peak and some noise."""
+    rng = np.random.default_rng(seed)
+    ts = 1_700_000_000 + 3600 * np.arange(24 * days)
+    hour = (ts // 3600) % 24
+    kwh = 0.4 + 0.15 * ((hour >= 18) & (hour < 22)) + rng.normal(0, 0.08, len(ts))
+    return ts, kwh
+
+
+def test_one_spike_raises_one_alert():
+    from anomaly import AnomalyDetector
+
+    for seed in range(3):
+        ts, kwh = daily_load(30, seed)
+        clean = AnomalyDetector().detect("h1", ts, kwh)
+        kwh[500] += 3.0
+        alerts = AnomalyDetector().detect("h1", ts, kwh)
+        # No echoes on the following days once the spike is past
+        added = [alert for alert in alerts if alert not in clean]
+        assert [alert["ts"] for alert in added] == [int(ts[500])], seed
+        assert added[0]["direction"] == "high"
+
+
+def test_scores_do_not_depend_on_batch_split():
+    from anomaly import MODELS, AnomalyDetector
+
+    ts, kwh = daily_load(20, seed=1)
+    kwh[[200, 203, 300]] += [4.0, 3.0, -0.39]
+    meters = np.where(np.arange(len(ts)) % 3, "h1", "h2")
+    whole = AnomalyDetector().score(list(meters), ts, kwh)
+
+    split = AnomalyDetector(capacity=1)
+    parts = [split.score(list(meters[a:b]), ts[a:b], kwh[a:b]) for a, b in ((0, 7), (7, 201), (201, 202),
+                                                                          (202, len(ts)))]
+    for name in MODELS + ("score",):
+        np.testing.assert_allclose(np.concatenate([part[name] for part in parts]), whole[name],
+                                   rtol=1e-6, atol=1e-9)
+    assert (np.concatenate([part["anomaly"] for part in parts]) == whole["anomaly"]).all()
+    assert whole["anomaly"].sum() >= 2
+
+
+def test_recent_alerts_keep_the_newest():
+    from anomaly import AnomalyDetector
+
+    ts, kwh = daily_load(30)
+    kwh[[400, 500, 600]] += 3.0
+    detector = AnomalyDetector(keep_alerts=2)
+    alerts = detector.detect("h1", ts, kwh)
+    assert detector.recent_alerts("h1") == alerts[-2:]
+    assert detector.recent_alerts("other") == []
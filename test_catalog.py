@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def test_inventory_kwh_prices_unknown_names_as_other():
+    from catalog import ApplianceCatalog
+
+    catalog = ApplianceCatalog.from_file()
+    fan, other = catalog.index["Fan"], catalog.index["Other"]
+    assert catalog.indices(["Fan", "Zzz"]).tolist() == [fan, other]
+    kwh = catalog.daily_kwh(["Fan", "Zzz"], [10, 2])
+    assert np.allclose(kwh, [10 * catalog.on_kwh_per_hour[fan] + catalog.standby_kwh_per_day[fan],
+                             2 * catalog.on_kwh_per_hour[other] + catalog.standby_kwh_per_day[other]])
+
+
+def test_shift_windows_wrap_past_midnight():
+    from catalog import ApplianceCatalog
+    from tariff import hour_window
+
+    assert np.flatnonzero(hour_window(22, 3)).tolist() == [0, 1, 2, 22, 23]
+    assert np.flatnonzero(hour_window(6, 9)).tolist() == [6, 7, 8]
+    assert hour_window(0, 24).all()
+    catalog = ApplianceCatalog.from_file()
+    assert catalog.shift_hours[catalog.index["Geyser"]].tolist() == hour_window(22, 8).tolist()
+    assert not catalog.shift_hours[catalog.index["Fan"]].any()
+
+
+def test_usage_chart_keeps_fractional_hours():
+    from chart_manager import UsageChart, agg_canvas_factory
+
+    chart = UsageChart(agg_canvas_factory)
+    chart.update(["Fan", "Geyser"], [7.5, 0.3])
+    assert [label.get_text() for label in chart.bar_labels] == ["7.5h", "0.3h"]
@@ -0,0 +1,29 @@
+def test_chart_regeneration_keeps_memory_flat():
+    import gc
+    import matplotlib.pyplot as plt
+    from chart_manager import AnalysisChart, UsageChart, agg_canvas_factory
+
+    analysis = AnalysisChart(agg_canvas_factory)
+    usage = UsageChart(agg_canvas_factory)
+
+    def regenerate(i):
+        count = 3 + (i // 2) % 4  # exercise both the in-place and the rebuild paths
+        names = [f"Appliance {n}" for n in range(count)]
+        hours = [(i + n) % 24 + 1 for n in range(count)]
+        # draw_idle() renders synchronously on the Agg canvas
+        analysis.update(names, hours, [h * 5 for h in hours], (hours, hours))
+        usage.update(names, hours)
+
+    for i in range(8):
+        regenerate(i)
+    gc.collect()
+    baseline = len(gc.get_objects())
+    for i in range(100):
+        regenerate(i)
+    gc.collect()
+    growth = len(gc.get_objects()) - baseline
+
+    assert plt.get_fignums() == []
+    assert len(analysis.cost_ax.patches) <= 6 and len(usage.pie_ax.patches) <= 6
+    assert len(analysis.cost_ax.texts) <= 6 and len(usage.pie_ax.texts) <= 12
+    assert growth < 500, f"{growth} objects left behind"
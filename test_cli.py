@@ -0,0 +1,38 @@
+import io
+import json
+
+
+def test_summary_counts_appliances_not_catalog_slots():
+    import core
+    from catalog import ApplianceCatalog
+    from tariff import Tariff
+
+    tariff, catalog = Tariff.from_file(), ApplianceCatalog.from_file()
+    rows = core.summarize_batch([("h1", {"Fan": 3, "Zzz": 2, "Yyy": 1}), ("h2", {})], tariff, catalog)
+    assert [row["appliances"] for row in rows] == [3, 0]
+    assert rows[1]["heaviest_appliance"] is None
+    # Unknown names are priced as "Other", once each
+    assert rows[0]["daily_kwh"] == round(float(catalog.daily_kwh(["Fan", "Zzz", "Yyy"], [3, 2, 1]).sum()), 3)
+
+
+def test_bad_rows_are_skipped(capsys):
+    import cli
+    from catalog import ApplianceCatalog
+    from tariff import Tariff
+
+    tariff, catalog = Tariff.from_file(), ApplianceCatalog.from_file()
+    lines = io.StringIO("household,appliance,hours\nh1,Fan,8\nh1,TV,abc\nh2,Fan,nan\nh2,TV,4\nh3,Fan,30\n")
+    output = io.StringIO()
+    assert cli.run(cli.read_inventories(lines, "csv"), output, tariff, catalog) == 3
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(row["household"], row["appliances"]) for row in results] == [("h1", 1), ("h2", 1), ("h3", 0)]
+    errors = capsys.readouterr().err
+    assert "line 3" in errors and "line 4" in errors and "line 6" in errors
+
+    lines = io.StringIO('{"household": "a", "appliances": {"Fan": 2}}\nnot json\n'
+                        '{"household": "b", "appliances": {"Fan": "x"}}\n{"household": "c", "appliances": {"TV": 1}}\n'
+                        '{"household": "d", "appliances": {}}\n')
+    output = io.StringIO()
+    assert cli.run(cli.read_inventories(lines, "jsonl"), output, tariff, catalog, with_detail=True) == 3
+    assert "line 2" in capsys.readouterr().err
+    assert json.loads(output.getvalue().splitlines()[-1])["scenarios"] == []
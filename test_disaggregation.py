@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+# Appliance: (watts, first minute of the day, minutes on); all run at full draw
+SCHEDULE = {"Fan": (75, 22 * 60, 8 * 60), "Water Pump": (750, 6 * 60 + 30, 60), "Microwave": (1200, 13 * 60, 30),
+            "Computer": (150, 9 * 60, 4 * 60)}
+
+
+def synthetic_meter(days=14, seed=0):
+    """1-minute readings of SCHEDULE over a 50 W always-on load."""
+    rng = np.random.default_rng(seed)
+    ts = 1_700_006_400 + 60 * np.arange(days * 1440)  # starts at midnight UTC
+    minute = (ts % 86400) // 60
+    load_w = np.full(len(ts), 50.0)
+    for watts, start, length in SCHEDULE.values():
+        load_w += watts * ((minute - start) % 1440 < length)
+    load_w += rng.normal(0, 5, len(ts))
+    return ts, load_w / 1000 / 60
+
+
+def test_recovers_known_hours():
+    from catalog import ApplianceCatalog
+    from disaggregation import disaggregate, estimated_hours
+
+    catalog = ApplianceCatalog.from_file()
+    ts, kwh = synthetic_meter()
+    typed = {"Fan": 12, "Water Pump": 2, "Microwave": 1, "Computer": 2}
+    result = disaggregate(ts, kwh, typed, catalog)
+    hours = estimated_hours(result)
+    for name, (_, _, length) in SCHEDULE.items():
+        assert hours[name] == pytest.approx(length / 60, rel=0.1), name
+    assert result["baseline_daily_kwh"] == pytest.approx(1.2, abs=0.1)
+    assert result["appliances"]["Water Pump"]["watts"] == pytest.approx(750, rel=0.05)
+
+
+def test_lower_envelope_matches_brute_force():
+    from disaggregation import lower_envelope
+
+    rng = np.random.default_rng(3)
+    for size in (1, 2, 5, 300):
+        slopes = rng.choice(rng.normal(size=size), size)  # with repeated slopes
+        intercepts = rng.normal(size=size)
+        hull, breaks = lower_envelope(slopes, intercepts)
+        y = rng.normal(0, 3, 500)
+        best = hull[np.searchsorted(breaks, y)]
+        np.testing.assert_allclose(intercepts[best] - slopes[best] * y, (intercepts - slopes * y[:, None]).min(axis=1))
+
+
+def test_large_inventories_decode_fewer_states():
+    from disaggregation import MAX_APPLIANCES, MAX_STATES, appliance_states, max_on_for, state_count
+
+    states = appliance_states(6, 2)
+    assert states.shape == (state_count(6, 2), 6) == (22, 6)
+    assert len({row.tobytes() for row in states}) == 22 and states.sum(axis=1).max() == 2
+    assert max_on_for(4) == 5
+    assert state_count(MAX_APPLIANCES, max_on_for(MAX_APPLIANCES)) <= MAX_STATES
+    with pytest.raises(ValueError):
+        max_on_for(MAX_APPLIANCES + 1)
+
+
+def test_endpoint_refuses_too_many_appliances(tmp_path):
+    from disaggregation import MAX_APPLIANCES
+    from main import create_app
+
+    client = create_app("memory", str(tmp_path / "meters"), trust_household_header=True).test_client()
+    headers = {"X-Household-Id": "h1"}
+    ts, kwh = synthetic_meter(days=1)
+    upload = "".join(f'{{"ts": {t}, "kwh": {k}}}\n' for t, k in zip(ts, kwh))
+    assert client.post("/meter/readings", headers=headers, data=upload).status_code == 200
+    for i in range(MAX_APPLIANCES + 1):
+        client.post("/add_appliance", headers=headers, json={"appliance": f"Lamp {i}", "hours": 1})
+    response = client.post("/meter/disaggregate", headers=headers)
+    assert response.status_code == 400 and "too many" in response.get_json()["error"]
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def test_pack_histories_flags_bad_rows():
+    from forecasting import pack_histories
+
+    values, mask, errors = pack_histories([[100, 110, 120], "123", b"123", [1, "x", 3], [1, float("nan"), 3],
+                                           [1, 2], [5, 6, 7, 8]])
+    assert sorted(errors) == [1, 2, 3, 4, 5]
+    assert values.shape == (7, 4)
+    assert mask.sum(axis=1).tolist() == [3, 0, 0, 0, 0, 0, 4]
+    assert values[0].tolist() == [0, 100, 110, 120]
+
+
+def test_batch_matches_single_forecasts():
+    from forecasting import MODELS, forecast, forecast_batch
+
+    rng = np.random.default_rng(0)
+    histories = [rng.uniform(500, 2000, size).round(2).tolist() for size in (3, 5, 12, 24)]
+    for model in MODELS:
+        batch = forecast_batch(histories, model)
+        for history, result in zip(histories, batch):
+            assert result["predicted_bill"] == round(forecast(history, model=model), 2)
+
+
+def test_trend_extends_a_straight_line():
+    from forecasting import forecast
+
+    assert abs(forecast([100, 200, 300], model="trend") - 400) < 1e-9
+    assert abs(forecast([100, 200, 300, 400, 500], model="trend") - 600) < 1e-9
+
+
+def test_batch_endpoint_rejects_string_rows(tmp_path):
+    from main import create_app
+
+    client = create_app("memory", str(tmp_path)).test_client()
+    results = client.post("/predict_bill/batch", json={"households": ["123", [100, 110, 120]]}).get_json()["results"]
+    assert "error" in results[0]
+    assert "predicted_bill" in results[1]
@@ -0,0 +1,40 @@
+import numpy as np
+
+
+def test_lookup_tolerates_typos_and_rewording():
+    from knowledge_base import KnowledgeBase
+
+    kb = KnowledgeBase.from_file()
+    question = "Why is my bill high?"
+    expected = kb.answers[kb.questions.index(question)]
+    assert kb.lookup("why is my BILL high") == (kb.questions.index(question), 1.0)
+    assert kb.answer("why is my bil so hihg") == expected
+    assert kb.answer("quantum chromodynamics lattice", default="?") == "?"
+
+
+def test_scores_match_dense_tf_idf():
+    from knowledge_base import KnowledgeBase, ngrams
+
+    entries = [{"question": q, "answer": str(i)}
+               for i, q in enumerate(["solar panels", "solar water heater", "led bulbs", "fridge door seal"])]
+    kb = KnowledgeBase(entries)
+    vocabulary = sorted(kb.idf)
+
+    def vector(text):
+        counts = ngrams(text)
+        v = np.array([(1 + np.log(counts[g])) * kb.idf[g] if counts[g] else 0.0 for g in vocabulary])
+        return v / (np.linalg.norm(v) or 1.0)
+
+    documents = np.array([vector(entry["question"]) for entry in entries])
+    query = "solar heater"
+    np.testing.assert_allclose(kb.scores(query), documents @ vector(query), rtol=1e-5)
+    assert kb.answer(query) == "1"
+
+
+def test_answer_many_and_empty_base():
+    from knowledge_base import KnowledgeBase
+
+    kb = KnowledgeBase.from_file()
+    questions = ["How to save energy?", "how to save energy", "zzz", "How to save energy?"]
+    assert kb.answer_many(questions, default="?") == [kb.answer(q, default="?") for q in questions]
+    assert KnowledgeBase([]).lookup("anything") == (None, 0.0)
@@ -0,0 +1,125 @@
+def make_client(tmp_path):
+    from main import create_app
+    return create_app("memory", str(tmp_path / "meters"), trust_household_header=True).test_client()
+
+
+def test_non_finite_input_is_rejected(tmp_path):
+    client = make_client(tmp_path)
+    headers = {"X-Household-Id": "h1"}
+    for hours in ("nan", "inf", "-5", "25", "1e308", "abc"):
+        response = client.post("/add_appliance", headers=headers, json={"appliance": "Fan", "hours": hours})
+        assert response.status_code == 400, hours
+    assert client.post("/add_appliance", headers=headers, json={"appliance": "Fan", "hours": "7.5"}).status_code == 200
+
+    response = client.post("/predict_bill", headers=headers,
+                           json={"prev_bill1": 100, "prev_bill2": 110, "prev_bill3": "nan"})
+    assert response.status_code == 400
+    # Nothing from the rejected request was stored, so the next forecast works
+    response = client.post("/predict_bill", headers=headers,
+                           json={"prev_bill1": 100, "prev_bill2": 110, "prev_bill3": 120})
+    assert "predicted_bill" in response.get_json()
+
+
+def test_household_comes_from_a_signed_cookie(tmp_path):
+    from main import HOUSEHOLD_COOKIE, create_app
+
+    app = create_app("memory", str(tmp_path / "meters"))
+    alice, mallory = app.test_client(), app.test_client()
+    assert alice.post("/add_appliance", json={"appliance": "Fan", "hours": 8}).status_code == 200
+    cookie = alice.get_cookie(HOUSEHOLD_COOKIE)
+    assert cookie is not None and cookie.http_only
+    owner = app.session_interface.get_signing_serializer(app).loads(cookie.value)["household"]
+    assert app.extensions["storage"].list_appliances(owner) == {"Fan": 8.0}
+
+    # Without a trusted proxy, naming a household gets you nothing
+    assert mallory.get("/analysis", headers={"X-Household-Id": owner}).status_code == 400
+    mallory.set_cookie(HOUSEHOLD_COOKIE, cookie.value[:-2] + "xx")
+    assert mallory.get("/analysis").status_code == 400
+    assert alice.get("/analysis").status_code == 200
+
+
+def test_trusted_header_selects_the_household(tmp_path):
+    client = make_client(tmp_path)
+    client.post("/add_appliance", headers={"X-Household-Id": "h1"}, json={"appliance": "Fan", "hours": 8})
+    assert client.get("/analysis", headers={"X-Household-Id": "h1"}).status_code == 200
+    assert client.get("/analysis", headers={"X-Household-Id": "h2"}).status_code == 400
+
+
+def test_concurrent_requests_lose_no_updates(tmp_path):
+    import threading
+    from main import create_app
+
+    threads, requests_each = 16, 25
+    for url in ("memory", f"sqlite:///{tmp_path / 'energy.db'}"):
+        app = create_app(url, str(tmp_path / "meters"), trust_household_header=True)
+        errors = []
+
+        def hammer(worker):
+            client = app.test_client()
+            headers = {"X-Household-Id": "shared"}
+            for n in range(requests_each):
+                added = client.post("/add_appliance", headers=headers,
+                                    json={"appliance": f"Load {worker}-{n}", "hours": 1})
+                billed = client.post("/predict_bill", headers=headers, json={"prev_bill1": 100})
+                own = client.post("/add_appliance", headers={"X-Household-Id": f"own-{worker}"},
+                                  json={"appliance": "Fan", "hours": n})
+                if {added.status_code, billed.status_code, own.status_code} != {200}:
+                    errors.append((added.status_code, billed.status_code, own.status_code))
+
+        workers = [threading.Thread(target=hammer, args=(w,)) for w in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        storage = app.extensions["storage"]
+        assert errors == []
+        assert len(storage.list_appliances("shared")) == threads * requests_each
+        assert len(storage.bill_history("shared")) == threads * requests_each
+        assert all(storage.list_appliances(f"own-{w}") == {"Fan": requests_each - 1}
+                   for w in range(threads))
+        storage.close()
+
+
+def read_until(response, needle, found, timeout=10):
+    """Read an SSE response in the background until a chunk contains needle."""
+    import threading
+
+    def read():
+        for chunk in response.response:
+            if needle in chunk:
+                found.append(chunk)
+                return
+
+    thread = threading.Thread(target=read, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_events_reach_streams_on_other_workers(tmp_path):
+    from main import create_app
+
+    # Two apps on one database stand in for two gunicorn workers
+    url = f"sqlite:///{tmp_path / 'energy.db'}"
+    streams = create_app(url, str(tmp_path / "meters"), trust_household_header=True)
+    writer = create_app(url, str(tmp_path / "meters"), trust_household_header=True)
+    headers = {"X-Household-Id": "h1"}
+
+    responses, found, readers = [], [], []
+    for _ in range(3):
+        response = streams.test_client().get("/events", headers=headers, buffered=False)
+        assert next(response.response).startswith(b"retry:")
+        assert b"event: snapshot" in next(response.response)
+        responses.append(response)
+    assert streams.extensions["events"].subscriber_count("h1") == 3
+    for response in responses:
+        readers.append(read_until(response, b"event: appliance\n", found))
+
+    assert writer.test_client().post("/add_appliance", headers=headers,
+                                     json={"appliance": "Fan", "hours": 8}).status_code == 200
+    for reader in readers:
+        reader.join(10)
+    assert len(found) == 3
+    assert all(b'"name": "Fan"' in chunk for chunk in found)
+    for response in responses:
+        response.close()
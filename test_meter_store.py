@@ -0,0 +1,52 @@
+import io
+
+import numpy as np
+import pytest
+
+
+def test_ingest_round_trip(tmp_path):
+    from meter_store import MeterStore, ingest
+
+    store = MeterStore(str(tmp_path))
+    body = b"ts,kwh\n1700000000,0.5\r\n\n2023-11-14T22:15:00Z,0.25\n"
+    summary = ingest(io.BytesIO(body), store, "h1", fmt="csv", chunk_size=7)
+    assert summary["rows"] == 2 and summary["stored_rows"] == 2
+    ts, kwh = store.read("h1")
+    assert ts.tolist() == [1700000000, 1700000100] and kwh.tolist() == [0.5, 0.25]
+
+
+@pytest.mark.parametrize("ts", ["NaN", "Infinity", "-1", "1e300", '"NaT"', '"2300-01-01T00:00:00"'])
+def test_bad_timestamps_are_rejected(tmp_path, ts):
+    from meter_store import IngestError, MeterStore, ingest
+
+    store = MeterStore(str(tmp_path))
+    body = b'{"ts": 1700000000, "kwh": 1}\n{"ts": %s, "kwh": 1}\n' % ts.encode()
+    with pytest.raises(IngestError):
+        ingest(io.BytesIO(body), store, "h1")
+    assert store.rows("h1") == 0
+
+
+def test_parse_timestamps():
+    from meter_store import parse_timestamps
+
+    assert parse_timestamps([0, 1700000000.9]).tolist() == [0, 1700000000]
+    assert parse_timestamps(["1970-01-02T00:00:00Z"]).tolist() == [86400]
+    assert parse_timestamps([]).dtype == np.int64
+
+
+def test_overlong_lines_are_rejected(tmp_path):
+    from meter_store import IngestError, MeterStore, chunked_lines, ingest
+
+    store = MeterStore(str(tmp_path))
+    good = b'{"ts": 1700000000, "kwh": 1}\n'
+    # No newline at all: the ingester must not buffer it whole
+    endless = io.BytesIO(good + b"x" * 10_000_000)
+    with pytest.raises(IngestError) as error:
+        ingest(endless, store, "h1", chunk_size=4096, buffer_rows=1)
+    assert error.value.accepted == 1
+    assert endless.tell() < 100_000
+
+    lines = list(chunked_lines(io.BytesIO(b"a" * 100 + b"\nb\n"), chunk_size=1000, max_line=100))
+    assert lines == [[b"a" * 100, b"b"]]
+    with pytest.raises(ValueError):
+        list(chunked_lines(io.BytesIO(b"a" * 101 + b"\n"), chunk_size=1000, max_line=100))
@@ -0,0 +1,33 @@
+from pubsub import RESYNC, Broker, EventBus
+from storage import MemoryStorage
+
+
+def test_broker_resyncs_a_full_queue():
+    broker = Broker(queue_size=2)
+    with broker.subscribe("h1") as subscription:
+        for n in range(3):
+            broker.publish("h1", {"type": "reading", "n": n})
+        assert broker.publish("h2", {"type": "reading"}) == 0
+        assert subscription.get(0)[1] is RESYNC
+        assert subscription.get(0)[1]["n"] == 2
+        assert subscription.get(0) is None
+
+
+def test_event_bus_delivers_log_ids_and_resyncs_after_a_gap():
+    storage = MemoryStorage()
+    bus, other_worker = EventBus(storage), EventBus(storage)
+    # Poll by hand rather than from the background poller
+    bus.last_id = storage.last_event_id()
+    subscription = bus.broker.subscribe("h1")
+    other_worker.publish("h1", {"type": "appliance", "name": "Fan"})
+    other_worker.publish("h2", {"type": "appliance", "name": "Iron"})
+    assert bus.poll() == 2
+    event_id, event = subscription.get(0)
+    assert event == {"type": "appliance", "name": "Fan"} and event_id == storage.last_event_id() - 1
+    assert subscription.get(0) is None
+
+    # Events trimmed from the log before this worker read them
+    bus.last_id -= 5
+    assert bus.poll() == 2
+    assert subscription.get(0)[1] is RESYNC
+    subscription.close()
@@ -0,0 +1,41 @@
+import csv
+import os
+
+
+def test_household_ids_never_share_a_file(tmp_path):
+    from reports import report_paths, safe_filename
+
+    assert safe_filename("a/b") != safe_filename("a_b")
+    assert safe_filename("a/b").startswith("a_b-")
+    assert report_paths(tmp_path, "a/b") != report_paths(tmp_path, "a_b")
+    assert report_paths(tmp_path, "h1") == report_paths(tmp_path, "h1")
+
+
+def test_generate_reports_writes_one_file_per_household(tmp_path):
+    from reports import generate_reports
+
+    households = [("a/b", {"Fan": 8}), ("a_b", {"Geyser": 1.5, "TV": 4}), ("h3", {})]
+    stats = generate_reports(households, str(tmp_path), workers=0, formats=("txt",), charts=False)
+    assert stats == {"households": 3, "errors": 0, "seconds": stats["seconds"]}
+
+    with open(tmp_path / "manifest.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["household"] for row in rows] == ["a/b", "a_b", "h3"]
+    paths = [row["txt"] for row in rows]
+    assert len(set(paths)) == 3 and all(os.path.exists(path) for path in paths)
+    with open(paths[1], encoding="utf-8") as f:
+        assert "Geyser" in f.read()
+
+
+def test_pooled_run_leaves_no_chart_directories(tmp_path, monkeypatch):
+    import tempfile
+
+    from reports import generate_reports
+
+    scratch = tmp_path / "tmp"
+    scratch.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(scratch))
+    households = [(f"h{i}", {"Fan": 8, "Geyser": i % 3}) for i in range(6)]
+    stats = generate_reports(households, str(tmp_path / "out"), workers=2, formats=("pdf",), chunk_size=2)
+    assert stats["households"] == 6 and stats["errors"] == 0
+    assert list(scratch.iterdir()) == []
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+
+def setup():
+    from catalog import ApplianceCatalog
+    from tariff import Tariff
+
+    return Tariff.from_file(), ApplianceCatalog.from_file()
+
+
+def test_empty_inventory():
+    import scenarios
+
+    tariff, catalog = setup()
+    result = scenarios.evaluate([], [], tariff, catalog)
+    assert result["grid"].shape == (0, len(scenarios.REDUCTIONS), len(scenarios.SUBSTITUTIONS),
+                                    len(scenarios.SHIFTS))
+    assert result["ranked"] == []
+    assert result["heatmap"]["values"].shape == (0, len(result["heatmap"]["columns"]))
+
+
+def test_moves_are_scheduled_for_the_reduced_hours():
+    import scenarios
+    from scheduler import shift_plan
+
+    tariff, catalog = setup()
+    names, hours = ["Geyser", "Washing Machine", "Fan"], [3, 2, 8]
+    result = scenarios.evaluate(names, hours, tariff, catalog, top=50, per_appliance=50)
+    combined = [row for row in result["ranked"] if row["reduce_hours"] and row["shift"]]
+    assert combined
+    for row in combined:
+        left = hours[names.index(row["appliance"])] - row["reduce_hours"]
+        move = next(move for move in shift_plan([row["appliance"]], [left], tariff, catalog))
+        assert row["label"].endswith(f"move it to {move['optimized']}")
+
+
+def test_stopping_an_appliance_is_not_ranked():
+    import scenarios
+
+    tariff, catalog = setup()
+    result = scenarios.evaluate(["Geyser", "Iron"], [2, 1], tariff, catalog, top=50, per_appliance=50)
+    assert result["ranked"]
+    assert not any(row["reduce_hours"] >= {"Geyser": 2, "Iron": 1}[row["appliance"]] for row in result["ranked"])
+    # ... though the grid still prices it, and it saves the most
+    grid = result["grid"]
+    assert np.nanargmax(grid[0, :, 0, 0]) == 2
+    savings = [row["daily_savings"] for row in result["ranked"]]
+    assert savings == sorted(savings, reverse=True)
+
+
+def test_grid_agrees_with_the_other_savings_figures():
+    import core
+    import scenarios
+
+    tariff, catalog = setup()
+    names, hours = ["Air Conditioner", "Fan", "TV"], [8, 10, 5]
+    grid = scenarios.evaluate(names, hours, tariff, catalog)["grid"]
+    per_appliance, total = core.reduction_savings(names, hours, tariff, catalog, cut_hours=2)
+    r = scenarios.REDUCTIONS.index(2)
+    np.testing.assert_allclose(grid[:, r, 0, 0], per_appliance)
+
+    # The same bill behind the breakdown, the batch summary and the cut-everything total
+    breakdown = core.cost_breakdown(dict(zip(names, hours)), tariff, catalog)
+    summary = core.summarize_batch([("h1", dict(zip(names, hours)))], tariff, catalog)[0]
+    assert summary["monthly_bill"] == round(breakdown["monthly_bill"], 2)
+    assert summary["daily_savings_if_cut"] == round(total, 2)
+    assert breakdown["total_cost"] * tariff.days_per_month + tariff.fixed_charge * (1 + tariff.tax_rate) \
+        == pytest.approx(breakdown["monthly_bill"])
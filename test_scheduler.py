@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+
+def setup():
+    from catalog import ApplianceCatalog
+    from tariff import Tariff
+
+    return Tariff.from_file(), ApplianceCatalog.from_file()
+
+
+def test_cheapest_slots_and_block_match_brute_force():
+    from scheduler import cheapest_block, cheapest_slots, run_profile
+
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        prices = rng.choice([0.8, 1.0, 1.3], 24)
+        allowed = rng.random(24) < 0.4
+        hours = float(rng.integers(1, 6))
+        start = int(rng.integers(24))
+        current = run_profile(hours, start)
+        allowed |= current > 0
+
+        split = cheapest_slots(np.array(hours), allowed, current, prices)
+        assert split.sum() == pytest.approx(hours) and not split[~allowed].any()
+        assert split @ prices == pytest.approx(np.sort(prices[allowed])[:int(hours)].sum())
+
+        block = cheapest_block(np.array(hours), allowed, np.array(start), prices)
+        options = [run_profile(hours, s) for s in range(24)]
+        fitting = [profile @ prices for profile in options if not (profile > 0)[~allowed].any()]
+        assert block @ prices == pytest.approx(min(fitting))
+        assert not (block > 0)[~allowed].any()
+
+
+def test_savings_are_the_drop_in_the_bill():
+    from scheduler import optimize
+
+    tariff, catalog = setup()
+    rng = np.random.default_rng(1)
+    hours = np.round(rng.random((50, len(catalog))) * 6 * (rng.random((50, len(catalog))) < 0.5), 1)
+    result = optimize(hours, tariff, catalog)
+    daily = catalog.inventory_kwh(hours)
+    standby = (hours > 0) @ catalog.standby_kwh_per_day / 24
+
+    def bill(schedule):
+        profile = np.einsum("hcs,c->hs", schedule, catalog.on_kwh_per_hour) + standby[:, None]
+        return tariff.monthly_bill(daily * tariff.days_per_month, profile)
+
+    drop = (bill(result["current"]) - bill(result["optimized"])) / tariff.days_per_month
+    np.testing.assert_allclose(result["total_savings"], drop, atol=1e-9)
+    assert (result["daily_savings"] >= -1e-12).all()
+
+
+def test_shift_plan_keeps_appliances_that_cannot_save():
+    from scheduler import describe_slots, shift_plan
+
+    tariff, catalog = setup()
+    plan = shift_plan(["Washing Machine", "Refrigerator", "Fan"], [2, 24, 8], tariff, catalog)
+    moved = [move["appliance"] for move in plan]
+    assert "Refrigerator" not in moved
+    assert all(move["daily_savings"] > 0 for move in plan)
+    assert [move["daily_savings"] for move in plan] == sorted((move["daily_savings"] for move in plan),
+                                                             reverse=True)
+    assert describe_slots(np.r_[np.zeros(22), 1.0, 1.0]) == "22:00-00:00"
+    assert describe_slots(np.r_[1.0, 0.5, np.zeros(21), 1.0]) == "23:00-01:30"
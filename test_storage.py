@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    from storage import create_storage
+
+    url = "memory" if request.param == "memory" else f"sqlite:///{tmp_path / 'energy.db'}"
+    storage = create_storage(url)
+    yield storage
+    storage.close()
+
+
+def test_appliances_and_bills(storage):
+    storage.set_appliance("h1", "Fan", 8.0)
+    storage.set_appliance("h1", "Fan", 6.0)
+    storage.set_appliance("h1", "TV", 3.0)
+    storage.set_appliance("h2", "Iron", 1.0)
+    assert storage.list_appliances("h1") == {"Fan": 6.0, "TV": 3.0}
+    assert storage.remove_appliance("h1", "TV") and not storage.remove_appliance("h1", "TV")
+    assert storage.list_appliances("h1") == {"Fan": 6.0}
+    assert storage.list_appliances("nobody") == {}
+
+    for amount in (100, 110, 120):
+        storage.add_bill("h1", amount)
+    assert storage.bill_history("h1") == [100.0, 110.0, 120.0]
+    assert storage.bill_history("h1", 2) == [110.0, 120.0]
+    assert storage.bill_history("h2") == []
+
+
+def test_state_version_counts_changes(storage):
+    assert storage.state_version("h1") == (0, None)
+    storage.set_appliance("h1", "Fan", 8.0)
+    storage.set_appliance("h1", "Fan", 6.0)
+    storage.add_bill("h1", 100)
+    version, modified = storage.state_version("h1")
+    assert version == 3 and modified > 0
+    # Nothing removed, nothing changed
+    storage.remove_appliance("h1", "TV")
+    assert storage.state_version("h1")[0] == 3
+    storage.remove_appliance("h1", "Fan")
+    assert storage.state_version("h1")[0] == 4
+    assert storage.state_version("h2") == (0, None)
+
+
+def test_sqlite_triggers_see_direct_writes(tmp_path):
+    from storage import SQLiteStorage
+
+    path = str(tmp_path / "energy.db")
+    storage = SQLiteStorage(path, pool_size=2)
+    storage.add_bill("h1", 100)
+    # Another process writing to the tables still moves the version
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE bills SET amount = 90 WHERE household_id = 'h1'")
+        conn.execute("INSERT INTO appliances VALUES ('h1', 'Fan', 8)")
+        conn.execute("DELETE FROM appliances WHERE household_id = 'h1'")
+    assert storage.state_version("h1")[0] == 4
+    assert storage.bill_history("h1") == [90.0]
+    storage.close()
+
+
+def test_concurrent_bills_get_distinct_months(storage):
+    threads = [threading.Thread(target=lambda: [storage.add_bill("h1", 1) for _ in range(25)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(storage.bill_history("h1")) == 100
+    assert storage.state_version("h1")[0] == 100
+
+
+def test_event_log(storage):
+    from storage import EVENT_LOG_SIZE, EVENT_TRIM_EVERY
+
+    assert storage.last_event_id() == 0
+    ids = [storage.append_event("h1", str(n)) for n in range(3)]
+    assert storage.events_after(ids[0]) == [(ids[1], "h1", "1"), (ids[2], "h1", "2")]
+    assert storage.events_after(0, limit=1) == [(ids[0], "h1", "0")]
+    assert storage.last_event_id() == ids[-1]
+
+    # Old events are trimmed, so a reader that fell behind sees a gap
+    for n in range(EVENT_LOG_SIZE + EVENT_TRIM_EVERY):
+        storage.append_event("h2", "x")
+    assert storage.events_after(0, limit=1)[0][0] > ids[-1] + 1
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+
+def test_slab_boundaries():
+    from tariff import Tariff
+
+    tariff = Tariff.from_file()
+    kwh = [0, 50, 100, 101, 300, 500, 600, -10]
+    expected = [0, 150, 300, 305, 1300, 2700, 3550, 0]
+    assert np.allclose(tariff.energy_charge(kwh), expected)
+    assert np.allclose(tariff.monthly_bill(kwh), (np.array(expected) + 50) * 1.05)
+    assert tariff.energy_charge(np.zeros((2, 3))).shape == (2, 3)
+
+
+def test_top_slab_is_charged_beyond_the_last_limit():
+    from tariff import Tariff
+
+    tariff = Tariff([{"upto": 100, "rate": 2.0}, {"upto": None, "rate": 4.0}])
+    assert np.allclose(tariff.energy_charge([100, 150, 10_000]), [200, 400, 39_800])
+    with pytest.raises(ValueError):
+        Tariff([{"upto": 100, "rate": 2.0}, {"upto": 200, "rate": 4.0}])
+    with pytest.raises(ValueError):
+        Tariff([{"upto": 200, "rate": 2.0}, {"upto": 100, "rate": 4.0}, {"upto": None, "rate": 5.0}])
+
+
+def test_tou_weighting():
+    from tariff import Tariff
+
+    tariff = Tariff.from_file()
+    multipliers = tariff.hourly_multipliers
+    assert multipliers[[22, 23, 0, 5]].tolist() == [0.85] * 4
+    assert multipliers[[18, 21]].tolist() == [1.2] * 2
+    assert multipliers[[6, 12, 17]].tolist() == [1.0] * 3
+
+    flat = np.ones(24)
+    night = np.zeros(24)
+    night[0] = 1.0
+    assert np.isclose(tariff.tou_factor(flat), (8 * 0.85 + 4 * 1.2 + 12) / 24)
+    assert np.isclose(tariff.tou_factor(night), 0.85)
+    assert tariff.tou_factor(np.zeros(24)) == 1.0
+    # Only the energy charge is weighted, not the fixed charge
+    assert np.isclose(tariff.monthly_bill(300, night), (1300 * 0.85 + 50) * 1.05)
+
+
+def test_appliance_costs_add_up_to_the_bill():
+    from tariff import Tariff
+
+    tariff = Tariff.from_file()
+    daily = np.array([[1.0, 2.5, 6.0], [0.0, 0.0, 0.0]])
+    costs = tariff.appliance_daily_costs(daily)
+    bills = tariff.monthly_bill(daily.sum(axis=1) * 30)
+    assert np.allclose(costs.sum(axis=1) * 30 + 50 * 1.05, bills)
+
+
+def test_bill_endpoint_rejects_non_finite(tmp_path):
+    from main import create_app
+
+    client = create_app("memory", str(tmp_path)).test_client()
+    for kwh in ([100, "nan", None], [100, float("inf")], [[1, 2]], [-5], ["abc"]):
+        assert client.post("/tariff/bill", json={"kwh": kwh}).status_code == 400, kwh
+    response = client.post("/tariff/bill", json={"kwh": [100, 600]}).get_json()
+    assert response["bills"] == [367.5, 3780.0]
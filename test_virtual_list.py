@@ -0,0 +1,65 @@
+import random
+
+
+def reference(values, order, sort_key, reverse, predicate):
+    """Rows in view, by brute force: insertion order breaks sort ties."""
+    rows = [(row_id, values[row_id]) for row_id in order
+            if predicate is None or predicate(row_id, values[row_id])]
+    if sort_key is not None:
+        rows.sort(key=lambda row: sort_key(*row))
+    return rows[::-1] if reverse else rows
+
+
+def test_list_model_matches_a_full_sort():
+    from virtual_list import ListModel
+
+    views = [
+        (None, False, None),
+        (lambda row_id, value: value, False, None),
+        (lambda row_id, value: value, True, None),
+        (lambda row_id, value: row_id, False, lambda row_id, value: value >= 3),
+        (lambda row_id, value: -value, True, lambda row_id, value: row_id < "m"),
+    ]
+    rng = random.Random(0)
+    for case in range(300):
+        sort_key, reverse, predicate = rng.choice(views)
+        model = ListModel(sort_key, reverse, predicate)
+        values, order = {}, []
+        for _ in range(rng.randrange(1, 40)):
+            row_id = rng.choice("abcdefghijklmnopqrstuvwxyz")
+            if row_id in values and rng.random() < 0.3:
+                before = reference(values, order, sort_key, reverse, predicate)
+                expected = next((i for i, row in enumerate(before) if row[0] == row_id), None)
+                assert model.delete(row_id) == expected
+                del values[row_id]
+                order.remove(row_id)
+            else:
+                if row_id not in values:
+                    order.append(row_id)
+                values[row_id] = rng.randrange(6)
+                index = model.set(row_id, values[row_id])
+                rows = reference(values, order, sort_key, reverse, predicate)
+                expected = next((i for i, row in enumerate(rows) if row[0] == row_id), None)
+                assert index == expected, case
+            assert model.window(0, len(values)) == reference(values, order, sort_key, reverse, predicate), case
+
+        sort_key, reverse, predicate = rng.choice(views)
+        model.set_view(sort_key, reverse, predicate)
+        rows = reference(values, order, sort_key, reverse, predicate)
+        assert model.window(0, len(values)) == rows
+        assert [model.index(row_id) for row_id, _ in rows] == list(range(len(rows)))
+
+
+def test_selection_is_dropped_when_filtered_or_deleted():
+    from virtual_list import ListModel
+
+    model = ListModel()
+    model.reset([("Fan", 8), ("Geyser", 1), ("TV", 4)])
+    model.selected = "Geyser"
+    model.set_view(predicate=lambda row_id, hours: hours > 2)
+    assert model.selected is None and len(model) == 2
+    model.selected = "TV"
+    model.delete("TV")
+    assert model.selected is None
+    assert model.window(0, 10) == [("Fan", 8)]
+    assert model.window(5, 10) == []
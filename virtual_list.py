@@ -0,0 +1,260 @@
+"""Virtualized list view for large appliance inventories.
+
+ListModel holds the rows (stable id -> value), their order after the
+current sort and filter, and the selection; it has no Tk dependency.
+Inserts, updates and deletes are applied as diffs with bisect on the
+sorted order, so nothing is re-sorted or rebuilt per change.
+
+VirtualList draws the model on a Canvas from a small pool of rectangle and
+text items, one per row that fits in view. Scrolling, sorting, filtering
+and edits only reconfigure that pool (once per idle callback), so the
+widget costs the same with ten rows or ten thousand. Rows are addressed by
+their id, never by parsing the displayed label.
+"""
+import bisect
+import itertools
+import tkinter as tk
+from tkinter import font as tkfont
+from tkinter import ttk
+
+
+class ListModel:
+    def __init__(self, sort_key=None, reverse=False, predicate=None):
+        self.values = {}
+        self.sort_key = sort_key  # sort_key(row_id, value)
+        self.reverse = reverse
+        self.predicate = predicate  # predicate(row_id, value) -> bool
+        self.selected = None
+        self._seq = {}
+        self._keys = {}
+        self._order = []  # (sort value, seq, id) of rows passing the filter
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._order)
+
+    def __contains__(self, row_id):
+        return row_id in self.values
+
+    def _key(self, row_id, value):
+        primary = self.sort_key(row_id, value) if self.sort_key is not None else 0
+        return (primary, self._seq[row_id], row_id)
+
+    def _position(self, index):
+        return len(self._order) - 1 - index if self.reverse else index
+
+    def set(self, row_id, value):
+        """Insert or update a row; returns its index in view, or None if filtered out."""
+        if row_id in self.values:
+            self._unlink(row_id)
+        else:
+            self._seq[row_id] = next(self._counter)
+        self.values[row_id] = value
+        if self.predicate is not None and not self.predicate(row_id, value):
+            return None
+        key = self._keys[row_id] = self._key(row_id, value)
+        position = bisect.bisect_left(self._order, key)
+        self._order.insert(position, key)
+        return self._position(position)
+
+    def delete(self, row_id):
+        """Remove a row; returns the index it had in view, or None."""
+        index = self._unlink(row_id)
+        del self.values[row_id], self._seq[row_id]
+        if self.selected == row_id:
+            self.selected = None
+        return index
+
+    def _unlink(self, row_id):
+        key = self._keys.pop(row_id, None)
+        if key is None:
+            return None
+        position = bisect.bisect_left(self._order, key)
+        index = self._position(position)
+        del self._order[position]
+        return index
+
+    def reset(self, items):
+        self.values.clear()
+        self._seq.clear()
+        self.selected = None
+        for row_id, value in items:
+            self._seq[row_id] = next(self._counter)
+            self.values[row_id] = value
+        self._reorder()
+
+    def set_view(self, sort_key=None, reverse=False, predicate=None):
+        """Change sort and filter together with a single re-sort."""
+        self.sort_key = sort_key
+        self.reverse = reverse
+        self.predicate = predicate
+        self._reorder()
+
+    def _reorder(self):
+        keep = self.predicate
+        self._keys = {
+            row_id: self._key(row_id, value)
+            for row_id, value in self.values.items()
+            if keep is None or keep(row_id, value)
+        }
+        self._order = sorted(self._keys.values())
+        if self.selected not in self._keys:
+            self.selected = None
+
+    def row(self, index):
+        """(id, value) of the row at a position in view."""
+        row_id = self._order[self._position(index)][2]
+        return row_id, self.values[row_id]
+
+    def index(self, row_id):
+        key = self._keys.get(row_id)
+        if key is None:
+            return None
+        return self._position(bisect.bisect_left(self._order, key))
+
+    def window(self, start, count):
+        """Rows in view from `start`, at most `count` of them."""
+        stop = min(start + count, len(self._order))
+        return [self.row(index) for index in range(max(start, 0), stop)]
+
+
+class VirtualList(tk.Frame):
+    """Scrollable list that only draws the rows in view.
+
+    format_row(row_id, value) gives the label text. Selecting a row fires
+    <<ListSelect>>; selection() returns the selected id.
+    """
+
+    def __init__(self, master, format_row=None, height=8, width=50, font=("Helvetica", 12),
+                 background="white", foreground="black",
+                 select_background="#3498DB", select_foreground="white", **frame_options):
+        super().__init__(master, **frame_options)
+        self.model = ListModel()
+        self.format_row = format_row or (lambda row_id, value: f"{row_id} - {value}")
+        self.font = tkfont.Font(font=font)
+        self.row_height = self.font.metrics("linespace") + 4
+        self.colors = (background, foreground, select_background, select_foreground)
+        self.top = 0
+        self._pool = []
+        self._render_job = None
+
+        self.canvas = tk.Canvas(self, height=height * self.row_height,
+                                width=self.font.measure("0") * width, bg=background,
+                                highlightthickness=1, highlightbackground="#CCCCCC")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.canvas.bind("<Configure>", lambda event: self.refresh())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<MouseWheel>", lambda event: self.yview("scroll", -1 if event.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda event: self.yview("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda event: self.yview("scroll", 1, "units"))
+
+    # -------------------- Edits (diffs) --------------------
+    def set(self, row_id, value):
+        was_above = self._above_view(row_id)
+        index = self.model.set(row_id, value)
+        # Keep the rows on screen where they are when something lands above them
+        self.top += (index is not None and index < self.top) - was_above
+        self.refresh()
+
+    def delete(self, row_id):
+        index = self.model.delete(row_id)
+        if index is not None and index < self.top:
+            self.top -= 1
+        self.refresh()
+
+    def reset(self, items):
+        self.model.reset(items)
+        self.top = 0
+        self.refresh()
+
+    def _above_view(self, row_id):
+        index = self.model.index(row_id)
+        return index is not None and index < self.top
+
+    # -------------------- Sort, filter, selection --------------------
+    def set_view(self, sort_key=None, reverse=False, predicate=None):
+        self.model.set_view(sort_key, reverse, predicate)
+        self.top = 0
+        self.see(self.model.selected)
+
+    def selection(self):
+        return self.model.selected
+
+    def select(self, row_id):
+        self.model.selected = row_id if row_id in self.model else None
+        self.refresh()
+        self.event_generate("<<ListSelect>>")
+
+    def see(self, row_id):
+        index = self.model.index(row_id) if row_id is not None else None
+        if index is not None:
+            visible = self.visible_rows()
+            if index < self.top:
+                self.top = index
+            elif index >= self.top + visible:
+                self.top = index - visible + 1
+        self.refresh()
+
+    def _on_click(self, event):
+        index = self.top + event.y // self.row_height
+        if index < len(self.model):
+            self.select(self.model.row(index)[0])
+
+    # -------------------- Scrolling and drawing --------------------
+    def visible_rows(self):
+        height = self.canvas.winfo_height()
+        if height <= 1:  # not mapped yet
+            height = int(self.canvas["height"])
+        return max(1, height // self.row_height)
+
+    def yview(self, *args):
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.model))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.top += step * visible if args[2] == "pages" else step
+        self.refresh()
+
+    def refresh(self):
+        """Redraw the visible rows once, on the next idle callback."""
+        if self._render_job is None:
+            self._render_job = self.after_idle(self._render)
+
+    def _render(self):
+        self._render_job = None
+        visible = self.visible_rows()
+        total = len(self.model)
+        self.top = max(0, min(self.top, total - visible))
+        background, foreground, select_background, select_foreground = self.colors
+        width = max(self.canvas.winfo_width(), int(self.canvas["width"]))
+
+        while len(self._pool) < visible + 1:
+            self._pool.append((
+                self.canvas.create_rectangle(0, 0, 0, 0, width=0),
+                self.canvas.create_text(0, 0, anchor="w", font=self.font),
+            ))
+
+        rows = self.model.window(self.top, visible + 1)
+        for slot, (rect, text) in enumerate(self._pool):
+            if slot >= len(rows):
+                self.canvas.itemconfigure(rect, state="hidden")
+                self.canvas.itemconfigure(text, state="hidden")
+                continue
+            row_id, value = rows[slot]
+            selected = row_id == self.model.selected
+            y = slot * self.row_height
+            self.canvas.coords(rect, 0, y, width, y + self.row_height)
+            self.canvas.coords(text, 4, y + self.row_height / 2)
+            self.canvas.itemconfigure(rect, state="normal",
+                                      fill=select_background if selected else background)
+            self.canvas.itemconfigure(text, state="normal", text=self.format_row(row_id, value),
+                                      fill=select_foreground if selected else foreground)
+
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
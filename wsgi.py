@@ -0,0 +1,19 @@
+"""Production entry point for the Flask app.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every gunicorn worker process imports this module and builds its own app,
+so each worker has its own SQLite connection pool; WAL mode lets all of
+them read concurrently, and writes for one household are serialized by the
+database (see storage.py). Set ENERGY_STORAGE=sqlite:///path/to/energy.db
+to put the database somewhere persistent. MemoryStorage is per process, so
+only use ENERGY_STORAGE=memory with a single worker.
+
+Household ids come from signed cookies; workers share the signing key
+through ENERGY_SECRET_KEY, or else a .secret_key file the first one writes.
+Set ENERGY_TRUST_HOUSEHOLD_HEADER=1 only behind a proxy that authenticates
+users and sets X-Household-Id itself.
+"""
+from main import create_app
+
+app = create_app()